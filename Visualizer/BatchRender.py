@@ -0,0 +1,222 @@
+"""
+BatchRender.py
+
+Renders the graphs in user_graphs for many log files at once, without a Streamlit server. The logs are loaded through
+the parsed log cache and graphed in a pool of worker processes, one log per process at a time, and each log is written
+to a standalone HTML report, along with an index page linking to all of them.
+
+Usage: python Visualizer/BatchRender.py <log file> [<log file> ...] [--output DIR] [--workers N] ...
+"""
+
+from GraphFuncTypes import load_fields
+from GraphRunner import run_graphs
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Sequence, Set
+import Downsampling
+import LogCache
+import argparse
+import html
+import os
+import sys
+import time
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+# The summary of one rendered log that is shown on the index page
+report_summary_t = Dict[str, Any]
+
+# The file that the reports load plotly.js from, when it is written next to them
+PLOTLY_JS_FILE = "plotly.min.js"
+
+_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+.graphs { display: grid; grid-template-columns: repeat(2, minmax(0, 1fr)); gap: 1em; }
+.graph { height: 450px; }
+.error { color: #b00020; background: #fdecea; padding: 1em; border-radius: 4px; }
+table { border-collapse: collapse; }
+th, td { padding: 0.4em 1em; border-bottom: 1px solid #ddd; text-align: left; }
+"""
+
+def render_log(log_path: str, report_path: str, lazy: bool = False, graph_timeout: float | None = None,
+    point_budget: int | None = Downsampling.DEFAULT_POINT_BUDGET,
+    include_plotlyjs: str = "directory") -> report_summary_t:
+    """
+    Load one log file, generate each graph in user_graphs for it and write them to an HTML report. Runs in a worker
+    process, so only the summary is sent back rather than the parsed data or figures.
+
+    Parameters:
+    log_path (str): The log file to render.
+    report_path (str): The HTML file to write.
+    lazy (bool): Whether to parse the sandbox logs lazily, as with the visualizer's --lazy option.
+    graph_timeout (float | None): Show an error instead of any graph that takes longer than this many seconds.
+    point_budget (int | None): The maximum number of points drawn for each trace, or None to draw every point.
+    include_plotlyjs (str): How the report includes plotly.js, as for plotly.io.to_html.
+
+    Returns:
+    report_summary_t: The summary of the log shown on the index page.
+    """
+    # Imported here so that the graphs configured when the worker starts are used, rather than pickled ones
+    from UserGraphs import user_graphs
+
+    start = time.perf_counter()
+    summary: report_summary_t = {"log": log_path, "report": os.path.basename(report_path), "errors": []}
+
+    try:
+        fields = load_fields(user_graphs)
+        data = LogCache.load(os.path.abspath(log_path), 1, lazy, tuple(sorted(fields)) if fields is not None else None)
+    except Exception as e:
+        summary["errors"].append("Error parsing log file: " + str(e))
+        summary["seconds"] = time.perf_counter() - start
+        return summary
+
+    summary["timestamps"] = len(data.timestamps)
+    summary["last_timestamp"] = int(data.timestamps[-1]) if len(data.timestamps) > 0 else None
+    summary["total_pnl"] = sum(float(activity.profit_and_loss[-1])
+        for activity in data.activities.values() if len(activity) > 0)
+
+    # Keep the graphs in the order they are configured in, as the visualizer does
+    graphs: List[str] = [""] * len(user_graphs)
+
+    for index, graph, _ in run_graphs(user_graphs, data, timeout=graph_timeout, point_budget=point_budget):
+        if isinstance(graph, str):
+            summary["errors"].append(graph)
+            graphs[index] = '<div class="error">' + html.escape(graph) + '</div>'
+        else:
+            graphs[index] = '<div class="graph">' + pio.to_html(graph, include_plotlyjs=False, full_html=False,
+                default_height="100%") + '</div>'
+
+    title = html.escape(os.path.basename(log_path))
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>' + title + '</title>\n')
+        f.write(_plotlyjs_tag(include_plotlyjs) + '\n<style>' + _STYLE + '</style>\n</head>\n<body>\n')
+        f.write('<h1>' + title + '</h1>\n<p><a href="index.html">All logs</a></p>\n<div class="graphs">\n')
+        f.write("\n".join(graphs))
+        f.write('\n</div>\n</body>\n</html>\n')
+
+    summary["graphs"] = len(user_graphs)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def _plotlyjs_tag(include_plotlyjs: str) -> str:
+    if include_plotlyjs == "inline":
+        return '<script type="text/javascript">' + get_plotlyjs() + '</script>'
+
+    if include_plotlyjs == "cdn":
+        # The version bundled with plotly.py, as plotly-latest stopped being updated at plotly.js 1.58
+        return '<script src="https://cdn.plot.ly/plotly-' + get_plotlyjs_version() + '.min.js"></script>'
+
+    return '<script src="' + PLOTLY_JS_FILE + '"></script>'
+
+def report_names(log_paths: Sequence[str]) -> List[str]:
+    """
+    Choose a report file name for each log, based on the log's file name. Logs with the same file name in different
+    directories are numbered.
+    """
+    names: List[str] = []
+    used: Set[str] = {"index.html"}
+
+    for log_path in log_paths:
+        base = os.path.splitext(os.path.basename(log_path))[0]
+        name = base + ".html"
+        number = 2
+
+        while name in used:
+            name = base + "-" + str(number) + ".html"
+            number += 1
+
+        used.add(name)
+        names.append(name)
+
+    return names
+
+def write_index(path: str, summaries: List[report_summary_t]) -> None:
+    """
+    Write the index page, with a row linking to each report
+    """
+    rows: List[str] = []
+
+    for summary in summaries:
+        log = html.escape(summary["log"])
+
+        # Logs that could not be parsed have no report to link to
+        if "graphs" in summary:
+            log = '<a href="' + html.escape(summary["report"]) + '">' + log + '</a>'
+
+        pnl = summary.get("total_pnl")
+        cells = [log, str(summary.get("timestamps", "")), "{:,.2f}".format(pnl) if pnl is not None else "",
+            "{:.2f}s".format(summary["seconds"]), "<br>".join(html.escape(error) for error in summary["errors"])]
+        rows.append("<tr>" + "".join("<td>" + cell + "</td>" for cell in cells) + "</tr>")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>IMC Prosperity Logs</title>\n')
+        f.write('<style>' + _STYLE + '</style>\n</head>\n<body>\n<h1>IMC Prosperity Logs</h1>\n<table>\n')
+        f.write("<tr><th>Log</th><th>Timestamps</th><th>Total PnL</th><th>Render time</th><th>Errors</th></tr>\n")
+        f.write("\n".join(rows))
+        f.write("\n</table>\n</body>\n</html>\n")
+
+def render_logs(log_paths: Sequence[str], output_dir: str, workers: int | None = None, lazy: bool = False,
+    graph_timeout: float | None = None, point_budget: int | None = Downsampling.DEFAULT_POINT_BUDGET,
+    include_plotlyjs: str = "directory") -> List[report_summary_t]:
+    """
+    Render a report for each log file into the output directory, using up to workers processes (one per CPU core if
+    None), and write the index page. Returns the summary of each log, in the order the logs were given.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    if include_plotlyjs == "directory":
+        with open(os.path.join(output_dir, PLOTLY_JS_FILE), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+
+    names = report_names(log_paths)
+    summaries: List[report_summary_t | None] = [None] * len(log_paths)
+
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, max(len(log_paths), 1))) as pool:
+        futures = {pool.submit(render_log, log_path, os.path.join(output_dir, name), lazy, graph_timeout,
+            point_budget, include_plotlyjs): index for index, (log_path, name) in enumerate(zip(log_paths, names))}
+
+        for future in as_completed(futures):
+            index = futures[future]
+
+            try:
+                summary = future.result()
+            except Exception as e:
+                # Failing to write one report, or to send its summary back, only fails that log
+                summary = {"log": log_paths[index], "report": names[index],
+                    "errors": ["Error rendering log: " + str(e)], "seconds": time.perf_counter() - start}
+
+            summaries[index] = summary
+            print("{:.2f}s {}{}".format(summary["seconds"], summary["log"],
+                " (" + str(len(summary["errors"])) + " errors)" if summary["errors"] else ""))
+
+    results = [summary for summary in summaries if summary is not None]
+    write_index(os.path.join(output_dir, "index.html"), results)
+    return results
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Render the configured graphs for many log files to HTML")
+    arg_parser.add_argument("log_files", nargs="+", help="the log files downloaded from the IMC Prosperity website")
+    arg_parser.add_argument("--output", default="reports", help="the directory to write the reports to")
+    arg_parser.add_argument("--workers", type=int, default=None,
+        help="number of processes used to render logs (default: one per CPU core)")
+    arg_parser.add_argument("--lazy", action="store_true",
+        help="only index the sandbox logs, and decode each timestamp when a graph first uses it")
+    arg_parser.add_argument("--graph-timeout", type=float, default=None, metavar="SECONDS",
+        help="show an error instead of a graph that takes longer than this to generate")
+    arg_parser.add_argument("--points", type=int, default=Downsampling.DEFAULT_POINT_BUDGET,
+        help="the maximum number of points drawn for each trace, or 0 to draw every point")
+    arg_parser.add_argument("--plotlyjs", choices=["directory", "inline", "cdn"], default="directory",
+        help="write plotly.js once next to the reports (default), into every report, or load it from the internet")
+    args = arg_parser.parse_args()
+
+    missing = [log_file for log_file in args.log_files if not os.access(log_file, os.R_OK)]
+
+    if missing:
+        print("Error: Cannot read file " + ", ".join(missing))
+        sys.exit(1)
+
+    summaries = render_logs(args.log_files, args.output, args.workers, args.lazy, args.graph_timeout,
+        args.points if args.points > 0 else None, args.plotlyjs)
+    print("Wrote " + os.path.join(args.output, "index.html"))
@@ -0,0 +1,229 @@
+"""
+Benchmark.py
+
+Times each stage of parsing a log file and each predefined graph on synthetic logs of several sizes, and reports the
+throughput and peak memory of each. Save the results of a run with --json, then pass them to a later run with
+--baseline to see what got faster or slower.
+
+Usage: python Visualizer/Benchmark.py [--ticks 1000 10000 ...] [--json results.json] [--baseline results.json]
+"""
+
+from LogParser import LogData, parse, parse_activities_log, parse_sandbox_logs, parse_submission_logs
+from LogGenerator import DEFAULT_PRODUCTS, generate
+from OrderBook import build_order_books
+from TradeTape import build_trade_tape
+from ValueStore import build_value_columns
+from functools import partial
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import PredefinedGraphs
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The result of one benchmark: the log size, the stage or graph measured, and its measurements
+result_t = Dict[str, Any]
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """
+    Run a function several times and return its fastest wall and CPU time in seconds, and the peak memory it
+    allocated in bytes. The peak memory is measured in a separate run, as tracing allocations slows everything down.
+    Memory allocated by worker processes is not included.
+    """
+    best_wall = best_cpu = float("inf")
+
+    for _ in range(repeat):
+        gc.collect()
+        wall, cpu = time.perf_counter(), time.process_time()
+        func()
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": best_wall, "cpu_seconds": best_cpu, "peak_bytes": peak}
+
+def log_path(directory: str, ticks: int, products: Sequence[str], depth: int, trades_per_tick: float,
+    value_keys: Sequence[str]) -> str:
+    """
+    Generate a synthetic log with the given parameters, unless it was already generated by an earlier run
+    """
+    name = "-".join(["bench", str(ticks), "x".join(products), str(depth), str(trades_per_tick)] + list(value_keys))
+    path = os.path.join(directory, name + ".log")
+
+    if not os.path.exists(path):
+        with open(path + ".tmp", "w") as f:
+            generate(f, ticks, products, depth, trades_per_tick, value_keys)
+
+        os.replace(path + ".tmp", path)
+
+    return path
+
+def split_sections(lines: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Split the lines of a log file into the sandbox logs, submission logs and activities log sections
+    """
+    submission = lines.index("Submission logs:")
+    activities = lines.index("Activities log:")
+    return (lines[lines.index("Sandbox logs:") + 1:submission], lines[submission + 1:activities],
+        lines[activities + 1:])
+
+def graph_funcs(data: LogData, value_keys: Sequence[str]) -> Dict[str, Callable[[LogData], Any]]:
+    """
+    The predefined graphs, with their extra parameters filled in for the synthetic log
+    """
+    product = next(iter(data.activities))
+    funcs: Dict[str, Callable[[LogData], Any]] = {
+        "summary": PredefinedGraphs.summary,
+        "pnl": PredefinedGraphs.pnl,
+        "positions": PredefinedGraphs.positions,
+        "mid_prices": PredefinedGraphs.mid_prices,
+        "pnl_mid_price_product": partial(PredefinedGraphs.pnl_mid_price_product, product),
+        "trades_histogram": partial(PredefinedGraphs.trades_histogram, product,
+            int(data.activities[product].mid_price[0])),
+        "logger_overhead": PredefinedGraphs.logger_overhead,
+        "order_book_heatmap": partial(PredefinedGraphs.order_book_heatmap, product),
+        "bollinger_bands": partial(PredefinedGraphs.bollinger_bands, product, 50),
+    }
+
+    if value_keys:
+        funcs["logged_values"] = partial(PredefinedGraphs.logged_values, list(value_keys))
+
+    return funcs
+
+def run_graph(graph_func: Callable[[LogData], Any], data: LogData) -> Any:
+    """
+    Generate a graph from data without the order books, trade tape, value columns and indicators that earlier runs
+    built and memoized in it, so every run measures building them too
+    """
+    data.clear_caches()
+    return graph_func(data)
+
+def run(ticks: int, directory: str, products: Sequence[str], depth: int, trades_per_tick: float,
+    value_keys: Sequence[str], workers: int, repeat: int) -> List[result_t]:
+    """
+    Benchmark every parse stage and predefined graph on one synthetic log
+    """
+    path = log_path(directory, ticks, products, depth, trades_per_tick, value_keys)
+    size = os.path.getsize(path)
+    results: List[result_t] = []
+
+    def add(stage: str, func: Callable[[], Any], items: int) -> None:
+        result: result_t = {"ticks": ticks, "stage": stage, "bytes": size}
+        result.update(measure(func, repeat))
+        result["items_per_second"] = items / result["seconds"] if result["seconds"] > 0 else float("inf")
+        results.append(result)
+        print_result(result)
+
+    def read_lines() -> List[str]:
+        with open(path) as f:
+            return [line.rstrip("\r\n") for line in f]
+
+    def parse_file(workers: int = 1, lazy: bool = False) -> LogData:
+        with open(path, "rb" if lazy else "r") as f:
+            return parse(f, workers, lazy)
+
+    lines = read_lines()
+    sandbox, submission, activities = split_sections(lines)
+
+    add("read", read_lines, len(lines))
+    add("parse_sandbox_logs", lambda: parse_sandbox_logs(sandbox), len(sandbox))
+
+    if workers > 1:
+        add("parse_sandbox_logs (" + str(workers) + " workers)", lambda: parse_sandbox_logs(sandbox, workers),
+            len(sandbox))
+
+    add("parse_submission_logs", lambda: parse_submission_logs(submission), len(submission))
+    add("parse_activities_log", lambda: parse_activities_log(activities), len(activities))
+    add("parse", parse_file, len(lines))
+    add("parse (lazy)", partial(parse_file, lazy=True), len(lines))
+
+    data = parse_file()
+    add("build_order_books", lambda: build_order_books(data.trading_states, data.timestamps), len(data.trading_states))
+    add("build_trade_tape", lambda: build_trade_tape(data.trading_states), len(data.trading_states))
+    add("build_value_columns", lambda: build_value_columns(data.values), len(data.values))
+
+    for name, graph_func in graph_funcs(data, value_keys).items():
+        add("graph " + name, partial(run_graph, graph_func, data), len(data.trading_states))
+
+    return results
+
+def print_result(result: result_t, baseline: result_t | None = None) -> None:
+    line = "{:>8} {:<36} {:>9.4f}s {:>9.4f}s {:>10.1f} MB {:>12,.0f}/s".format(result["ticks"], result["stage"],
+        result["seconds"], result["cpu_seconds"], result["peak_bytes"] / 1e6, result["items_per_second"])
+
+    if baseline is not None:
+        line += " {:>+8.1%}".format(result["seconds"] / baseline["seconds"] - 1)
+
+    print(line)
+    sys.stdout.flush()
+
+def compare(results: List[result_t], baseline: List[result_t], tolerance: float) -> bool:
+    """
+    Print each result next to the same benchmark in the baseline, and return whether any got slower by more than
+    the tolerance
+    """
+    previous = {(result["ticks"], result["stage"]): result for result in baseline}
+    regressed = False
+    print("\nCompared to the baseline (positive is slower):")
+
+    for result in results:
+        base = previous.get((result["ticks"], result["stage"]))
+
+        if base is None:
+            continue
+
+        print_result(result, base)
+        regressed |= result["seconds"] > base["seconds"] * (1 + tolerance)
+
+    return regressed
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark parsing and graphing synthetic log files")
+    arg_parser.add_argument("--ticks", type=int, nargs="+", default=[1000, 10000],
+        help="the sizes of the logs to benchmark, in timestamps (default: 1000 10000)")
+    arg_parser.add_argument("--products", nargs="+", default=list(DEFAULT_PRODUCTS))
+    arg_parser.add_argument("--depth", type=int, default=3, help="the price levels on each side of the book")
+    arg_parser.add_argument("--trades", type=float, default=1.0,
+        help="the average number of market trades of each product at each timestamp")
+    arg_parser.add_argument("--values", nargs="*", default=["fair_value", "signal"],
+        help="the names of the custom values logged")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+        help="the number of processes to also benchmark parallel parsing with (default: one per CPU core)")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="the number of runs to take the fastest of")
+    arg_parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "imc_visualizer_benchmark"),
+        help="the directory the generated logs are kept in, so later runs can reuse them")
+    arg_parser.add_argument("--json", help="write the results to this file")
+    arg_parser.add_argument("--baseline", help="compare the results to those written by an earlier run with --json")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2,
+        help="with --baseline, exit with an error if anything is this much slower (default: 0.2)")
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    print("{:>8} {:<36} {:>10} {:>10} {:>13} {:>14}".format("ticks", "stage", "wall", "cpu", "peak memory",
+        "throughput"))
+    results: List[result_t] = []
+
+    for ticks in args.ticks:
+        results += run(ticks, args.dir, args.products, args.depth, args.trades, args.values, args.workers,
+            args.repeat)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
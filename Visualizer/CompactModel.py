@@ -0,0 +1,100 @@
+"""
+CompactModel.py
+
+Compact versions of the datamodel classes, which the parser builds instead of the classes in datamodel.py. They have
+the same attributes, but store them in __slots__ rather than a __dict__ for each object, which makes a long log take
+far less memory once parsed. The classes in datamodel.py are left as they are, as trading algorithms use them.
+"""
+
+from datamodel import Observation, Position, Product, Symbol, Time, UserId
+from typing import Any, Dict, List, Tuple
+import json
+import sys
+
+def intern(name: Any) -> Any:
+    """
+    Return the shared copy of a symbol, product or trader name, so that a name repeated on every line of the log is
+    stored once instead of once per line. Values that are not strings, such as missing names, are returned as they
+    are.
+    """
+    return sys.intern(name) if type(name) is str else name
+
+class Listing:
+    __slots__ = ("symbol", "product", "denomination")
+
+    def __init__(self, symbol: Symbol, product: Product, denomination: Product):
+        self.symbol = symbol
+        self.product = product
+        self.denomination = denomination
+
+# Every listing parsed so far, as listings are the same on every line of a log
+_listings: Dict[Tuple[Symbol, Product, Product], Listing] = {}
+
+def shared_listing(symbol: Symbol, product: Product, denomination: Product) -> Listing:
+    """
+    Return the listing with the given names, which is shared by every trading state that has it. Listings are never
+    changed once parsed.
+    """
+    key = (symbol, product, denomination)
+    listing = _listings.get(key)
+
+    if listing is None:
+        listing = _listings[key] = Listing(intern(symbol), intern(product), intern(denomination))
+
+    return listing
+
+class Order:
+    __slots__ = ("symbol", "price", "quantity")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+
+    def __str__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+    def __repr__(self) -> str:
+        return "(" + self.symbol + ", " + str(self.price) + ", " + str(self.quantity) + ")"
+
+class OrderDepth:
+    __slots__ = ("buy_orders", "sell_orders")
+
+    def __init__(self) -> None:
+        self.buy_orders: Dict[int, int] = {}
+        self.sell_orders: Dict[int, int] = {}
+
+class Trade:
+    __slots__ = ("symbol", "price", "quantity", "buyer", "seller", "timestamp")
+
+    def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId | None = None,
+        seller: UserId | None = None, timestamp: int = 0) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self.timestamp = timestamp
+
+class TradingState:
+    __slots__ = ("timestamp", "listings", "order_depths", "own_trades", "market_trades", "position", "observations")
+
+    def __init__(self, timestamp: Time, listings: Dict[Symbol, Listing], order_depths: Dict[Symbol, OrderDepth],
+        own_trades: Dict[Symbol, List[Trade]], market_trades: Dict[Symbol, List[Trade]],
+        position: Dict[Product, Position], observations: Dict[Product, Observation]):
+        self.timestamp = timestamp
+        self.listings = listings
+        self.order_depths = order_depths
+        self.own_trades = own_trades
+        self.market_trades = market_trades
+        self.position = position
+        self.observations = observations
+
+    def toJSON(self) -> str:
+        return json.dumps(self, default=_attributes, sort_keys=True)
+
+def _attributes(o: Any) -> Dict[str, Any]:
+    """
+    The attributes of a compact object as a dict, as datamodel's classes serialize their __dict__
+    """
+    return {name: getattr(o, name) for name in o.__slots__}
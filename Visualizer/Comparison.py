@@ -0,0 +1,221 @@
+"""
+Comparison.py
+
+Compares several runs of a trading algorithm, each from its own log file. The logs are parsed in parallel worker
+processes, which send back only the columns the comparison graphs use rather than the parsed trading states, and the
+columns of every run are aligned on one shared index of days and timestamps, so runs can be overlaid or subtracted
+row by row.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datamodel import Product, Time
+from LogParser import process_context
+from typing import Any, Dict, List, Sequence, Set
+import LogCache
+import hashlib
+import os
+import numpy as np
+
+# The fields parsed from each log, as the comparison graphs only use the activities log and the positions
+COMPARISON_FIELDS = frozenset({'activities', 'position'})
+
+class RunColumns:
+    """
+    The columns of one log that are compared. activity_days, activity_timestamps and profit_and_loss hold the rows of
+    each product's activity log. positions has one row per trading state and one column per product, and the trading
+    states are from position_day, the last day in the activities log.
+    """
+    def __init__(self, name: str, digest: str | None, products: List[Product],
+        activity_days: Dict[Product, np.ndarray], activity_timestamps: Dict[Product, np.ndarray],
+        profit_and_loss: Dict[Product, np.ndarray], position_day: int, position_timestamps: np.ndarray,
+        positions: np.ndarray):
+
+        self.name = name
+        self.digest = digest
+        self.products = products
+        self.activity_days = activity_days
+        self.activity_timestamps = activity_timestamps
+        self.profit_and_loss = profit_and_loss
+        self.position_day = position_day
+        self.position_timestamps = position_timestamps
+        self.positions = positions
+
+def run_columns(path: str, name: str) -> RunColumns:
+    """
+    Load a log file through the parsed log cache, and copy out the columns that are compared
+    """
+    data = LogCache.load(path, 1, False, COMPARISON_FIELDS)
+    products = list(data.activities.keys())
+    activities = {product: data.activities[product] for product in products}
+    position_day = max((int(activity.day[-1]) for activity in activities.values() if len(activity) > 0), default=0)
+
+    return RunColumns(name, data.digest, products,
+        {product: np.array(activity.day) for product, activity in activities.items()},
+        {product: np.array(activity.timestamp) for product, activity in activities.items()},
+        {product: np.array(activity.profit_and_loss) for product, activity in activities.items()},
+        position_day, np.array(data.timestamps), data.position_matrix(products))
+
+def run_names(paths: Sequence[str]) -> List[str]:
+    """
+    Choose a name for each run, based on its log's file name. Logs with the same file name in different directories
+    are numbered.
+    """
+    names: List[str] = []
+    used: Set[str] = set()
+
+    for path in paths:
+        base = os.path.splitext(os.path.basename(path))[0]
+        name = base
+        number = 2
+
+        while name in used:
+            name = base + "-" + str(number)
+            number += 1
+
+        used.add(name)
+        names.append(name)
+
+    return names
+
+class LogComparison:
+    """
+    The compared columns of several runs, aligned on the days and timestamps that any run has. Each row of the index
+    has its day, its timestamp within the day, and a timestamp that keeps increasing across days, which the graphs
+    use as their x axis and is the same as the timestamp within the day for logs of a single day. profit_and_loss
+    and positions hold an array for each product with one row per run and one column per row of the index, and
+    total_pnl holds the sum over each run's products. Values a run does not have at a row of the index are NaN.
+    Positions are only logged for the last day of each run.
+    """
+    def __init__(self, names: List[str], products: List[Product], days: np.ndarray, day_timestamps: np.ndarray,
+        timestamps: np.ndarray, profit_and_loss: Dict[Product, np.ndarray], total_pnl: np.ndarray,
+        positions: Dict[Product, np.ndarray], digest: str | None = None):
+
+        self.names = names
+        self.products = products
+        self.days = days
+        self.day_timestamps = day_timestamps
+        self.timestamps = timestamps
+        self.profit_and_loss = profit_and_loss
+        self.total_pnl = total_pnl
+        self.positions = positions
+
+        # Identifies the compared logs to the figure cache, like LogData.digest and LogData.fields
+        self.digest = digest
+        self.fields = COMPARISON_FIELDS
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def fork_locks(self) -> List[Any]:
+        """
+        The locks held while this data is changed, which is never, as its arrays are all computed when it is created
+        """
+        return []
+
+    def last_values(self, values: np.ndarray) -> np.ndarray:
+        """
+        Return the last value of each run that is not NaN, or NaN for runs without any
+        """
+        if values.shape[1] == 0:
+            return np.full(len(values), np.nan)
+
+        valid = ~np.isnan(values)
+        last = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        return np.where(valid.any(axis=1), values[np.arange(len(values)), last], np.nan)
+
+    def difference(self, values: np.ndarray, baseline: int = 0) -> np.ndarray:
+        """
+        Return the values of each run minus the values of the baseline run, which is NaN where either is missing
+        """
+        return values - values[baseline]
+
+    def window(self, start: Time, end: Time) -> 'LogComparison':
+        """
+        Return the rows of the index with timestamps between start and end (inclusive), as views of these arrays
+        rather than copies
+        """
+        rows = slice(int(np.searchsorted(self.timestamps, start, 'left')),
+            int(np.searchsorted(self.timestamps, end, 'right')))
+
+        return LogComparison(self.names, self.products, self.days[rows], self.day_timestamps[rows],
+            self.timestamps[rows], {product: values[:, rows] for product, values in self.profit_and_loss.items()},
+            self.total_pnl[:, rows], {product: values[:, rows] for product, values in self.positions.items()},
+            self.digest)
+
+def align_runs(runs: Sequence[RunColumns]) -> LogComparison:
+    """
+    Align the columns of several runs on the union of the days and timestamps they have. Each day is placed after the
+    previous one, one timestamp step after the latest timestamp of any day, so the timestamps of the index keep
+    increasing across days.
+    """
+    products: List[Product] = []
+
+    for run in runs:
+        products += [product for product in run.products if product not in products]
+
+    day_arrays = [days for run in runs for days in run.activity_days.values()] + \
+        [np.full(len(run.position_timestamps), run.position_day, dtype=np.int64) for run in runs]
+    timestamp_arrays = [timestamps for run in runs for timestamps in run.activity_timestamps.values()] + \
+        [run.position_timestamps for run in runs]
+    all_days = np.concatenate(day_arrays) if day_arrays else np.zeros(0, dtype=np.int64)
+    all_timestamps = np.concatenate(timestamp_arrays) if timestamp_arrays else np.zeros(0, dtype=np.int64)
+
+    first_day = int(all_days.min()) if len(all_days) > 0 else 0
+    steps = np.diff(np.unique(all_timestamps))
+    day_length = (int(all_timestamps.max()) if len(all_timestamps) > 0 else 0) + (int(steps.min()) if len(steps) > 0
+        else 1)
+
+    def index_keys(days: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        return (days.astype(np.int64) - first_day) * day_length + timestamps
+
+    timestamps = np.unique(index_keys(all_days, all_timestamps))
+    days = first_day + timestamps // day_length
+    day_timestamps = timestamps % day_length
+
+    profit_and_loss = {product: np.full((len(runs), len(timestamps)), np.nan) for product in products}
+    positions = {product: np.full((len(runs), len(timestamps)), np.nan) for product in products}
+    total_pnl = np.full((len(runs), len(timestamps)), np.nan)
+
+    for row, run in enumerate(runs):
+        if run.products:
+            total_pnl[row] = 0
+
+        for product in run.products:
+            columns = np.searchsorted(timestamps,
+                index_keys(run.activity_days[product], run.activity_timestamps[product]))
+            profit_and_loss[product][row, columns] = run.profit_and_loss[product]
+
+            # A product without a row at some timestamp makes the run's total unknown there
+            total_pnl[row] += profit_and_loss[product][row]
+
+        columns = np.searchsorted(timestamps, index_keys(np.full(len(run.position_timestamps), run.position_day),
+            run.position_timestamps))
+
+        for column, product in enumerate(run.products):
+            positions[product][row, columns] = run.positions[:, column]
+
+    digest = None
+
+    if all(run.digest is not None for run in runs):
+        digest = hashlib.blake2b("\n".join(str(run.name) + " " + str(run.digest) for run in runs).encode(),
+            digest_size=20).hexdigest()
+
+    return LogComparison([run.name for run in runs], products, days, day_timestamps, timestamps, profit_and_loss,
+        total_pnl, positions, digest)
+
+def load_comparison(paths: Sequence[str], workers: int | None = None) -> LogComparison:
+    """
+    Load several log files and align them for comparison, parsing up to workers logs at once in separate processes
+    (one per CPU core if None). Each worker only sends back the compared columns, so the trading states of every log
+    are never held in this process at once.
+    """
+    names = run_names(paths)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+
+    if workers == 1:
+        runs = [run_columns(path, name) for path, name in zip(paths, names)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+            runs = list(pool.map(run_columns, paths, names))
+
+    return align_runs(runs)
@@ -0,0 +1,254 @@
+"""
+DerivedSeries.py
+
+Computes indicators such as rolling means, volatility, VWAP, spread and book imbalance once per log, and shares them
+between every graph that uses them. An indicator is a function that returns one value for each row of a product's
+activity log, and may be built on other indicators, which are computed first and shared in the same way.
+"""
+
+from datamodel import Product
+from TradeTape import TradeTape
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Set, Tuple
+import inspect
+import threading
+import numpy as np
+
+if TYPE_CHECKING:
+    from LogParser import LogData
+
+indicator_func_t = Callable[..., np.ndarray]
+
+# The key an indicator's values are memoized under: the product, the indicator and its parameters
+series_key_t = Tuple[Product, indicator_func_t, Tuple[Tuple[str, Any], ...]]
+
+# The indicators that can be looked up by name
+INDICATORS: Dict[str, indicator_func_t] = {}
+
+def indicator(func: indicator_func_t) -> indicator_func_t:
+    """
+    A decorator that registers an indicator under its function name. An indicator function takes the DerivedSeries
+    to read the log data and other indicators from, the product, and keyword parameters that all have defaults, and
+    returns a NumPy array with one value for each row of the product's activity log.
+    """
+    INDICATORS[func.__name__] = func
+    return func
+
+class DerivedSeries:
+    """
+    The indicators computed from one LogData object, memoized by product, indicator and parameters. Safe to use from
+    several threads: an indicator that several graphs ask for at once is computed by the first and shared.
+    """
+    def __init__(self, data: 'LogData', parent: 'DerivedSeries | None' = None,
+        rows: Dict[Product, slice] | None = None):
+
+        self.data = data
+
+        # A time window of a log reads the indicators of the whole log and slices them, so rolling windows at the
+        # start of the time window still include the data before it
+        self._parent = parent
+        self._rows = rows if rows is not None else {}
+
+        self._series: Dict[series_key_t, np.ndarray] = {}
+        self._computing: Set[series_key_t] = set()
+        self._lock = threading.RLock()
+
+    def get(self, product: Product, indicator: str | indicator_func_t, **params: Any) -> np.ndarray:
+        """
+        Return the values of an indicator for a product, computing it and the indicators it uses if they have not
+        been computed yet. The indicator can be given by name or as the function itself. Passing the function means
+        that editing it also regenerates the figures cached by the visualizer. The returned array is shared, so it is
+        read-only.
+
+        Raises:
+        KeyError: If no indicator has the given name.
+        ValueError: If the indicator depends on itself.
+        """
+        func = INDICATORS[indicator] if isinstance(indicator, str) else indicator
+
+        if self._parent is not None:
+            return self._parent.get(product, func, **params)[self._rows[product]]
+
+        key = (product, func, _parameters(func, params))
+
+        with self._lock:
+            series = self._series.get(key)
+
+            if series is None:
+                if key in self._computing:
+                    raise ValueError("Indicator " + func.__name__ + " depends on itself")
+
+                self._computing.add(key)
+
+                try:
+                    series = func(self, product, **dict(key[2])).view()
+                finally:
+                    self._computing.discard(key)
+
+                series.flags.writeable = False
+                self._series[key] = series
+
+        return series
+
+    def window(self, data: 'LogData', rows: Dict[Product, slice]) -> 'DerivedSeries':
+        """
+        Return the indicators of a time window of this log, given the rows of each product's activity log in it
+        """
+        return DerivedSeries(data, self, rows)
+
+    def fork_locks(self) -> List[Any]:
+        """
+        The locks held while indicators are computed, of this series and the series of the whole log it is a window of
+        """
+        return [self._lock] + (self._parent.fork_locks() if self._parent is not None else [])
+
+def _parameters(func: indicator_func_t, params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    The parameters of an indicator with its defaults filled in, so that the same values are only computed once
+    however they are asked for
+    """
+    bound = inspect.signature(func).bind(None, None, **params)
+    bound.apply_defaults()
+    return tuple(list(bound.arguments.items())[2:])
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    The sum of each window of values ending at each row, in O(n). Windows that are not full, or that contain NaN, are
+    NaN.
+    """
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    result = np.full(len(values), np.nan)
+
+    if 0 < window <= len(values):
+        full = counts[window:] - counts[:-window] == window
+        result[window - 1:] = np.where(full, sums[window:] - sums[:-window], np.nan)
+
+    return result
+
+@indicator
+def mid_price(series: DerivedSeries, product: Product) -> np.ndarray:
+    """
+    The mid price in the activities log
+    """
+    return series.data.activities[product].mid_price
+
+@indicator
+def profit_and_loss(series: DerivedSeries, product: Product) -> np.ndarray:
+    """
+    The profit and loss in the activities log
+    """
+    return series.data.activities[product].profit_and_loss
+
+@indicator
+def spread(series: DerivedSeries, product: Product) -> np.ndarray:
+    """
+    The difference between the best ask and the best bid in the activities log
+    """
+    activity = series.data.activities[product]
+    return activity.ask_prices[:, 0] - activity.bid_prices[:, 0]
+
+@indicator
+def imbalance(series: DerivedSeries, product: Product, levels: int = 3) -> np.ndarray:
+    """
+    The bid volume minus the ask volume, divided by their total, in the given number of levels of the activities log
+    """
+    activity = series.data.activities[product]
+    bids = np.nansum(activity.bid_volumes[:, :levels], axis=1)
+    asks = np.nansum(activity.ask_volumes[:, :levels], axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (bids - asks) / (bids + asks)
+
+@indicator
+def returns(series: DerivedSeries, product: Product, source: str = "mid_price") -> np.ndarray:
+    """
+    The relative change of an indicator from the previous row
+    """
+    values = series.get(product, source)
+    result = np.full(len(values), np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[1:] = values[1:] / values[:-1] - 1
+
+    return result
+
+@indicator
+def rolling_mean(series: DerivedSeries, product: Product, source: str = "mid_price", window: int = 20) -> np.ndarray:
+    """
+    The mean of an indicator over the last window rows
+    """
+    return _rolling_sum(series.get(product, source), window) / window
+
+@indicator
+def rolling_std(series: DerivedSeries, product: Product, source: str = "mid_price", window: int = 20) -> np.ndarray:
+    """
+    The standard deviation of an indicator over the last window rows
+    """
+    values = series.get(product, source)
+
+    # Centre the values first, so that the squares summed are small and keep their precision
+    centre = np.nanmean(values) if np.any(~np.isnan(values)) else 0.0
+    mean = series.get(product, rolling_mean, source=source, window=window) - centre
+    variance = _rolling_sum((values - centre) ** 2, window) / window - mean ** 2
+    return np.sqrt(np.maximum(variance, 0))
+
+@indicator
+def zscore(series: DerivedSeries, product: Product, source: str = "mid_price", window: int = 20) -> np.ndarray:
+    """
+    The number of standard deviations an indicator is from its mean over the last window rows
+    """
+    mean = series.get(product, rolling_mean, source=source, window=window)
+    std = series.get(product, rolling_std, source=source, window=window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (series.get(product, source) - mean) / std
+
+@indicator
+def volatility(series: DerivedSeries, product: Product, window: int = 20) -> np.ndarray:
+    """
+    The standard deviation of the mid price's returns over the last window rows
+    """
+    return series.get(product, rolling_std, source="returns", window=window)
+
+@indicator
+def traded_volume(series: DerivedSeries, product: Product) -> np.ndarray:
+    """
+    The quantity of the product traded by the market in each row. Uses the market trades.
+    """
+    rows, trades = _market_trade_rows(series, product)
+    return np.bincount(rows, weights=trades.quantity, minlength=len(series.data.activities[product]))
+
+@indicator
+def traded_value(series: DerivedSeries, product: Product) -> np.ndarray:
+    """
+    The price times the quantity of the market trades of the product in each row. Uses the market trades.
+    """
+    rows, trades = _market_trade_rows(series, product)
+    return np.bincount(rows, weights=trades.price * trades.quantity,
+        minlength=len(series.data.activities[product]))
+
+@indicator
+def vwap(series: DerivedSeries, product: Product, window: int = 20) -> np.ndarray:
+    """
+    The volume-weighted average price of the market trades over the last window rows, which is NaN where nothing
+    traded. Uses the market trades.
+    """
+    value = _rolling_sum(series.get(product, traded_value), window)
+    volume = _rolling_sum(series.get(product, traded_volume), window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(volume > 0, value / volume, np.nan)
+
+def _market_trade_rows(series: DerivedSeries, product: Product) -> Tuple[np.ndarray, TradeTape]:
+    """
+    The market trades of a product, and the row of the activities log each was reported at. The sandbox logs are from
+    the last day in the activities log, so trades are matched to the rows of that day.
+    """
+    data = series.data
+    activity = data.activities[product]
+    trades = data.trade_tape.of(product, own=False)
+    day = activity.day_range()
+    rows = day.start + np.searchsorted(activity.timestamp[day], data.timestamps[trades.tick], 'right') - 1
+    reported = rows >= day.start
+    return rows[reported], trades[reported]
@@ -0,0 +1,157 @@
+"""
+Downsampling.py
+
+Reduces long time series to a limited number of points before they are sent to the browser, while keeping the shape
+of the series and any spikes in it. Graph functions should create line traces with the scatter function here instead
+of go.Scatter.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Tuple
+import numpy as np
+import plotly.graph_objects as go
+
+# The default maximum number of points drawn for each trace
+DEFAULT_POINT_BUDGET = 2000
+
+# The maximum number of points drawn for each trace, or None to disable downsampling. Each Streamlit session has its
+# own budget from its sidebar, so it is set for the graphs of one session with using_point_budget rather than globally.
+_point_budget: ContextVar[int | None] = ContextVar("point_budget", default=DEFAULT_POINT_BUDGET)
+
+# Traces with more points than this are drawn with WebGL, which stays responsive with far more points than SVG
+WEBGL_THRESHOLD = 5000
+
+downsample_func_t = Callable[[np.ndarray, np.ndarray, int], Tuple[np.ndarray, np.ndarray]]
+
+def current_point_budget() -> int | None:
+    """
+    Return the point budget of the graphs being generated in this context
+    """
+    return _point_budget.get()
+
+@contextmanager
+def using_point_budget(point_budget: int | None) -> Iterator[None]:
+    """
+    Draw the traces created inside this context with the given point budget, or every point if it is None
+    """
+    token = _point_budget.set(point_budget)
+
+    try:
+        yield
+    finally:
+        _point_budget.reset(token)
+
+def min_max(x: np.ndarray, y: np.ndarray, point_budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split the series into equal buckets and keep the minimum and maximum point of each one, so that no spike is ever
+    dropped. Runs in a few vectorized operations.
+    """
+    count = len(y)
+
+    if count <= point_budget:
+        return x, y
+
+    buckets = max(point_budget // 2, 1)
+    bucket_size = -(-count // buckets)
+
+    # Pad the series to a whole number of buckets. Padding and NaN values are never picked as a minimum or maximum.
+    values = np.asarray(y, dtype=np.float64)
+    padded = np.full(buckets * bucket_size, np.nan)
+    padded[:count] = values
+    padded = padded.reshape(buckets, bucket_size)
+    missing = np.isnan(padded)
+
+    offsets = np.arange(buckets) * bucket_size
+    lows = offsets + np.where(missing, np.inf, padded).argmin(axis=1)
+    highs = offsets + np.where(missing, -np.inf, padded).argmax(axis=1)
+
+    indices = np.unique(np.concatenate(([0, count - 1], np.minimum(lows, count - 1), np.minimum(highs, count - 1))))
+    return np.asarray(x)[indices], values[indices]
+
+def lttb(x: np.ndarray, y: np.ndarray, point_budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling, which keeps the points that best preserve the visual shape of the
+    series. Smoother than min_max, but may drop narrow spikes.
+    """
+    count = len(y)
+
+    if count <= point_budget or point_budget < 3:
+        return x, y
+
+    xs = np.asarray(x, dtype=np.float64)
+    ys = np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+    # The first and last points are always kept, and the rest are split into buckets of (nearly) equal size
+    edges = np.linspace(1, count - 1, point_budget - 1).astype(np.int64)
+    indices = np.empty(point_budget, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+    previous = 0
+
+    for bucket in range(point_budget - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # The third point of the triangle is the average of the next bucket
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = xs[end:next_end].mean() if next_end > end else xs[-1]
+        next_y = ys[end:next_end].mean() if next_end > end else ys[-1]
+
+        areas = np.abs((xs[previous] - next_x) * (ys[start:end] - ys[previous])
+            - (xs[previous] - xs[start:end]) * (next_y - ys[previous]))
+        previous = start + int(areas.argmax())
+        indices[bucket + 1] = previous
+
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+def sample_rows(x: Any, z: np.ndarray, point_budget: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep evenly spaced rows of a matrix with one row per point of x, such as the columns of a heatmap over time, so
+    that at most the point budget (the current point budget if not given) are drawn
+    """
+    if point_budget is None:
+        point_budget = current_point_budget()
+
+    x = np.asarray(x)
+
+    if point_budget is None or len(x) <= point_budget:
+        return x, z
+
+    indices = np.unique(np.linspace(0, len(x) - 1, point_budget).astype(np.int64))
+    return x[indices], z[indices]
+
+def scatter(x: Any, y: Any, point_budget: int | None = None, method: downsample_func_t = min_max,
+    **kwargs: Any) -> go.Scatter | go.Scattergl:
+    """
+    Create a line trace for the series, downsampled to the point budget (the current point budget if not given).
+    Other keyword arguments are passed to the trace, as with go.Scatter. The trace is drawn with WebGL if it still has
+    more than WEBGL_THRESHOLD points.
+    """
+    if point_budget is None:
+        point_budget = current_point_budget()
+
+    x, y = np.asarray(x), np.asarray(y)
+
+    # Series that are not numeric, such as logged strings, are drawn as they are
+    if point_budget is not None and y.dtype.kind in "biuf":
+        x, y = method(x, y, point_budget)
+
+    trace_type = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    return trace_type(x=x, y=y, **kwargs)
+
+def extend_trace(trace: go.Scatter | go.Scattergl, x: Any, y: Any) -> bool:
+    """
+    Append points to a trace made by scatter, and return True. Downsampling points that were already downsampled would
+    lose more of the series' shape each time, so once the trace would hold more than twice the point budget it is left
+    as it is and False is returned, and the figure should be generated again from the whole series instead.
+    """
+    new_x = np.concatenate((np.asarray(trace.x if trace.x is not None else []), np.asarray(x)))
+    new_y = np.concatenate((np.asarray(trace.y if trace.y is not None else []), np.asarray(y)))
+    point_budget = current_point_budget()
+
+    if point_budget is not None and len(new_y) > 2 * point_budget and new_y.dtype.kind in "biuf":
+        return False
+
+    trace.x = new_x
+    trace.y = new_y
+    return True
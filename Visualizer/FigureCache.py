@@ -0,0 +1,209 @@
+"""
+FigureCache.py
+
+Keeps generated figures in memory between Streamlit reruns, so only graphs whose code or data changed are generated
+again. Figures are keyed by the log data they were made from and a fingerprint of the graph function's code.
+"""
+
+from GraphFuncTypes import file_arguments
+from LogParser import LogData
+from collections import OrderedDict
+from functools import partial
+from types import CodeType, FunctionType, ModuleType
+from typing import Any, Callable, Hashable, List, Set, Tuple
+import numpy as np
+import plotly.graph_objects as go
+import hashlib
+import inspect
+import threading
+
+# The default limit on the total size of the cached figures' data
+DEFAULT_MAX_BYTES = 256 << 20
+
+# Global values referenced by a graph function are part of its fingerprint if their description is at most this long.
+# Larger values are described by their type and id, so the graph is regenerated whenever they are recreated.
+_MAX_VALUE_REPR = 10000
+
+def fingerprint(graph_func: Callable[..., Any]) -> str:
+    """
+    Return a hash of everything that determines what a graph function draws: its code, default arguments, closure
+    variables and the global functions and constants it uses, following called functions recursively, and the
+    contents of the files it declares with GraphFuncTypes.reads_files. Editing a function, or any function it calls,
+    changes its fingerprint.
+    """
+    parts: List[str] = []
+    _describe(graph_func, parts, set())
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+
+def _describe(value: Any, parts: List[str], visited: Set[int]) -> None:
+    """
+    Append a description of a value to parts, recursing into functions, code objects and containers
+    """
+    if id(value) in visited:
+        parts.append("<recursive>")
+        return
+
+    if isinstance(value, partial):
+        visited.add(id(value))
+        parts.append("partial")
+        _describe(value.func, parts, visited)
+        _describe(value.args, parts, visited)
+        _describe(value.keywords, parts, visited)
+
+        # The contents of the files a graph reads, such as a trading algorithm it replays
+        names = file_arguments(value.func)
+
+        if names:
+            arguments = inspect.signature(value.func).bind_partial(*value.args, **value.keywords).arguments
+
+            for name in names:
+                if name in arguments:
+                    parts.append("file " + _file_digest(arguments[name]))
+    elif isinstance(value, FunctionType):
+        visited.add(id(value))
+        parts.append("function " + str(value.__module__) + "." + value.__qualname__)
+        _describe(value.__code__, parts, visited)
+        _describe(value.__defaults__, parts, visited)
+        _describe(value.__kwdefaults__, parts, visited)
+
+        for cell in value.__closure__ or ():
+            try:
+                _describe(cell.cell_contents, parts, visited)
+            except ValueError:
+                # The closure variable has not been assigned yet
+                parts.append("<empty cell>")
+
+        # Follow the global names the function uses, including those used by nested functions and lambdas
+        for name in sorted(_global_names(value.__code__)):
+            if name in value.__globals__:
+                parts.append("global " + name)
+                _describe(value.__globals__[name], parts, visited)
+    elif isinstance(value, CodeType):
+        parts.append(value.co_code.hex())
+        parts.append(repr(value.co_names))
+
+        for const in value.co_consts:
+            _describe(const, parts, visited)
+    elif isinstance(value, (tuple, list, frozenset, set)):
+        visited.add(id(value))
+        parts.append(type(value).__name__ + " " + str(len(value)))
+
+        for item in (sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value):
+            _describe(item, parts, visited)
+    elif isinstance(value, dict):
+        visited.add(id(value))
+        parts.append("dict " + str(len(value)))
+
+        for key, item in value.items():
+            parts.append(repr(key))
+            _describe(item, parts, visited)
+    elif isinstance(value, ModuleType):
+        parts.append("module " + value.__name__)
+    elif isinstance(value, type):
+        parts.append("type " + value.__module__ + "." + value.__qualname__)
+    else:
+        description = repr(value)
+
+        if len(description) > _MAX_VALUE_REPR:
+            description = type(value).__qualname__ + " at " + str(id(value))
+
+        parts.append(description)
+
+def _file_digest(path: str) -> str:
+    """
+    Return a hash of a file's contents, or a description of the error if it cannot be read
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError as e:
+        return "<" + type(e).__name__ + ">"
+
+def _global_names(code: CodeType) -> Set[str]:
+    """
+    Return the names used by a code object and the code objects nested in it
+    """
+    names = set(code.co_names)
+
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _global_names(const)
+
+    return names
+
+def data_key(data: LogData, point_budget: int | None) -> Hashable | None:
+    """
+    Return a key identifying the log data a figure was generated from, including the time window and point budget,
+    or None if the data did not come from LogCache and so cannot be identified
+    """
+    if data.digest is None:
+        return None
+
+    timestamps = data.timestamps
+    window = (int(timestamps[0]), int(timestamps[-1]), len(timestamps)) if len(timestamps) > 0 else None
+    return (data.digest, data.fields, window, point_budget)
+
+def figure_size(fig: go.Figure) -> int:
+    """
+    Estimate the memory used by a figure's data from the arrays and lists in its traces
+    """
+    size = 0
+
+    for trace in fig.data:
+        for value in trace.to_plotly_json().values():
+            if isinstance(value, np.ndarray):
+                size += value.nbytes
+            elif isinstance(value, (list, tuple)):
+                size += 8 * len(value)
+
+        size += 1024
+
+    return size
+
+class FigureCache:
+    """
+    A least-recently-used cache of figures, which evicts figures once their total estimated size exceeds max_bytes.
+    Safe to use from several threads.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._figures: OrderedDict[Tuple[Hashable, str], Tuple[go.Figure, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, data: LogData, graph_func: Callable[..., Any],
+        point_budget: int | None) -> Tuple[Hashable, str] | None:
+        """
+        Return the cache key of a graph function applied to some log data with a point budget, or None if the figure
+        cannot be cached
+        """
+        key = data_key(data, point_budget)
+        return (key, fingerprint(graph_func)) if key is not None else None
+
+    def get(self, key: Tuple[Hashable, str] | None) -> go.Figure | None:
+        if key is None:
+            return None
+
+        with self._lock:
+            if key not in self._figures:
+                return None
+
+            self._figures.move_to_end(key)
+            return self._figures[key][0]
+
+    def put(self, key: Tuple[Hashable, str] | None, fig: go.Figure) -> None:
+        if key is None:
+            return
+
+        size = figure_size(fig)
+
+        with self._lock:
+            if key in self._figures:
+                self.size -= self._figures.pop(key)[1]
+
+            self._figures[key] = (fig, size)
+            self.size += size
+
+            # Always keep the newest figure, even if it is larger than the limit on its own
+            while self.size > self.max_bytes and len(self._figures) > 1:
+                self.size -= self._figures.popitem(last=False)[1][1]
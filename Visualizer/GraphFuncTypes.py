@@ -4,9 +4,126 @@ GraphFuncTypes.py
 Defines a few types that the graphing functions should adhere to
 """
 
-from typing import Callable, List
+from typing import Callable, FrozenSet, Iterable, List, Tuple, TypeVar
+from functools import partial
 import plotly.graph_objects as go
-from LogParser import LogData
+from LogParser import LogData, LOG_FIELDS, SEARCH_FIELDS
+from Comparison import LogComparison
 
 graph_func_t = Callable[[LogData], go.Figure]
 graph_func_list_t = List[graph_func_t]
+
+# Graphs of several logs, shown when the visualizer is given more than one log file
+comparison_graph_func_t = Callable[[LogComparison], go.Figure]
+comparison_graph_func_list_t = List[comparison_graph_func_t]
+
+# Appends data that is newer than a figure made by a graph function to it, returning False if it cannot
+figure_extender_t = Callable[[go.Figure, LogData], bool]
+
+F = TypeVar("F", bound=Callable[..., go.Figure])
+
+def uses_fields(*fields: str) -> Callable[[F], F]:
+    """
+    A decorator that declares which fields of LogData, or of the trading states in it, a graph function reads.
+    When every graph function in user_graphs declares its fields, the log file is parsed with only those fields,
+    which skips building the others. Field names are listed in LogParser.LOG_FIELDS.
+    """
+    unknown = set(fields) - LOG_FIELDS
+
+    if unknown:
+        raise ValueError("Unknown log fields: " + ", ".join(sorted(unknown)))
+
+    def decorator(graph_func: F) -> F:
+        graph_func.log_fields = frozenset(fields)  # type: ignore[attr-defined]
+        return graph_func
+
+    return decorator
+
+def extends_figure(extender: figure_extender_t) -> Callable[[F], F]:
+    """
+    A decorator that gives a graph function a way to append new data to a figure it made earlier, which the
+    visualizer uses when following a log file that is still being written. The extender is called with the figure
+    and the updated data, appends the points newer than the last point in the figure, and returns False if the
+    figure must be generated again instead, for example because a new product appeared or Downsampling.extend_trace
+    returned False.
+    """
+    def decorator(graph_func: F) -> F:
+        graph_func.extend_figure = extender  # type: ignore[attr-defined]
+        return graph_func
+
+    return decorator
+
+def reads_files(*arguments: str) -> Callable[[F], F]:
+    """
+    A decorator that declares which arguments of a graph function are the paths of files that its figure depends on,
+    such as a trading algorithm it runs. These arguments are given before the data with partial, and the figure cache
+    keys the figure by the contents of the files as well as by the graph function's code, so editing one of the files
+    generates the figure again.
+    """
+    def decorator(graph_func: F) -> F:
+        graph_func.file_arguments = arguments  # type: ignore[attr-defined]
+        return graph_func
+
+    return decorator
+
+def file_arguments(graph_func: Callable[..., go.Figure]) -> Tuple[str, ...]:
+    """
+    Returns the names of the arguments a graph function declared with reads_files, or an empty tuple if it did not
+    declare any
+    """
+    return getattr(graph_func, "file_arguments", ())
+
+def figure_extender(graph_func: Callable[..., go.Figure]) -> figure_extender_t | None:
+    """
+    Returns the extender a graph function declared with extends_figure, or None if it did not declare one
+    """
+    return getattr(graph_func, "extend_figure", None)
+
+def graph_fields(graph_func: Callable[..., go.Figure]) -> FrozenSet[str] | None:
+    """
+    Returns the fields a graph function declared with uses_fields, or None if it did not declare them.
+    Partially applied functions, such as partial(pnl_mid_price_product, "BANANAS"), use the declaration of the
+    function they wrap.
+    """
+    while not hasattr(graph_func, "log_fields") and isinstance(graph_func, partial):
+        graph_func = graph_func.func
+
+    return getattr(graph_func, "log_fields", None)
+
+def required_fields(graph_funcs: Iterable[Callable[..., go.Figure]]) -> FrozenSet[str] | None:
+    """
+    Returns the union of the fields read by the given graph functions, or None if any of them does not declare its
+    fields, in which case every field must be parsed
+    """
+    fields: FrozenSet[str] = frozenset()
+
+    for graph_func in graph_funcs:
+        func_fields = graph_fields(graph_func)
+
+        if func_fields is None:
+            return None
+
+        fields |= func_fields
+
+    return fields
+
+def load_fields(graph_funcs: Iterable[Callable[..., go.Figure]]) -> FrozenSet[str] | None:
+    """
+    Returns the fields to parse a log file with to show the given graph functions, or None to parse every field.
+    The search fields are always parsed, for the visualizer's search panel.
+    The visualizer and BatchRender both load logs with these fields, so they share the same parsed log cache entries.
+    """
+    fields = required_fields(graph_funcs)
+    return fields | SEARCH_FIELDS if fields is not None else None
+
+def graph_name(graph_func: Callable[..., go.Figure]) -> str:
+    """
+    Returns a readable name for a graph function, including the arguments of partially applied functions, such as
+    pnl_mid_price_product('BANANAS')
+    """
+    if isinstance(graph_func, partial):
+        args = [repr(arg) for arg in graph_func.args]
+        args += [name + "=" + repr(value) for name, value in graph_func.keywords.items()]
+        return graph_name(graph_func.func) + "(" + ", ".join(args) + ")"
+
+    return getattr(graph_func, "__name__", type(graph_func).__name__)
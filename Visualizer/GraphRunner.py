@@ -0,0 +1,221 @@
+"""
+GraphRunner.py
+
+Runs graph functions on log data in threads or in worker processes, and yields each figure as soon as it is ready so
+it can be displayed while the other graphs are still being generated.
+"""
+
+from Downsampling import DEFAULT_POINT_BUDGET, using_point_budget
+from GraphFuncTypes import graph_func_t, graph_name
+from Instrumentation import Measurement, measure_call
+from LogParser import LogData
+from multiprocessing.connection import Connection, wait
+from threading import Thread
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+import plotly.graph_objects as go
+import multiprocessing
+import os
+import queue
+import time
+
+# The index of a graph function, either its figure or an error message, and the resources used to generate it
+graph_result_t = Tuple[int, go.Figure | str, Measurement]
+
+def processes_supported() -> bool:
+    """
+    Worker processes are forked, so they share the parsed data with this process instead of receiving a pickled copy
+    of it. Platforms that cannot fork always generate graphs in threads.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+def run_graphs(graph_funcs: Sequence[graph_func_t], data: LogData, processes: bool = False,
+    workers: int | None = None, timeout: float | None = None,
+    point_budget: int | None = DEFAULT_POINT_BUDGET) -> Iterator[graph_result_t]:
+    """
+    Generate a figure with each graph function, yielding (index, figure, measurement) tuples in the order they finish.
+    A graph that fails or takes longer than timeout seconds yields an error message instead of a figure. Each graph
+    draws its traces with the given point budget, or every point if it is None.
+
+    Graph functions are pure-Python code, so threads mostly run one at a time. With processes=True, a pool of up to
+    workers processes (one per CPU core if None) is forked for this call, each generating one graph at a time, and a
+    graph that times out is stopped and its worker replaced.
+
+    Forking a process that runs other threads is only safe for the locks that are held while forking. The data's own
+    locks are (see LogData.fork_locks), but a lock that another thread holds in a library, such as while it writes to
+    stdout, stays held in the worker and deadlocks it if a graph uses the same library. This is why Python 3.12 and
+    later warn when a process with several threads forks. A worker deadlocked this way is only stopped by the
+    timeout, so set one with processes=True.
+    """
+    if processes and processes_supported():
+        return _run_in_processes(graph_funcs, data, workers or os.cpu_count() or 1, timeout, point_budget)
+
+    return _run_in_threads(graph_funcs, data, timeout, point_budget)
+
+def _try_generate(graph_func: graph_func_t, data: LogData) -> go.Figure | str:
+    """
+    Generate one graph, returning an error message if it fails
+    """
+    try:
+        return graph_func(data)
+    except Exception as e:
+        return "Error generating graph: " + str(e)
+
+def _generate(graph_func: graph_func_t, data: LogData,
+    point_budget: int | None) -> Tuple[go.Figure | str, Measurement]:
+    """
+    Generate and measure one graph, returning an error message if it fails. Measured in the thread or process that
+    generates the graph, so the CPU time only counts this graph.
+    """
+    with using_point_budget(point_budget):
+        return measure_call(graph_name(graph_func), _try_generate, graph_func, data)
+
+def _timed_out(graph_func: graph_func_t, timeout: float) -> Tuple[go.Figure | str, Measurement]:
+    """
+    The error message and measurement of a graph that timed out, which only has its wall time
+    """
+    return ("Error generating graph: Timed out after " + str(timeout) + " seconds",
+        Measurement(graph_name(graph_func), timeout))
+
+def _run_in_threads(graph_funcs: Sequence[graph_func_t], data: LogData, timeout: float | None,
+    point_budget: int | None) -> Iterator[graph_result_t]:
+
+    results: queue.Queue[graph_result_t] = queue.Queue()
+
+    def gen_graph(graph_func: graph_func_t, index: int) -> None:
+        results.put((index, *_generate(graph_func, data, point_budget)))
+
+    # Threads cannot be stopped, so graphs that time out are left to finish in the background
+    started = time.monotonic()
+
+    for i, graph_func in enumerate(graph_funcs):
+        Thread(target=gen_graph, args=(graph_func, i), daemon=True).start()
+
+    pending = set(range(len(graph_funcs)))
+
+    while pending:
+        try:
+            wait_time = None if timeout is None else max(0, started + timeout - time.monotonic())
+            index, result, measurement = results.get(timeout=wait_time)
+        except queue.Empty:
+            # Every graph started at the same time, so they have all timed out
+            for index in sorted(pending):
+                yield (index, *_timed_out(graph_funcs[index], timeout or 0))
+
+            return
+
+        pending.discard(index)
+        yield (index, result, measurement)
+
+def _worker(graph_funcs: Sequence[graph_func_t], data: LogData, point_budget: int | None, locks: List[Any],
+    connection: Connection) -> None:
+    """
+    The entry point of a worker process, which generates the graphs whose indices the parent sends until it sends
+    None, and sends each figure or error message back with its measurement
+    """
+    # The parent held these locks while forking this process, so its copies of them are still held
+    for lock in reversed(locks):
+        lock.release()
+
+    while True:
+        index = connection.recv()
+
+        if index is None:
+            return
+
+        result, measurement = _generate(graph_funcs[index], data, point_budget)
+
+        try:
+            connection.send((result, measurement))
+        except Exception as e:
+            # Figures that cannot be pickled are reported instead of being lost
+            connection.send(("Error generating graph: Could not send figure from worker process: " + str(e),
+                measurement))
+
+def _start_worker(context: Any, graph_funcs: Sequence[graph_func_t], data: LogData, point_budget: int | None,
+    locks: List[Any]) -> Tuple[Connection, multiprocessing.process.BaseProcess]:
+    """
+    Fork a worker process, holding the data's locks so that no other thread is part way through changing the data,
+    and no lock the worker inherits is held by a thread that does not exist in it
+    """
+    connection, child_connection = context.Pipe()
+    process = context.Process(target=_worker, args=(graph_funcs, data, point_budget, locks, child_connection),
+        daemon=True)
+
+    for lock in locks:
+        lock.acquire()
+
+    try:
+        process.start()
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+    child_connection.close()
+    return connection, process
+
+def _run_in_processes(graph_funcs: Sequence[graph_func_t], data: LogData, workers: int, timeout: float | None,
+    point_budget: int | None) -> Iterator[graph_result_t]:
+
+    # With fork, the graph functions and data are inherited by the workers rather than pickled, so even lambdas and
+    # large logs are passed without copying. Only the index of each graph is sent to them.
+    context = multiprocessing.get_context("fork")
+    locks = data.fork_locks()
+    waiting: List[int] = list(range(len(graph_funcs)))
+    idle: List[Tuple[Connection, multiprocessing.process.BaseProcess]] = []
+    running: Dict[Connection, Tuple[int, multiprocessing.process.BaseProcess, float]] = {}
+
+    try:
+        while waiting or running:
+            # Give graphs to idle workers, and start new workers until there are as many as allowed
+            while waiting and len(running) < workers:
+                connection, process = idle.pop() if idle else _start_worker(context, graph_funcs, data,
+                    point_budget, locks)
+                index = waiting.pop(0)
+                connection.send(index)
+                running[connection] = (index, process, time.monotonic())
+
+            wait_time = None
+
+            if timeout is not None:
+                first_start = min(start for _, _, start in running.values())
+                wait_time = max(0, first_start + timeout - time.monotonic())
+
+            for connection in wait(list(running), wait_time):
+                index, process, start = running.pop(connection)  # type: ignore[call-overload]
+
+                try:
+                    result, measurement = connection.recv()
+                    idle.append((connection, process))
+                except EOFError:
+                    process.join()
+                    result = "Error generating graph: Worker process exited with code " + str(process.exitcode)
+                    measurement = Measurement(graph_name(graph_funcs[index]), time.monotonic() - start)
+                    connection.close()
+
+                yield (index, result, measurement)
+
+            # Stop any graphs that have run for too long. Their workers are replaced when the next graph starts.
+            now = time.monotonic()
+
+            for connection, (index, process, start) in list(running.items()):
+                if timeout is not None and now - start >= timeout:
+                    process.terminate()
+                    process.join()
+                    connection.close()
+                    del running[connection]
+                    yield (index, *_timed_out(graph_funcs[index], timeout))
+    finally:
+        # Let idle workers exit, and stop any still generating a graph if the caller stops early
+        for connection, process in idle:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+
+        for connection, (_, process, _) in running.items():
+            process.terminate()
+            idle.append((connection, process))
+
+        for connection, process in idle:
+            process.join()
+            connection.close()
@@ -0,0 +1,127 @@
+"""
+Instrumentation.py
+
+Measures the wall time, CPU time, memory and number of objects used by each stage of loading a log file and by each
+graph, so that a slow dashboard can be traced to the part of it that is slow. Taking a measurement only reads a few
+counters, so measuring is always on.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+import json
+import os
+import sys
+import threading
+import time
+
+T = TypeVar("T")
+
+"""
+The resources used by one stage or graph. CPU time counts the thread that ran it and any worker processes that
+finished during it. Memory is the change in the resident memory of the whole process, and objects is the change in the
+number of memory blocks held by Python's allocator, which is close to the number of Python objects created and kept.
+Both include anything other threads did at the same time, so they are approximate for graphs generated in threads.
+Measurements that are not available on this platform are None.
+"""
+class Measurement:
+    def __init__(self, name: str, wall_seconds: float, cpu_seconds: float | None = None,
+        memory_bytes: int | None = None, objects: int | None = None):
+
+        self.name = name
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.objects = objects
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+"""
+The counters read at the start and end of a measurement
+"""
+class _Counters:
+    def __init__(self) -> None:
+        children = os.times()
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time() + children.children_user + children.children_system
+        self.memory = _resident_bytes()
+        self.objects = sys.getallocatedblocks()
+
+    def since(self, start: '_Counters', name: str) -> Measurement:
+        return Measurement(name, self.wall - start.wall, self.cpu - start.cpu,
+            self.memory - start.memory if self.memory is not None and start.memory is not None else None,
+            self.objects - start.objects)
+
+def _resident_bytes() -> int | None:
+    """
+    The resident memory of this process, which is only available on Linux
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+"""
+Collects the measurements of one page load. Safe to use from several threads.
+"""
+class Recorder:
+    def __init__(self) -> None:
+        self.measurements: List[Measurement] = []
+        self._lock = threading.Lock()
+
+    def add(self, measurement: Measurement) -> None:
+        with self._lock:
+            self.measurements.append(measurement)
+
+    def extend(self, measurements: List[Measurement]) -> None:
+        with self._lock:
+            self.measurements.extend(measurements)
+
+    def to_json(self) -> str:
+        with self._lock:
+            return json.dumps([measurement.to_dict() for measurement in self.measurements], indent=2)
+
+# The recorder that stages are measured into. Each Streamlit session runs in its own thread, so each has its own.
+_recorder: ContextVar[Recorder | None] = ContextVar("recorder", default=None)
+
+@contextmanager
+def recording(recorder: Recorder) -> Iterator[Recorder]:
+    """
+    Measure the stages run inside this context into the given recorder
+    """
+    token = _recorder.set(recorder)
+
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Measure the code inside this context as a stage with the given name, if a recorder is active. Stages that raise
+    an exception are still measured.
+    """
+    recorder = _recorder.get()
+
+    if recorder is None:
+        yield
+        return
+
+    start = _Counters()
+
+    try:
+        yield
+    finally:
+        recorder.add(_Counters().since(start, name))
+
+def measure_call(name: str, func: Callable[..., T], *args: Any) -> Tuple[T, Measurement]:
+    """
+    Call a function and measure it, returning its result and the measurement. Used where the measurement has to be
+    sent back with the result, such as from a worker process.
+    """
+    start = _Counters()
+    result = func(*args)
+    return (result, _Counters().since(start, name))
@@ -0,0 +1,331 @@
+"""
+LogCache.py
+
+Stores parsed log files on disk, keyed by a hash of the log file's contents, so each log only needs to be parsed once.
+The data of NumPy arrays is written out of band to one file, which is memory-mapped when the log is loaded again. The
+trading states, orders, logs, values and flush times of eagerly parsed logs are pickled in chunks, and each chunk is
+only unpickled when one of its states is first used. Everything else is stored in a single pickle file.
+"""
+
+from Instrumentation import stage
+from LogParser import LazySandboxLog, LazySequence, LogData, PARSER_VERSION, gc_paused, parse, sandbox_record_t
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+import copy
+import hashlib
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+# The directory that parsed logs are cached in, which can be changed with the IMC_VISUALIZER_CACHE environment variable
+CACHE_DIR = os.environ.get("IMC_VISUALIZER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "imc_prosperity_visualizer"))
+
+# The most space the cache takes up on disk before the least recently used logs are deleted from it, which can be
+# changed with the IMC_VISUALIZER_CACHE_MB environment variable
+MAX_CACHE_BYTES = int(os.environ.get("IMC_VISUALIZER_CACHE_MB", 4096)) << 20
+
+# The size of the blocks the log file is read in while hashing it
+_HASH_BLOCK_SIZE = 1 << 20
+
+# The number of trading states in each chunk of an eagerly parsed log's cache entry
+_CHUNK_SIZE = 1000
+
+# The alignment of each array's data in the buffers file, so the arrays memory-mapped from it are aligned too
+_BUFFER_ALIGNMENT = 64
+
+# Temporary directories older than this are left over from writes that were interrupted, and are deleted
+_STALE_TEMP_SECONDS = 24 * 60 * 60
+
+# The cache entries being written by this process, so that loading the same log again waits for its entry instead of
+# parsing the log a second time
+_writes: Dict[str, threading.Thread] = {}
+_writes_lock = threading.Lock()
+
+def file_digest(path: str) -> str:
+    """
+    Hash the contents of a log file together with the parser version, so that the cache is invalidated when either
+    the log file or the way it is parsed changes
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(("parser-" + str(PARSER_VERSION) + "\n").encode())
+
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def load(path: str, workers: int | None = 1, lazy: bool = False, fields: Iterable[str] | None = None,
+    cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> LogData:
+    """
+    Load the parsed data for a log file from the cache, or parse the log file and add it to the cache if it has not
+    been parsed before. Data parsed lazily or with only some fields is cached separately from the full data.
+
+    A new entry is written in a background thread after the data is returned, and then the least recently used
+    entries are deleted until the cache takes up at most max_bytes. The thread is not a daemon, so the process
+    finishes writing the entry before it exits.
+    """
+    with stage("hash log file"):
+        digest = file_digest(path)
+
+    entry = os.path.join(cache_dir, digest + _entry_suffix(lazy, fields))
+
+    with _writes_lock:
+        write = _writes.get(entry)
+
+    if write is not None:
+        write.join()
+
+    if os.path.isdir(entry):
+        try:
+            with stage("read cached log"):
+                data = _read_entry(entry)
+
+            data.digest = digest
+
+            # Lazily parsed data reads from the log file, which may have moved since it was cached
+            sandbox_log = getattr(data.trading_states, "sandbox_log", None)
+
+            if isinstance(sandbox_log, LazySandboxLog):
+                sandbox_log.path = os.path.abspath(path)
+
+            return data
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            # A damaged entry is simply replaced by parsing the log file again
+            shutil.rmtree(entry, ignore_errors=True)
+
+    with open(path, "rb" if lazy else "r") as f:
+        data = parse(f, workers, lazy, fields)
+
+    data.digest = digest
+
+    # The entry is written while the log is displayed. It is written from a copy of the data taken now, before any
+    # graph has added to the data's caches.
+    with stage("copy data to cache"):
+        snapshot = _snapshot(data)
+
+    write = threading.Thread(target=_write_and_evict, args=(entry, snapshot, cache_dir, max_bytes),
+        name="LogCache write")
+
+    with _writes_lock:
+        _writes[entry] = write
+
+    write.start()
+    return data
+
+def _entry_suffix(lazy: bool, fields: Iterable[str] | None) -> str:
+    """
+    Returns the part of a cache entry's name that identifies how the log file was parsed
+    """
+    suffix = "-lazy" if lazy else ""
+
+    if fields is not None:
+        fields_digest = hashlib.blake2b(",".join(sorted(set(fields))).encode(), digest_size=4)
+        suffix += "-fields-" + fields_digest.hexdigest()
+
+    return suffix
+
+class CachedRecords:
+    """
+    The trading states, orders, logs, values and flush times of an eagerly parsed log, read from a cache entry. They
+    are pickled in chunks of _CHUNK_SIZE states, and each chunk is unpickled the first time one of its states is used
+    and kept after that. Read through LazySequence objects, like a LazySandboxLog.
+    """
+    def __init__(self, entry: str, timestamps: np.ndarray, offsets: np.ndarray):
+        self.entry = entry
+        self.timestamps = timestamps
+
+        # The position of each chunk in the records file, followed by the end of the last chunk
+        self.offsets = offsets
+        self._init_chunks()
+
+    def _init_chunks(self) -> None:
+        self._file: mmap.mmap | None = None
+        self._chunks: Dict[int, List[sandbox_record_t]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The memory map, chunks and lock belong to this process, so they are recreated when unpickled
+        state = self.__dict__.copy()
+        del state['_file'], state['_chunks'], state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_chunks()
+
+    def fork_locks(self) -> List[Any]:
+        """
+        The lock held while a chunk is unpickled
+        """
+        return [self._lock]
+
+    def record(self, index: int) -> sandbox_record_t:
+        """
+        Return the trading state, orders, user logs, user values and flush time of the state with the given index
+        """
+        chunk = index // _CHUNK_SIZE
+
+        # The lock is held while a chunk is unpickled, so threads that need the same chunk only unpickle it once
+        with self._lock:
+            if chunk not in self._chunks:
+                if self._file is None:
+                    with open(os.path.join(self.entry, "records.pickle"), "rb") as f:
+                        self._file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+                with gc_paused():
+                    self._chunks[chunk] = pickle.loads(self._file[self.offsets[chunk]:self.offsets[chunk + 1]])
+
+            return self._chunks[chunk][index - chunk * _CHUNK_SIZE]
+
+def _snapshot(data: LogData) -> LogData:
+    """
+    A shallow copy of freshly parsed data to write to the cache, with the timestamps built, so the background thread
+    writing it never reads anything that the graphs change
+    """
+    snapshot = copy.copy(data)
+    snapshot._timestamps = data.timestamps
+    return snapshot
+
+def _write_and_evict(entry: str, data: LogData, cache_dir: str, max_bytes: int) -> None:
+    """
+    Write a new cache entry and then keep the cache within max_bytes. Runs in a background thread.
+    """
+    try:
+        _write_entry(entry, data)
+        _evict(cache_dir, max_bytes, entry)
+    except (OSError, pickle.PicklingError) as e:
+        # The cache only saves time, so failing to write it should never stop the log from being displayed
+        print("Warning: Could not cache parsed log file:", e)
+    finally:
+        with _writes_lock:
+            _writes.pop(entry, None)
+
+def _write_entry(entry: str, data: LogData) -> None:
+    """
+    Write the parsed data to a new cache entry. The entry is built in a temporary directory and renamed into place,
+    so other processes never see a partially written entry.
+    """
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix=".tmp-")
+
+    try:
+        records = None
+
+        if not isinstance(data.trading_states, LazySequence):
+            records = (data.timestamps, _write_records(os.path.join(temp_dir, "records.pickle"), data))
+            data = copy.copy(data)
+            data.trading_states = data.orders = data.logs = data.values = data.flush_times = []
+
+        # Arrays are written to the buffers file instead of into the pickle, at the offsets in buffers.npy
+        buffer_offsets: List[int] = []
+
+        with open(os.path.join(temp_dir, "buffers.bin"), "wb") as buffers:
+            def write_buffer(buffer: pickle.PickleBuffer) -> None:
+                buffers.write(b"\0" * (-buffers.tell() % _BUFFER_ALIGNMENT))
+                buffer_offsets.append(buffers.tell())
+                buffers.write(buffer.raw())
+                buffer_offsets.append(buffers.tell())
+
+            with open(os.path.join(temp_dir, "data.pickle"), "wb") as f:
+                pickle.dump((data, records), f, protocol=5, buffer_callback=write_buffer)
+
+        np.save(os.path.join(temp_dir, "buffers.npy"), np.array(buffer_offsets, dtype=np.int64), allow_pickle=False)
+        os.rename(temp_dir, entry)
+    except (OSError, pickle.PicklingError):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+        # Another process may have written the same entry first, which is just as good
+        if not os.path.isdir(entry):
+            raise
+
+def _write_records(path: str, data: LogData) -> np.ndarray:
+    """
+    Pickle the trading states, orders, logs, values and flush times of eagerly parsed data in chunks, and return the
+    position of each chunk in the file followed by the end of the last chunk
+    """
+    offsets = [0]
+
+    with open(path, "wb") as f:
+        for start in range(0, len(data.trading_states), _CHUNK_SIZE):
+            end = start + _CHUNK_SIZE
+            chunk = list(zip(data.trading_states[start:end], data.orders[start:end], data.logs[start:end],
+                data.values[start:end], data.flush_times[start:end]))
+            f.write(pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL))
+            offsets.append(f.tell())
+
+    return np.array(offsets, dtype=np.int64)
+
+def _read_entry(entry: str) -> LogData:
+    """
+    Read the parsed data from an existing cache entry, and mark it as recently used
+    """
+    buffer_offsets = np.load(os.path.join(entry, "buffers.npy"), allow_pickle=False)
+    buffers: List[memoryview] = []
+
+    if len(buffer_offsets) > 0:
+        with open(os.path.join(entry, "buffers.bin"), "rb") as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        buffers = [view[start:end] for start, end in zip(buffer_offsets[::2], buffer_offsets[1::2])]
+
+    records: Tuple[np.ndarray, np.ndarray] | None
+
+    with open(os.path.join(entry, "data.pickle"), "rb") as f, gc_paused():
+        data, records = pickle.load(f, buffers=buffers)
+
+    if records is not None:
+        cached_records = CachedRecords(entry, *records)
+        data.trading_states, data.orders, data.logs, data.values, data.flush_times = \
+            (LazySequence(cached_records, field) for field in range(5))
+
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+
+    return data
+
+def _entry_size(entry: str) -> int:
+    """
+    The total size of the files in a cache entry
+    """
+    return sum(file.stat().st_size for file in os.scandir(entry) if file.is_file())
+
+def _evict(cache_dir: str, max_bytes: int, keep: str) -> None:
+    """
+    Delete the least recently used cache entries, other than keep, until the cache takes up at most max_bytes. Also
+    deletes temporary directories left over from writes that were interrupted.
+    """
+    entries: List[Tuple[float, int, str]] = []
+    now = time.time()
+
+    for file in os.scandir(cache_dir):
+        if not file.is_dir():
+            continue
+
+        modified = file.stat().st_mtime
+
+        if file.name.startswith(".tmp-"):
+            if now - modified > _STALE_TEMP_SECONDS:
+                shutil.rmtree(file.path, ignore_errors=True)
+        else:
+            entries.append((modified, _entry_size(file.path), file.path))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+
+        if os.path.abspath(path) != os.path.abspath(keep):
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
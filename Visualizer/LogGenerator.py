@@ -0,0 +1,165 @@
+"""
+LogGenerator.py
+
+Generates synthetic log files in the same format as the logs downloaded from the IMC Prosperity website, for
+benchmarking the parser and graphs on logs of any size. The sandbox logs are written by Logger.py itself, so they
+always match the format of real logs, and are followed by a matching activities log.
+
+Usage: python Visualizer/LogGenerator.py <output file> [--ticks N] [--products A B ...] [--depth N] ...
+"""
+
+from datamodel import *
+from Logger import Logger
+from typing import Dict, List, Sequence, TextIO
+import argparse
+import contextlib
+import random
+
+# The products traded in generated logs, unless others are given
+DEFAULT_PRODUCTS = ("PEARLS", "BANANAS")
+
+# The interval between timestamps in the logs written by the exchange
+TIMESTAMP_STEP = 100
+
+# The number of price levels on each side of the book in the activities log
+ACTIVITY_LEVELS = 3
+
+ACTIVITIES_HEADER = ("day;timestamp;product;" + ";".join(
+    f"bid_price_{level};bid_volume_{level}" for level in range(1, ACTIVITY_LEVELS + 1)) + ";" + ";".join(
+    f"ask_price_{level};ask_volume_{level}" for level in range(1, ACTIVITY_LEVELS + 1)) + ";mid_price;profit_and_loss")
+
+def generate(log_file: TextIO, ticks: int = 10000, products: Sequence[Product] = DEFAULT_PRODUCTS, depth: int = 3,
+    trades_per_tick: float = 1.0, value_keys: Sequence[str] = (), seed: int = 0, day: int = 0,
+    delta_order_depths: bool = False) -> None:
+    """
+    Write a synthetic log file.
+
+    Parameters:
+    log_file (TextIO): The file to write the log to.
+    ticks (int): The number of timestamps in the log.
+    products (Sequence[Product]): The products traded, which each have a random walk as their mid price.
+    depth (int): The number of price levels on each side of each order book. The activities log only ever has the
+    first three.
+    trades_per_tick (float): The average number of market trades of each product at each timestamp.
+    value_keys (Sequence[str]): The names of the custom values logged at each timestamp.
+    seed (int): The seed of the random numbers, so the same arguments always generate the same log.
+    day (int): The day written in the activities log.
+    delta_order_depths (bool): Whether the logger only logs the changes to the order depths between snapshots.
+    """
+    rng = random.Random(seed)
+    logger = Logger(delta_order_depths=delta_order_depths)
+    mids = {product: 1000.0 * (index + 5) for index, product in enumerate(products)}
+    spreads = {product: 2 for product in products}
+    positions = {product: 0 for product in products}
+    cash = {product: 0.0 for product in products}
+    listings = {product: Listing(product, product, "SEASHELLS") for product in products}
+    activity_rows: List[str] = []
+    order_depths: Dict[Product, OrderDepth] = {}
+
+    log_file.write("Sandbox logs:\n")
+
+    with contextlib.redirect_stdout(log_file):
+        for tick in range(ticks):
+            timestamp = tick * TIMESTAMP_STEP
+            market_trades: Dict[Symbol, List[Trade]] = {}
+            own_trades: Dict[Symbol, List[Trade]] = {}
+            orders: Dict[Symbol, List[Order]] = {}
+
+            for product in products:
+                mids[product] += rng.choice((-0.5, 0, 0, 0.5))
+                order_depths[product] = _order_depth(rng, mids[product], spreads[product], depth,
+                    order_depths.get(product))
+                market_trades[product] = [Trade(product, round(mids[product]) + rng.randint(-2, 2),
+                    rng.randint(1, 10), "", "", timestamp - TIMESTAMP_STEP)
+                    for _ in range(_trade_count(rng, trades_per_tick))]
+
+                # Occasionally trade against the book, and keep track of the position and profit it makes
+                if rng.random() < 0.2:
+                    quantity = rng.choice((-3, -2, -1, 1, 2, 3))
+                    price = round(mids[product]) + (1 if quantity > 0 else -1)
+                    positions[product] += quantity
+                    cash[product] -= quantity * price
+                    own_trades[product] = [Trade(product, price, abs(quantity),
+                        "SUBMISSION" if quantity > 0 else "", "" if quantity > 0 else "SUBMISSION",
+                        timestamp - TIMESTAMP_STEP)]
+
+                orders[product] = [Order(product, round(mids[product]) - 1, 5),
+                    Order(product, round(mids[product]) + 1, -5)]
+                activity_rows.append(_activity_row(day, timestamp, product, order_depths[product], mids[product],
+                    cash[product] + positions[product] * mids[product]))
+
+            state = TradingState(timestamp, listings, dict(order_depths), own_trades, market_trades,
+                {product: position for product, position in positions.items() if position != 0}, {})
+            logger.print("Timestamp " + str(timestamp) + ", " + str(len(orders)) + " products quoted")
+            values = {key: rng.gauss(0, 1) for key in value_keys}
+
+            # The exchange writes the timestamp before each line printed by the algorithm
+            print(timestamp, end=" ")
+            logger.flush(state, orders, values)
+
+    log_file.write("\nSubmission logs:\n\n\n\nActivities log:\n")
+    log_file.write(ACTIVITIES_HEADER + "\n")
+
+    for row in activity_rows:
+        log_file.write(row + "\n")
+
+def _order_depth(rng: random.Random, mid: float, spread: int, depth: int, previous: OrderDepth | None) -> OrderDepth:
+    """
+    Build an order book around the mid price. Most levels keep their volume from the previous book, like a real
+    book, which matters when the order depths are logged as changes.
+    """
+    order_depth = OrderDepth()
+    best_bid = int(mid - spread / 2)
+    best_ask = best_bid + spread
+
+    for level in range(depth):
+        bid, ask = best_bid - level, best_ask + level
+        bid_volume = ask_volume = None
+
+        if previous is not None and rng.random() < 0.7:
+            bid_volume, ask_volume = previous.buy_orders.get(bid), previous.sell_orders.get(ask)
+
+        order_depth.buy_orders[bid] = bid_volume or rng.randint(1, 30)
+        order_depth.sell_orders[ask] = ask_volume or -rng.randint(1, 30)
+
+    return order_depth
+
+def _trade_count(rng: random.Random, trades_per_tick: float) -> int:
+    """
+    A random number of trades, averaging trades_per_tick
+    """
+    count = int(trades_per_tick)
+    return count + (1 if rng.random() < trades_per_tick - count else 0)
+
+def _activity_row(day: int, timestamp: int, product: Product, order_depth: OrderDepth, mid: float,
+    profit_and_loss: float) -> str:
+    """
+    Format one row of the activities log, with empty cells for missing levels as the exchange writes them
+    """
+    bids = sorted(order_depth.buy_orders.items(), reverse=True)[:ACTIVITY_LEVELS]
+    asks = sorted(order_depth.sell_orders.items())[:ACTIVITY_LEVELS]
+    cells = [str(day), str(timestamp), product]
+
+    for levels in (bids, asks):
+        for level in range(ACTIVITY_LEVELS):
+            cells += [str(levels[level][0]), str(abs(levels[level][1]))] if level < len(levels) else ["", ""]
+
+    cells += [str(mid), str(profit_and_loss)]
+    return ";".join(cells)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic IMC Prosperity log file")
+    arg_parser.add_argument("output", help="the log file to write")
+    arg_parser.add_argument("--ticks", type=int, default=10000, help="the number of timestamps (default: 10000)")
+    arg_parser.add_argument("--products", nargs="+", default=list(DEFAULT_PRODUCTS), help="the products traded")
+    arg_parser.add_argument("--depth", type=int, default=3, help="the price levels on each side of the book")
+    arg_parser.add_argument("--trades", type=float, default=1.0,
+        help="the average number of market trades of each product at each timestamp")
+    arg_parser.add_argument("--values", nargs="*", default=[], help="the names of custom values to log")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--delta", action="store_true", help="log the order depths as changes between snapshots")
+    args = arg_parser.parse_args()
+
+    with open(args.output, "w") as f:
+        generate(f, args.ticks, args.products, args.depth, args.trades, args.values, args.seed,
+            delta_order_depths=args.delta)
@@ -6,222 +6,1334 @@ jmerle's logger.
 """
 
 from datamodel import *
-from typing import Dict, List, Any, Tuple, TextIO
+
+# The parsed data is built from the compact versions of the datamodel classes
+from CompactModel import Listing, Order, OrderDepth, Trade, TradingState, intern, shared_listing
+from Instrumentation import stage
+from OrderBook import OrderBookMatrix, build_order_books
+from TradeTape import TradeTape, build_trade_tape
+from ValueStore import ValueColumn, build_value_columns
+from DerivedSeries import DerivedSeries
+from SearchIndex import SearchIndex
+from typing import TYPE_CHECKING, Dict, List, Any, Tuple, TextIO, BinaryIO, Sequence, Iterable, Iterator, FrozenSet, \
+    overload
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+import itertools
+import multiprocessing
+import multiprocessing.context
+import gc
+import numpy as np
 import json
 import csv
-import streamlit as st
+import io
+import mmap
+import os
+import re
+import threading
+
+if TYPE_CHECKING:
+    from LogCache import CachedRecords
+
+# The version of the parsed data format. Increase this whenever the parsed data changes, so that logs cached by
+# LogCache are parsed again.
+PARSER_VERSION = 9
+
+# The fields of the trading states that are parsed from the sandbox logs. The timestamp is always parsed.
+STATE_FIELDS = frozenset({'listings', 'order_depths', 'own_trades', 'market_trades', 'position', 'observations'})
+
+# The names of all the fields that can be requested when parsing a log file. Fields of LogData other than orders,
+# logs and values are cheap to parse, so they are always parsed.
+LOG_FIELDS = STATE_FIELDS | frozenset({'orders', 'logs', 'values', 'flush_times', 'activities', 'submission_logs'})
+
+# The fields that can be searched. When either is parsed, the search index is built while the log is parsed.
+SEARCH_FIELDS = frozenset({'logs', 'submission_logs'})
+
+# The number of sandbox log lines sent to a worker process at a time when parsing in parallel
+SANDBOX_CHUNK_LINES = 2000
+
+# Sandbox log sections with fewer lines than this are always parsed serially, as starting worker processes would take
+# longer than parsing the lines
+PARALLEL_MIN_LINES = 10000
+
+"""
+Return the context that worker process pools are started with. The visualizer parses logs while Streamlit's threads are
+running, and a process forked then can deadlock on a lock one of them held, so workers are forked from a separate
+single-threaded server process where the platform supports it, and started as new interpreters otherwise.
+"""
+def process_context() -> multiprocessing.context.BaseContext:
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    
+    return multiprocessing.get_context('spawn')
+
+# The number of decoded sandbox log lines kept in memory by each lazily parsed log
+LAZY_CACHE_SIZE = 4096
+
+# Matches the timestamp at the end of the compressed trading state, so lazily parsed lines can be indexed without
+# decoding them. Quotes inside the user logs are escaped, so they can never match.
+_TIMESTAMP_PATTERN = re.compile(r'"t":(-?\d+)\}')
+
+# The start of the JSON of a sandbox log line written by the Logger, which puts the user log message first
+_LOGS_START = '{"logs":"'
+
+# The section of the log file that each header line starts
+_SECTION_HEADERS = {'Sandbox logs:': 'sandbox', 'Submission logs:': 'submission', 'Activities log:': 'activities'}
+
+# The data parsed from the "sandbox logs" section: the trading states, orders, user logs, user values and the time
+# the logger took to write each line
+sandbox_logs_t = Tuple[List[TradingState], List[Dict[Symbol, List[Order]]], List[str], List[Dict[str, Any]],
+    List[int | None]]
+
+# The data parsed from a single line of the "sandbox logs" section
+sandbox_record_t = Tuple[TradingState, Dict[Symbol, List[Order]], str, Dict[str, Any], int | None]
 
 """
 A class to store data from the activity logs, specifically, all the data for one product on one timpestamp.
 """
 class ProductActivityLog:
-    def __init__(self, product: Product, day: int, timestamp: int, bids: List[Tuple[int, Position]] = [],
-        asks: List[Tuple[int, Position]] = [], mid_price: float = 0, profit_and_loss: float = 0):
+    def __init__(self, product: Product, day: int, timestamp: int, bids: List[Tuple[int, Position]] | None = None,
+        asks: List[Tuple[int, Position]] | None = None, mid_price: float = 0, profit_and_loss: float = 0):
+        self.product = product
+        self.day = day
+        self.timestamp = timestamp
+        self.bids = bids if bids is not None else []
+        self.asks = asks if asks is not None else []
+        self.mid_price = mid_price
+        self.profit_and_loss = profit_and_loss
+
+"""
+A columnar store of the activity log for one product. Every attribute is a NumPy array with one entry per timestamp,
+and the bid/ask arrays have one column per order book level, holding NaN where a level is missing. Graphs should
+slice these arrays directly. Indexing the store returns ProductActivityLog objects built on demand, so it can still be
+used anywhere a list of ProductActivityLog was expected.
+"""
+class ProductActivityColumns(Sequence[ProductActivityLog]):
+    # The number of bid and ask levels stored in the activities log
+    LEVELS = 3
+
+    def __init__(self, product: Product, day: np.ndarray, timestamp: np.ndarray, mid_price: np.ndarray,
+        profit_and_loss: np.ndarray, bid_prices: np.ndarray, bid_volumes: np.ndarray, ask_prices: np.ndarray,
+        ask_volumes: np.ndarray):
+
         self.product = product
         self.day = day
         self.timestamp = timestamp
-        self.bids = bids
-        self.asks = asks
         self.mid_price = mid_price
         self.profit_and_loss = profit_and_loss
+        self.bid_prices = bid_prices
+        self.bid_volumes = bid_volumes
+        self.ask_prices = ask_prices
+        self.ask_volumes = ask_volumes
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @overload
+    def __getitem__(self, index: int) -> ProductActivityLog: ...
+    @overload
+    def __getitem__(self, index: slice) -> 'ProductActivityColumns': ...
+
+    def __getitem__(self, index: int | slice) -> 'ProductActivityLog | ProductActivityColumns':
+        if isinstance(index, slice):
+            return ProductActivityColumns(self.product, self.day[index], self.timestamp[index],
+                self.mid_price[index], self.profit_and_loss[index], self.bid_prices[index], self.bid_volumes[index],
+                self.ask_prices[index], self.ask_volumes[index])
+
+        if index < -len(self) or index >= len(self):
+            raise IndexError("activity index out of range")
+
+        return ProductActivityLog(self.product, int(self.day[index]), int(self.timestamp[index]),
+            _levels(self.bid_prices[index], self.bid_volumes[index]),
+            _levels(self.ask_prices[index], self.ask_volumes[index]),
+            float(self.mid_price[index]), float(self.profit_and_loss[index]))
+    
+    def append(self, other: 'ProductActivityColumns') -> None:
+        """
+        Append the rows of another store of the same product to this one
+        """
+        for name in ('day', 'timestamp', 'mid_price', 'profit_and_loss', 'bid_prices', 'bid_volumes', 'ask_prices',
+            'ask_volumes'):
+            setattr(self, name, np.concatenate((getattr(self, name), getattr(other, name))))
+    
+    def day_range(self, day: int | None = None) -> slice:
+        """
+        Return the rows of the given day, or of the last day in the log if day is None. Rows are sorted by day and
+        then by timestamp, so each day is a contiguous range.
+        """
+        if len(self) == 0:
+            return slice(0, 0)
+        
+        if day is None:
+            day = int(self.day[-1])
+            
+        return slice(int(np.searchsorted(self.day, day, 'left')), int(np.searchsorted(self.day, day, 'right')))
+    
+    def index_at(self, timestamp: Time, day: int | None = None) -> int:
+        """
+        Return the index of the last row at or before the given timestamp on the given day (the last day in the log
+        if None), in O(log n) time.
+        
+        Raises:
+        KeyError: If the day has no rows at or before the timestamp.
+        """
+        rows = self.day_range(day)
+        index = rows.start + int(np.searchsorted(self.timestamp[rows], timestamp, 'right')) - 1
+        
+        if index < rows.start:
+            raise KeyError("No activity for " + self.product + " at or before timestamp " + str(timestamp))
+        
+        return index
+    
+    def window_rows(self, start: Time, end: Time, day: int | None = None) -> slice:
+        """
+        Return the rows with timestamps between start and end (inclusive) on the given day (the last day in the log
+        if None)
+        """
+        rows = self.day_range(day)
+        timestamps = self.timestamp[rows]
+        return slice(rows.start + int(np.searchsorted(timestamps, start, 'left')),
+            rows.start + int(np.searchsorted(timestamps, end, 'right')))
+    
+    def window(self, start: Time, end: Time, day: int | None = None) -> 'ProductActivityColumns':
+        """
+        Return the rows with timestamps between start and end (inclusive) on the given day (the last day in the log
+        if None), as a view of these arrays rather than a copy
+        """
+        return self[self.window_rows(start, end, day)]
+
+"""
+Convert one row of the level arrays back into a list of (price, volume) tuples, stopping at the first missing level.
+"""
+def _levels(prices: np.ndarray, volumes: np.ndarray) -> List[Tuple[int, Position]]:
+    levels: List[Tuple[int, Position]] = []
+
+    for price, volume in zip(prices, volumes):
+        if np.isnan(price):
+            break
+
+        levels.append((int(price), int(volume)))
+
+    return levels
+
+"""
+Accumulates the rows of the activities log for one product in compact typed buffers, and converts them into a
+ProductActivityColumns object once all rows have been read.
+"""
+class _ActivityColumnsBuilder:
+    def __init__(self, product: Product):
+        self.product = product
+        self.day = array('q')
+        self.timestamp = array('q')
+        self.mid_price = array('d')
+        self.profit_and_loss = array('d')
+        self.bid_prices = array('d')
+        self.bid_volumes = array('d')
+        self.ask_prices = array('d')
+        self.ask_volumes = array('d')
+
+    def add_row(self, row: List[str]) -> None:
+        self.day.append(int(row[0]))
+        self.timestamp.append(int(row[1]))
+        self.mid_price.append(float(row[15]))
+        self.profit_and_loss.append(float(row[16]))
+
+        # Parse each of the three bid and ask prices/volumes, leaving NaN after the first missing level
+        self._add_levels(row, 3, self.bid_prices, self.bid_volumes)
+        self._add_levels(row, 9, self.ask_prices, self.ask_volumes)
+
+    def _add_levels(self, row: List[str], start: int, prices: array, volumes: array) -> None:
+        missing = False
+
+        for level in range(ProductActivityColumns.LEVELS):
+            price = row[start + level * 2]
+            volume = row[start + level * 2 + 1]
+            missing = missing or price is None or volume is None or price == '' or volume == ''
+
+            if missing:
+                prices.append(np.nan)
+                volumes.append(np.nan)
+            else:
+                # Convert to float first: Logs often store numbers as "1198.0" even if they are integers
+                prices.append(float(price))
+                volumes.append(float(volume))
+
+    def build(self) -> ProductActivityColumns:
+        levels = ProductActivityColumns.LEVELS
+        return ProductActivityColumns(self.product,
+            np.frombuffer(self.day, dtype=np.int64),
+            np.frombuffer(self.timestamp, dtype=np.int64),
+            np.frombuffer(self.mid_price, dtype=np.float64),
+            np.frombuffer(self.profit_and_loss, dtype=np.float64),
+            np.frombuffer(self.bid_prices, dtype=np.float64).reshape(-1, levels),
+            np.frombuffer(self.bid_volumes, dtype=np.float64).reshape(-1, levels),
+            np.frombuffer(self.ask_prices, dtype=np.float64).reshape(-1, levels),
+            np.frombuffer(self.ask_volumes, dtype=np.float64).reshape(-1, levels))
+
+"""
+Decodes the lines of the "sandbox logs" section of a log file on demand, using an index of the byte offset and length
+of each line that the logger wrote. The most recently decoded lines are kept in a cache of limited size.
+"""
+class LazySandboxLog:
+    def __init__(self, path: str, timestamps: np.ndarray, offsets: np.ndarray, lengths: np.ndarray,
+        fields: FrozenSet[str] = LOG_FIELDS, cache_size: int = LAZY_CACHE_SIZE):
+        
+        self.path = path
+        self.fields = fields
+        self.timestamps = timestamps
+        self.offsets = offsets
+        self.lengths = lengths
+        self.cache_size = cache_size
+        self._init_cache()
+        
+    def _init_cache(self) -> None:
+        self._file: mmap.mmap | None = None
+        self._cache: OrderedDict[int, sandbox_record_t] = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # The memory map, cache and lock belong to this process, so they are recreated when unpickled
+        state = self.__dict__.copy()
+        del state['_file'], state['_cache'], state['_lock']
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_cache()
+        
+    def fork_locks(self) -> List[Any]:
+        """
+        The lock held while the memory map and the cache of decoded lines are changed
+        """
+        return [self._lock]
+        
+    def record(self, index: int) -> sandbox_record_t:
+        """
+        Return the trading state, orders, user logs, user values and flush time of the line with the given index
+        """
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+            
+        jsonParsed = self._decode_line(index)
+        decoder = None
+        
+        if 'order_depths' in self.fields and 'odd' in jsonParsed['state']:
+            decoder = _OrderDepthDecoder(self._previous_order_depths(index))
+        
+        record = _parse_sandbox_record(jsonParsed, self.fields, decoder)
+        
+        with self._lock:
+            self._cache[index] = record
+            
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                
+        return record
+    
+    def _decode_line(self, index: int) -> Dict[str, Any]:
+        """
+        Decode the JSON of the line with the given index, without building any objects from it
+        """
+        with self._lock:
+            if self._file is None:
+                with open(self.path, 'rb') as f:
+                    self._file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                
+            start = int(self.offsets[index])
+            line = self._file[start:start + int(self.lengths[index])].decode().rstrip('\r\n')
+            
+        unparsedLine = _sandbox_json(line)
+        
+        if unparsedLine is None:
+            raise ValueError("The log file has changed since it was indexed: " + self.path)
+        
+        return json.loads(unparsedLine)
+    
+    def _previous_order_depths(self, index: int) -> Dict[Symbol, OrderDepth]:
+        """
+        Rebuild the order depths of the line before the given index, for a line logged as changes to them. Starts
+        from the nearest earlier line that is cached or was logged as a snapshot, which is usually the line just
+        before when the lines are read in order.
+        """
+        changes: List[Dict[Symbol, Any]] = []
+        order_depths: Dict[Symbol, OrderDepth] = {}
+        
+        for previous in range(index - 1, -1, -1):
+            with self._lock:
+                cached = self._cache.get(previous)
+                
+            if cached is not None:
+                order_depths = cached[0].order_depths
+                break
+            
+            state = self._decode_line(previous)['state']
+            
+            if 'odd' not in state:
+                order_depths = _parse_order_depths(state['od'])
+                break
+            
+            changes.append(state['odd'])
+            
+        for line_changes in reversed(changes):
+            order_depths = _apply_order_depth_changes(order_depths, line_changes)
+            
+        return order_depths
 
 """
-A class to store all data parsed from the log file.
+A read-only sequence of one part (trading states, orders, logs, values or flush times) of the lines in a
+LazySandboxLog, or of the records in a LogCache.CachedRecords. Items are only decoded when they are accessed, and
+slicing returns another lazy sequence without decoding anything.
+"""
+class LazySequence(Sequence[Any]):
+    def __init__(self, sandbox_log: 'LazySandboxLog | CachedRecords', field: int, indices: range | None = None):
+        self.sandbox_log = sandbox_log
+        self.field = field
+        self.indices = indices if indices is not None else range(len(sandbox_log))
+        
+    def __len__(self) -> int:
+        return len(self.indices)
+    
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return LazySequence(self.sandbox_log, self.field, self.indices[index])
+        
+        return self.sandbox_log.record(self.indices[index])[self.field]
+    
+"""
+A class to store all data parsed from the log file. When the log is parsed lazily, trading_states, orders, logs,
+values and flush_times are LazySequence objects rather than lists, which decode each timestamp when it is accessed.
+
+flush_times holds the time in nanoseconds that the logger took to write each line of the sandbox logs, or None for
+lines written by a logger that does not measure it.
 """
 class LogData:
-    def __init__(self, trading_states: List[TradingState], orders: List[Dict[Symbol, List[Order]]], logs: List[str],
-        values: List[Dict[str, Any]], submission_logs: List[str], activities: Dict[Product, List[ProductActivityLog]]):
+    def __init__(self, trading_states: Sequence[TradingState], orders: Sequence[Dict[Symbol, List[Order]]],
+        logs: Sequence[str], values: Sequence[Dict[str, Any]], flush_times: Sequence[int | None],
+        submission_logs: List[str], activities: Dict[Product, ProductActivityColumns],
+        fields: FrozenSet[str] = LOG_FIELDS):
         
         self.trading_states = trading_states
         self.orders = orders
         self.logs = logs
         self.values = values
+        self.flush_times = flush_times
         self.submission_logs = submission_logs
         self.activities = activities
+        
+        # The fields that were parsed. Any others are left empty in the trading states, orders, logs, values and flush
+        # times.
+        self.fields = fields
+        
+        # A hash of the log file's contents, set when the data is loaded through LogCache
+        self.digest: str | None = None
+        
+        # The timestamp of each trading state, built when first needed
+        self._timestamps: np.ndarray | None = None
+        
+        # The order book matrix of each product, built when first needed
+        self._order_books: Dict[Product, OrderBookMatrix] | None = None
+        
+        # The market and own trades of every state in one table, built when first needed
+        self._trade_tape: TradeTape | None = None
+        
+        # The custom values as one column per value name, built when first needed
+        self._value_columns: Dict[str, ValueColumn] | None = None
+        
+        # The indicators computed from this data, created when first needed
+        self._series: DerivedSeries | None = None
+        
+        # The index of the words in the user logs and submission logs, built while parsing or when first searched
+        self._search_index: SearchIndex | None = None
+        
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        The timestamp of each trading state, in the order of trading_states. The sandbox logs are written in time
+        order, so this array is sorted and can be searched in O(log n) time.
+        """
+        if self._timestamps is None:
+            if isinstance(self.trading_states, LazySequence):
+                # Lazily parsed logs and logs read from the cache already have the timestamps in their index
+                indices = self.trading_states.indices
+                self._timestamps = self.trading_states.sandbox_log.timestamps[indices.start:indices.stop:indices.step]
+            else:
+                self._timestamps = np.fromiter((state.timestamp for state in self.trading_states), dtype=np.int64,
+                    count=len(self.trading_states))
+                
+        return self._timestamps
+    
+    @property
+    def order_books(self) -> Dict[Product, OrderBookMatrix]:
+        """
+        The order book of each product at every trading state, as a matrix of the volume at each price level. They
+        are built in one pass over the order depths the first time any graph uses them, and shared by every graph
+        after that.
+        """
+        if self._order_books is None:
+            self._order_books = build_order_books(self.trading_states, self.timestamps)
+            
+        return self._order_books
+    
+    @property
+    def trade_tape(self) -> TradeTape:
+        """
+        The market and own trades of every trading state, flattened into one table with an array per column. It is
+        built in one pass over the trading states the first time any graph uses it, and shared by every graph after
+        that.
+        """
+        if self._trade_tape is None:
+            self._trade_tape = build_trade_tape(self.trading_states)
+            
+        return self._trade_tape
+    
+    @property
+    def value_columns(self) -> Dict[str, ValueColumn]:
+        """
+        The custom values logged with Logger.flush, as a column for each value name with one entry per trading state.
+        They are built in one pass over the values the first time any graph uses them, and shared by every graph
+        after that.
+        """
+        if self._value_columns is None:
+            self._value_columns = build_value_columns(self.values)
+            
+        return self._value_columns
+    
+    @property
+    def series(self) -> DerivedSeries:
+        """
+        The indicators computed from this data, such as rolling means and VWAP, which are computed once and shared by
+        every graph that uses them. See DerivedSeries.py for the indicators available.
+        """
+        if self._series is None:
+            self._series = DerivedSeries(self)
+            
+        return self._series
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        """
+        The index of the words in the user logs and submission logs. It is built while the logs are parsed, or the first
+        time they are searched if they weren't parsed.
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.logs, self.submission_logs)
+            
+        return self._search_index
+    
+    def state_index(self, timestamp: Time) -> int:
+        """
+        Return the index of the last trading state at or before the given timestamp
+        
+        Raises:
+        KeyError: If there is no trading state at or before the timestamp.
+        """
+        index = int(np.searchsorted(self.timestamps, timestamp, 'right')) - 1
+        
+        if index < 0:
+            raise KeyError("No trading state at or before timestamp " + str(timestamp))
+        
+        return index
+    
+    def state_at(self, timestamp: Time) -> TradingState:
+        """
+        Return the last trading state at or before the given timestamp
+        """
+        return self.trading_states[self.state_index(timestamp)]
+    
+    def activity_at(self, product: Product, timestamp: Time, day: int | None = None) -> ProductActivityLog:
+        """
+        Return the last activity of a product at or before the given timestamp, on the given day of the activities
+        log. If day is None, the last day in the log is used, which is the day the sandbox logs were recorded on.
+        """
+        activity = self.activities[product]
+        return activity[activity.index_at(timestamp, day)]
+    
+    def time_slice(self, start: Time, end: Time) -> slice:
+        """
+        Return the slice of trading_states, orders, logs, values and flush_times with timestamps between start and
+        end (inclusive)
+        """
+        return slice(int(np.searchsorted(self.timestamps, start, 'left')),
+            int(np.searchsorted(self.timestamps, end, 'right')))
+    
+    def position_matrix(self, products: Sequence[Product], states: slice = slice(None)) -> np.ndarray:
+        """
+        Return the position of each product in each trading state, as an array with one row per trading state and
+        one column per product. Products without a position in a trading state have a position of 0. Only the
+        trading states in the given slice are included, if one is given.
+        """
+        columns = {product: column for column, product in enumerate(products)}
+        trading_states = self.trading_states[states]
+        rows = array('q')
+        cols = array('q')
+        positions = array('q')
+        
+        # Collect every position in one pass over the states, then scatter them into the matrix in one operation
+        for row, state in enumerate(trading_states):
+            for product, position in state.position.items():
+                if product in columns:
+                    rows.append(row)
+                    cols.append(columns[product])
+                    positions.append(position)
+                    
+        matrix = np.zeros((len(trading_states), len(products)), dtype=np.int64)
+        matrix[np.frombuffer(rows, dtype=np.int64), np.frombuffer(cols, dtype=np.int64)] = \
+            np.frombuffer(positions, dtype=np.int64)
+        return matrix
+    
+    def append_sandbox_logs(self, sandbox_logs: sandbox_logs_t) -> None:
+        """
+        Append newly parsed trading states, orders, logs, values and flush times to the end of this data
+        """
+        new_states = sandbox_logs[0]
+        
+        for parsed, new in zip((self.trading_states, self.orders, self.logs, self.values, self.flush_times),
+            sandbox_logs):
+            parsed.extend(new)  # type: ignore[attr-defined]
+            
+        # The order books, trade tape, value columns and indicators are built again with the new states when they are
+        # next used. The search index is extended with the new logs instead.
+        search_index = self._search_index
+        self.clear_caches()
+        
+        if search_index is not None:
+            search_index.extend(sandbox_logs[2], [])
+            self._search_index = search_index
+        
+        if self._timestamps is not None:
+            self._timestamps = np.concatenate((self._timestamps,
+                np.fromiter((state.timestamp for state in new_states), dtype=np.int64, count=len(new_states))))
+    
+    def clear_caches(self) -> None:
+        """
+        Forget the order books, trade tape, value columns, indicators and search index built from this data, so they
+        are built again when they are next used
+        """
+        self._order_books = None
+        self._trade_tape = None
+        self._value_columns = None
+        self._series = None
+        self._search_index = None
+        
+    def append_submission_logs(self, submission_logs: List[str]) -> None:
+        """
+        Append newly read lines of the submission logs to the end of this data
+        """
+        self.submission_logs.extend(submission_logs)
+        
+        if self._search_index is not None:
+            self._search_index.extend([], submission_logs)
+            
+    def append_activities(self, activities: Dict[Product, ProductActivityColumns]) -> None:
+        """
+        Append newly parsed rows of the activities log to the end of this data
+        """
+        for product, activity in activities.items():
+            if product in self.activities:
+                self.activities[product].append(activity)
+            else:
+                self.activities[product] = activity
+                
+        # The indicators are computed again from the new rows when they are next used
+        self._series = None
+    
+    def window(self, start: Time, end: Time) -> 'LogData':
+        """
+        Return the data with timestamps between start and end (inclusive) as a new LogData object. The trading states
+        and activities are sliced rather than copied, so this can be used to zoom into a time range cheaply.
+        """
+        states = self.time_slice(start, end)
+        activity_rows = {product: activity.window_rows(start, end) for product, activity in self.activities.items()}
+        activities = {product: self.activities[product][rows] for product, rows in activity_rows.items()}
+        windowed = LogData(self.trading_states[states], self.orders[states], self.logs[states], self.values[states],
+            self.flush_times[states], self.submission_logs, activities, self.fields)
+        windowed.digest = self.digest
+        windowed._timestamps = self.timestamps[states]
+        
+        if self._order_books is not None:
+            windowed._order_books = {product: book[states] for product, book in self._order_books.items()}
+            
+        if self._trade_tape is not None:
+            windowed._trade_tape = self._trade_tape.ticks(states.start, states.stop)
+            
+        if self._value_columns is not None:
+            windowed._value_columns = {name: column[states] for name, column in self._value_columns.items()}
+            
+        windowed._series = self.series.window(windowed, activity_rows)
+        return windowed
+    
+    def fork_locks(self) -> List[Any]:
+        """
+        The locks that threads hold while they change this data's caches, in the order they must be acquired. A
+        process forked while another thread holds one of them would inherit it locked, and the data it protects half
+        changed, so they are held while forking graph worker processes.
+        """
+        locks = self._series.fork_locks() if self._series is not None else []
+        
+        # Indicators can read the trading states, so their locks are taken before the sandbox log's
+        if isinstance(self.trading_states, LazySequence):
+            locks += self.trading_states.sandbox_log.fork_locks()
+            
+        return locks
 
 """
 Parse the given log file, and return a LogData object.
 
 Parameters:
-log_file (TextIO): The log file to parse, as an open file object.
+log_file (TextIO | BinaryIO): The log file to parse, as an open file object. Must be opened in binary mode when
+parsing lazily.
+workers (int | None): The number of processes used to parse the sandbox logs. None uses one per CPU core, and 1
+parses everything in this process.
+lazy (bool): If True, the sandbox logs are only indexed, and the trading states, orders, logs, values and flush times
+of each timestamp are decoded from the log file when they are first accessed.
+fields (Iterable[str] | None): The names of the fields to parse, from LOG_FIELDS. Fields of the trading states,
+orders, logs, values and flush times that are not included are left empty. None parses every field.
 
 Returns:
 LogData: The parsed data from the log file.
 """
-@st.cache_data
-def parse(log_file: TextIO) -> LogData:
-    # Find the start of each section of the log file:
-    lines = log_file.read().split('\n')
-    sandboxStart = lines.index('Sandbox logs:')
-    submissionStart = lines.index('Submission logs:')
-    activitiesStart = lines.index('Activities log:')
+def parse(log_file: TextIO | BinaryIO, workers: int | None = 1, lazy: bool = False,
+    fields: Iterable[str] | None = None) -> LogData:
+    
+    parsed_fields = LOG_FIELDS if fields is None else frozenset(fields)
+    
+    if not parsed_fields <= LOG_FIELDS:
+        raise ValueError("Unknown log fields: " + ", ".join(sorted(parsed_fields - LOG_FIELDS)))
+    
+    # Iterate over the log file lazily, so only one line is held in memory at a time. Each section is handed to its
+    # parser as a generator that stops at the header of the next section.
+    if lazy:
+        if isinstance(log_file, io.TextIOBase):
+            raise ValueError("The log file must be opened in binary mode to be parsed lazily")
+        
+        lines: Iterator[str] = _OffsetLines(log_file)
+    else:
+        lines = (line.rstrip('\r\n') for line in log_file)
+    
+    _skip_section(lines, 'Sandbox logs:')
+    
+    # Parse each section of the logs separately. The lines are read from the file as they are parsed, so each stage
+    # includes the time taken to read its section.
+    # The user logs of a lazily parsed log are read from the sandbox logs while they are indexed, for the search index
+    user_logs: List[str] | None = None
     
-    # Parse each section of the logs separately:
-    sandbox_logs = parse_sandbox_logs(lines[sandboxStart + 1:submissionStart])
-    submission_logs = parse_submission_logs(lines[submissionStart + 1:activitiesStart])
-    activities_log = parse_activities_log(lines[activitiesStart + 1:])
-    return LogData(*sandbox_logs, submission_logs, activities_log)
+    with gc_paused():
+        if isinstance(lines, _OffsetLines):
+            user_logs = [] if 'logs' in parsed_fields else None
+            
+            with stage('index_sandbox_logs'):
+                sandbox_logs = index_sandbox_logs(_section_lines(lines, 'Submission logs:'), lines, parsed_fields,
+                    user_logs)
+        else:
+            with stage('parse_sandbox_logs'):
+                sandbox_logs = parse_sandbox_logs(_section_lines(lines, 'Submission logs:'), workers, parsed_fields)
+            
+        with stage('parse_submission_logs'):
+            submission_logs = parse_submission_logs(_section_lines(lines, 'Activities log:'))
+            
+        with stage('parse_activities_log'):
+            activities_log = parse_activities_log(lines)
+            
+    data = LogData(*sandbox_logs, submission_logs, activities_log, parsed_fields)
+    
+    if parsed_fields & SEARCH_FIELDS:
+        with stage('index_search'):
+            data._search_index = SearchIndex(user_logs if user_logs is not None else data.logs, submission_logs)
+            
+    return data
+
+"""
+Pause the cyclic garbage collector while the parsed objects are built. Parsing allocates millions of objects without
+any reference cycles, and each allocation threshold would otherwise trigger another pass over all of them.
+"""
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    enabled = gc.isenabled()
+    gc.disable()
+    
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+"""
+Consume lines from the log file up to and including the given section header.
+
+Parameters:
+lines (Iterator[str]): The remaining lines of the log file.
+header (str): The header line that starts the next section.
+
+Raises:
+ValueError: If the log file ends before the header is found.
+"""
+def _skip_section(lines: Iterator[str], header: str) -> None:
+    for line in _section_lines(lines, header):
+        pass
+
+"""
+Iterates over the lines of a log file opened in binary mode, keeping track of the byte offset and length of the line
+that was returned last.
+"""
+class _OffsetLines(Iterator[str]):
+    def __init__(self, log_file: BinaryIO):
+        self.path = os.path.abspath(log_file.name)
+        self.offset = 0
+        self.length = 0
+        self._lines = iter(log_file)
+        
+    def __next__(self) -> str:
+        raw_line = next(self._lines)
+        self.offset += self.length
+        self.length = len(raw_line)
+        return raw_line.decode().rstrip('\r\n')
+
+"""
+Yield lines from the log file until the given section header is reached. The header itself is consumed, so the
+iterator is left at the first line of the next section.
+
+Parameters:
+lines (Iterator[str]): The remaining lines of the log file.
+header (str): The header line that starts the next section.
+
+Raises:
+ValueError: If the log file ends before the header is found.
+"""
+def _section_lines(lines: Iterator[str], header: str) -> Iterator[str]:
+    for line in lines:
+        if line == header:
+            return
+        
+        yield line
+        
+    raise ValueError("'" + header + "' was not found in the log file")
 
 """
 Parse the "sandbox logs" section of the log file, and return a tuple of the parsed data.
 
+When more than one worker is requested and the section is long enough, the lines are split into chunks of complete
+JSON lines which are parsed in a pool of worker processes. The chunks are reassembled in the order they appear in the
+log file, which is timestamp order, so the result is identical to parsing serially.
+
 Parameters:
-lines (List[str]): The lines of the log file to parse.
+lines (Iterable[str]): The lines of the log file to parse.
+workers (int | None): The number of worker processes to use. None uses one per CPU core, and 1 parses serially.
+fields (FrozenSet[str]): The fields to parse. Any others are left empty.
 
 Returns:
-Tuple[List[TradingState], List[Dict[Symbol, List[Order]]], List[str], List[Dict[str, Any]]]: The parsed data from the
-log file. In the following order: A list of the trading states, the orders, the user log messages, and the user values.
+Tuple[List[TradingState], List[Dict[Symbol, List[Order]]], List[str], List[Dict[str, Any]], List[int | None]]: The
+parsed data from the log file. In the following order: A list of the trading states, the orders, the user log
+messages, the user values, and the logger's flush times.
+"""
+def parse_sandbox_logs(lines: Iterable[str], workers: int | None = 1,
+    fields: FrozenSet[str] = LOG_FIELDS) -> sandbox_logs_t:
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+        
+    if workers <= 1:
+        return _parse_sandbox_chunk(lines, fields)
+    
+    # Read ahead far enough to tell whether the section is large enough to be worth parsing in parallel
+    lines = iter(lines)
+    head = list(itertools.islice(lines, PARALLEL_MIN_LINES))
+    
+    if len(head) < PARALLEL_MIN_LINES:
+        return _parse_sandbox_chunk(head, fields)
+    
+    result: sandbox_logs_t = ([], [], [], [], [])
+    decoder = _OrderDepthDecoder()
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+        # Keep a bounded number of chunks in flight, so the section is never held in memory all at once
+        pending: deque[Future[Tuple[sandbox_logs_t, _OrderDepthDecoder]]] = deque()
+        chunks = itertools.chain(head, lines)
+        
+        while chunk := list(itertools.islice(chunks, SANDBOX_CHUNK_LINES)):
+            pending.append(pool.submit(_parse_separate_chunk, chunk, fields))
+            
+            if len(pending) >= workers * 2:
+                _extend_sandbox_logs(result, decoder, *pending.popleft().result())
+                
+        while pending:
+            _extend_sandbox_logs(result, decoder, *pending.popleft().result())
+            
+    return result
+
 """
-def parse_sandbox_logs(lines: List[str]) -> Tuple[List[TradingState], List[Dict[Symbol, List[Order]]],
-    List[str], List[Dict[str, Any]]]:
+Append the data parsed from one chunk of the sandbox logs to the data parsed so far. The chunks must be appended in
+order, so that the order depths logged as changes at the start of each chunk can be decoded.
+"""
+def _extend_sandbox_logs(result: sandbox_logs_t, decoder: '_OrderDepthDecoder', chunk: sandbox_logs_t,
+    chunk_decoder: '_OrderDepthDecoder') -> None:
+    
+    decoder.resolve(chunk_decoder, chunk[0])
     
+    for parsed, parsed_chunk in zip(result, chunk):
+        parsed.extend(parsed_chunk)
+
+"""
+Parse a chunk of complete lines from the "sandbox logs" section serially. Order depths are decoded with the given
+decoder, so that a log can be parsed over several calls.
+"""
+def _parse_sandbox_chunk(lines: Iterable[str], fields: FrozenSet[str] = LOG_FIELDS,
+    decoder: '_OrderDepthDecoder | None' = None) -> sandbox_logs_t:
+    
+    if decoder is None:
+        decoder = _OrderDepthDecoder()
+        
     trading_states: List[TradingState] = []
     orders: List[Dict[Symbol, List[Order]]] = []
     logs: List[str] = []
     values: List[Dict[str, Any]] = []
+    flush_times: List[int | None] = []
     
-    for line in lines:        
-        if line.startswith('{'):
-            unparsedLine = line        
-        elif line == '' or line.endswith(' ') or not line[0].isdigit():
-            # Discard lines that are empty, end with a space, or do not start with a digit        
-            continue
-        else:
-            unparsedLine = line[line.index(' ') + 1:]
-            
-        if not unparsedLine.startswith('{\"logs\":\"'):
+    for line in lines:
+        unparsedLine = _sandbox_json(line)
+        
+        if unparsedLine is None:
             continue
         
-        jsonParsed = json.loads(unparsedLine)
+        trading_state, user_orders, user_logs, user_values, flush_time = _parse_sandbox_record(
+            json.loads(unparsedLine), fields, decoder)
+        trading_states.append(trading_state)
+        logs.append(user_logs)
+        values.append(user_values)
+        orders.append(user_orders)
+        flush_times.append(flush_time)
         
-        # Parse user logs:
-        user_logs = jsonParsed['logs']
+    return (trading_states, orders, logs, values, flush_times)
+
+"""
+Parse a chunk of lines in a worker process when parsing in parallel, so it must remain a module-level function. The
+decoder is returned so that the order depths the chunk could not decode on its own can be filled in.
+"""
+def _parse_separate_chunk(lines: Iterable[str],
+    fields: FrozenSet[str]) -> Tuple[sandbox_logs_t, '_OrderDepthDecoder']:
+    
+    decoder = _OrderDepthDecoder()
+    return (_parse_sandbox_chunk(lines, fields, decoder), decoder)
+
+"""
+Find the JSON written by the logger in a line of the "sandbox logs" section.
+
+Parameters:
+line (str): A line from the sandbox logs.
+
+Returns:
+str | None: The JSON part of the line, or None if the line was not written by the logger.
+"""
+def _sandbox_json(line: str) -> str | None:
+    if line.startswith('{'):
+        unparsedLine = line        
+    elif line == '' or line.endswith(' ') or not line[0].isdigit():
+        # Discard lines that are empty, end with a space, or do not start with a digit        
+        return None
+    else:
+        unparsedLine = line[line.index(' ') + 1:]
         
-        # Parse orders:
-        user_orders: Dict[Symbol, List[Order]] = {}
+    if not unparsedLine.startswith('{\"logs\":\"'):
+        return None
+    
+    return unparsedLine
+
+"""
+Build the trading state, orders, user logs, user values and flush time from one decoded line of the sandbox logs.
+Fields that are not in the given set are left empty, which skips the cost of building them. Order depths logged as
+changes since the previous line are rebuilt by the decoder, which must have decoded every earlier line.
+"""
+def _parse_sandbox_record(jsonParsed: Dict[str, Any], fields: FrozenSet[str] = LOG_FIELDS,
+    decoder: '_OrderDepthDecoder | None' = None) -> sandbox_record_t:
+    state = jsonParsed['state']
+    
+    # Parse user logs:
+    user_logs = jsonParsed['logs'] if 'logs' in fields else ''
+    
+    # Parse orders:
+    user_orders: Dict[Symbol, List[Order]] = {}
+    if 'orders' in fields:
         for order in jsonParsed['orders']:
-            user_orders.setdefault(order[0], [])
-            user_orders[order[0]].append(Order(*order))
-        
-        # Parse trading state:
-        # Parse listings:
-        listings: Dict[Symbol, Listing] = {}
-        for listing in jsonParsed['state']['l']:
-            listings[listing[0]] = Listing(*listing)
-        
-        # Parse market trades:
-        market_trades: Dict[Symbol, List[Trade]] = {}
-        for mt in jsonParsed['state']['mt']:
-            symbol, price, quantity, buyer, seller, timestamp = mt[0], mt[3], mt[4], mt[1], mt[2], mt[5]            
+            symbol = intern(order[0])
+            user_orders.setdefault(symbol, [])
+            user_orders[symbol].append(Order(symbol, order[1], order[2]))
+    
+    # Parse trading state:
+    # Parse listings:
+    listings: Dict[Symbol, Listing] = {}
+    if 'listings' in fields:
+        for listing in state['l']:
+            shared = shared_listing(*listing)
+            listings[shared.symbol] = shared
+    
+    # Parse market trades:
+    market_trades: Dict[Symbol, List[Trade]] = {}
+    if 'market_trades' in fields:
+        for mt in state['mt']:
+            symbol, price, quantity, buyer, seller, timestamp = intern(mt[0]), mt[3], mt[4], intern(mt[1]), \
+                intern(mt[2]), mt[5]
             market_trades.setdefault(symbol, [])
             market_trades[symbol].append(Trade(symbol, price, quantity, buyer, seller, timestamp))
-            
-        # Parse observations:
-        observations: Dict[Symbol, Observation] = {}
-        for observation in jsonParsed['state']['o']:
-            observations[observation] = jsonParsed['state']['o'][observation]
         
-        # Parse order depths:
-        order_depths: Dict[Symbol, OrderDepth] = {}
-        for symbol in jsonParsed['state']['od']:
-            od = jsonParsed['state']['od'][symbol]
-            order_depths.setdefault(symbol, OrderDepth())
-
-            for buy_order_price in od[0]:
-                # Convert to float first: Logs often store numbers as "1198.0" even if they are integers
-                order_depths[symbol].buy_orders[int(float(buy_order_price))] = od[0][buy_order_price]
+    # Parse observations:
+    observations: Dict[Symbol, Observation] = {}
+    if 'observations' in fields:
+        for observation in state['o']:
+            observations[intern(observation)] = state['o'][observation]
+    
+    # Parse order depths:
+    order_depths: Dict[Symbol, OrderDepth] = {}
+    if 'order_depths' in fields:
+        order_depths = (decoder or _OrderDepthDecoder()).decode(state)
             
-            for sell_order_price in od[1]:
-                order_depths[symbol].sell_orders[int(float(sell_order_price))] = od[1][sell_order_price]
-                
-        # Parse own trades:
-        own_trades: Dict[Symbol, List[Trade]] = {}
-        for ot in jsonParsed['state']['ot']:
-            symbol, price, quantity, buyer, seller, timestamp = ot[0], ot[3], ot[4], ot[1], ot[2], ot[5]            
+    # Parse own trades:
+    own_trades: Dict[Symbol, List[Trade]] = {}
+    if 'own_trades' in fields:
+        for ot in state['ot']:
+            symbol, price, quantity, buyer, seller, timestamp = intern(ot[0]), ot[3], ot[4], intern(ot[1]), \
+                intern(ot[2]), ot[5]
             own_trades.setdefault(symbol, [])
             own_trades[symbol].append(Trade(symbol, price, quantity, buyer, seller, timestamp))
+        
+    # Parse position:
+    position: Dict[Product, Position] = {}
+    if 'position' in fields:
+        for product in state['p']:
+            position[intern(product)] = state['p'][product]
+        
+    # Parse timestamp:
+    timestamp = state['t']
+        
+    # Parse values:
+    user_values: Dict[str, Any] = {}
+    
+    if 'values' in fields and 'values' in jsonParsed:
+        for value in jsonParsed['values']:
+            user_values[value] = jsonParsed['values'][value]
+        
+    # Parse the time the logger took to write the line:
+    flush_time = jsonParsed.get('flush_ns') if 'flush_times' in fields else None
+        
+    trading_state = TradingState(timestamp, listings, order_depths, own_trades, market_trades, position,
+        observations)
+    return (trading_state, user_orders, user_logs, user_values, flush_time)
+
+"""
+Parse the order depths of one snapshot written by the logger.
+"""
+def _parse_order_depths(od: Dict[Symbol, List[Dict[str, Position]]]) -> Dict[Symbol, OrderDepth]:
+    order_depths: Dict[Symbol, OrderDepth] = {}
+    
+    for symbol in od:
+        order_depths[intern(symbol)] = OrderDepth()
+        
+        for buy_order_price in od[symbol][0]:
+            # Convert to float first: Logs often store numbers as "1198.0" even if they are integers
+            order_depths[symbol].buy_orders[int(float(buy_order_price))] = od[symbol][0][buy_order_price]
+        
+        for sell_order_price in od[symbol][1]:
+            order_depths[symbol].sell_orders[int(float(sell_order_price))] = od[symbol][1][sell_order_price]
             
-        # Parse position:
-        position: Dict[Product, Position] = {}
-        for product in jsonParsed['state']['p']:
-            position[product] = jsonParsed['state']['p'][product]
-            
-        # Parse timestamp:
-        timestamp = jsonParsed['state']['t']
-            
-        # Parse values:
-        user_values: Dict[str, Any] = {}
+    return order_depths
+
+"""
+Apply the order depth changes logged for one line to the order depths of the previous line. A volume of 0 removes a
+price level, and a symbol mapped to None is removed. The order depths of symbols that did not change are shared with
+the previous line rather than copied.
+"""
+def _apply_order_depth_changes(order_depths: Dict[Symbol, OrderDepth],
+    changes: Dict[Symbol, List[Dict[str, Position]] | None]) -> Dict[Symbol, OrderDepth]:
+    
+    result = dict(order_depths)
+    
+    for symbol, sides in changes.items():
+        if sides is None:
+            result.pop(symbol, None)
+            continue
+        
+        order_depth = OrderDepth()
+        
+        if symbol in order_depths:
+            order_depth.buy_orders = dict(order_depths[symbol].buy_orders)
+            order_depth.sell_orders = dict(order_depths[symbol].sell_orders)
+        
+        for levels, side in ((order_depth.buy_orders, sides[0]), (order_depth.sell_orders, sides[1])):
+            for price, volume in side.items():
+                if volume == 0:
+                    levels.pop(int(float(price)), None)
+                else:
+                    levels[int(float(price))] = volume
+                    
+        result[intern(symbol)] = order_depth
         
-        if "values" in jsonParsed:
-            for value in jsonParsed['values']:
-                user_values[value] = jsonParsed['values'][value]
+    return result
+
+"""
+Rebuilds the full order depths of each line of the sandbox logs, when the logger only wrote the changes since the
+previous line between periodic snapshots. Lines must be decoded in order.
+
+A decoder that starts part way through the log, such as one parsing a chunk in a worker process, cannot apply the
+changes it sees before the first snapshot. It leaves those order depths empty and keeps the changes in unresolved,
+until they are passed to the decoder of the previous chunk with resolve.
+"""
+class _OrderDepthDecoder:
+    def __init__(self, order_depths: Dict[Symbol, OrderDepth] | None = None):
+        # The order depths of the last line decoded, or None if they are not known yet
+        self.order_depths = order_depths
+        self.unresolved: List[Tuple[int, Dict[Symbol, Any]]] = []
+        self.decoded = 0
+        
+    def decode(self, state: Dict[str, Any]) -> Dict[Symbol, OrderDepth]:
+        """
+        Return the order depths of the next line, given its compressed trading state
+        """
+        index = self.decoded
+        self.decoded += 1
+        
+        if 'odd' not in state:
+            self.order_depths = _parse_order_depths(state['od'])
+        elif self.order_depths is None:
+            self.unresolved.append((index, state['odd']))
+            return {}
+        else:
+            self.order_depths = _apply_order_depth_changes(self.order_depths, state['odd'])
             
-        trading_states.append(TradingState(timestamp, listings, order_depths,
-            own_trades, market_trades, position, observations))
-        logs.append(user_logs)
-        values.append(user_values)
-        orders.append(user_orders)
+        return self.order_depths
+    
+    def resolve(self, chunk: '_OrderDepthDecoder', trading_states: List[TradingState]) -> None:
+        """
+        Continue from the end of a chunk of lines decoded separately, filling in the order depths of the chunk's
+        trading states that the chunk's decoder could not
+        """
+        for index, changes in chunk.unresolved:
+            # Changes logged before the first snapshot in the log cannot be decoded, and are left empty
+            if self.order_depths is not None:
+                self.order_depths = _apply_order_depth_changes(self.order_depths, changes)
+                trading_states[index].order_depths = self.order_depths
+                
+        if chunk.order_depths is not None:
+            self.order_depths = chunk.order_depths
+
+"""
+Index the "sandbox logs" section of the log file without decoding it, and return lazy sequences in place of the
+parsed data.
+
+Parameters:
+lines (Iterable[str]): The lines of the log file to index.
+offset_lines (_OffsetLines): The iterator the lines come from, which gives the position of each line in the file.
+fields (FrozenSet[str]): The fields to decode when a line is accessed.
+user_logs (List[str] | None): If given, the user log message of each line is appended to it. The message is usually
+the first value in the line's JSON, so it is read without decoding the rest of the line.
+
+Returns:
+Tuple[LazySequence, LazySequence, LazySequence, LazySequence, LazySequence]: Lazy sequences of the trading states, the
+orders, the user log messages, the user values, and the logger's flush times.
+"""
+def index_sandbox_logs(lines: Iterable[str], offset_lines: _OffsetLines, fields: FrozenSet[str] = LOG_FIELDS,
+    user_logs: List[str] | None = None) -> Tuple[LazySequence, LazySequence, LazySequence, LazySequence, LazySequence]:
+    
+    timestamps = array('q')
+    offsets = array('q')
+    lengths = array('q')
+    
+    for line in lines:
+        unparsedLine = _sandbox_json(line)
+        
+        if unparsedLine is None:
+            continue
+        
+        match = _TIMESTAMP_PATTERN.search(unparsedLine)
+        timestamps.append(int(match.group(1)) if match else json.loads(unparsedLine)['state']['t'])
+        offsets.append(offset_lines.offset)
+        lengths.append(offset_lines.length)
         
-    return (trading_states, orders, logs, values)
+        if user_logs is not None:
+            user_logs.append(json.decoder.scanstring(unparsedLine, len(_LOGS_START))[0]
+                if unparsedLine.startswith(_LOGS_START) else json.loads(unparsedLine).get('logs', ''))
+        
+    sandbox_log = LazySandboxLog(offset_lines.path, np.frombuffer(timestamps, dtype=np.int64),
+        np.frombuffer(offsets, dtype=np.int64), np.frombuffer(lengths, dtype=np.int64), fields)
+    return (LazySequence(sandbox_log, 0), LazySequence(sandbox_log, 1), LazySequence(sandbox_log, 2),
+        LazySequence(sandbox_log, 3), LazySequence(sandbox_log, 4))
 
 """
 Parse the "submission logs" section of the log file, and return a list of the parsed data.
 For now, this function simply returns the lines of the log file.
 
 Parameters:
-lines (List[str]): The lines of the log file to parse.
+lines (Iterable[str]): The lines of the log file to parse.
 
 Returns:
 List[str]: The parsed data from the log file.
 """
-def parse_submission_logs(lines: List[str]) -> List[str]:
+def parse_submission_logs(lines: Iterable[str]) -> List[str]:
     # Submission logs mostly contain error messages, etc.
     # Simply return the lines in this section of the log file for now
-    return lines
+    return list(lines)
 
 """
 Parse the "activities log" section of the log file, and return a dictionary of the parsed data.
 
 Parameters:
-lines (List[str]): The lines of the log file to parse.
+lines (Iterable[str]): The lines of the log file to parse.
 
 Returns:
-A dictionary of the product to a list of the product's activity for each timestamp.
+A dictionary of the product to a columnar store of the product's activity for each timestamp.
 """
-def parse_activities_log(lines: List[str]) -> Dict[Product, List[ProductActivityLog]]:
+def parse_activities_log(lines: Iterable[str]) -> Dict[Product, ProductActivityColumns]:
     reader = csv.reader(lines, delimiter=';')
     header = next(reader)
    
-    data: Dict[Product, List[ProductActivityLog]] = {}
+    builders: Dict[Product, _ActivityColumnsBuilder] = {}
     
     for row in reader:
         if len(row) == 0:
             continue
         
-        day, timestamp, product, mid_price, pnl = int(row[0]), int(row[1]), row[2], float(row[15]), float(row[16])
-        prod_log = ProductActivityLog(product, day, timestamp, mid_price=mid_price, profit_and_loss=pnl)
+        product = row[2]
         
-        # Parse each of the three bid and ask prices/volumes
+        if product not in builders:
+            builders[product] = _ActivityColumnsBuilder(product)
+            
+        builders[product].add_row(row)
         
-        for bid_num in range(3):
-            bid_price = row[3 + bid_num * 2]
-            bid_vol = row[4 + bid_num * 2]
+    return {product: builder.build() for product, builder in builders.items()}
+
+"""
+Parses a log file that is still being written, such as the output of a local backtester. Each call to poll reads
+only the bytes appended since the previous call, and appends the newly parsed data to the same LogData object. The
+state of the parser, including any partially written line, is kept between calls.
+"""
+class IncrementalParser:
+    def __init__(self, path: str, fields: Iterable[str] | None = None):
+        self.path = path
+        self.fields = LOG_FIELDS if fields is None else frozenset(fields)
+        self.reset()
+        
+    def reset(self) -> None:
+        """
+        Forget everything parsed so far, so the log file is parsed again from the start on the next poll
+        """
+        self.offset = 0
+        self.data = LogData([], [], [], [], [], [], {}, self.fields)
+        self._partial_line = b''
+        self._section: str | None = None
+        self._activities_header_read = False
+        self._order_depths = _OrderDepthDecoder()
+        
+        # The search index is extended as lines are parsed, so it is ready when the log is searched
+        if self.fields & SEARCH_FIELDS:
+            self.data._search_index = SearchIndex([], [])
             
-            if bid_price is None or bid_vol is None or bid_price == '' or bid_vol == '':
-                break
+        # Whether the last line was parsed by finish before it ended with a newline
+        self._finished = False
+        
+    def poll(self) -> bool:
+        """
+        Parse the lines appended to the log file since the last poll.
+        
+        Returns:
+        bool: True if any trading states or activities were added to the data.
+        """
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
             
-            prod_log.bids.append((int(float(bid_price)), int(float(bid_vol))))
+            # A file that got shorter has been replaced, so start again from the beginning. A file that grew after its
+            # last line was parsed by finish may have continued that line, so it is also parsed again.
+            if size < self.offset or (self._finished and size > self.offset):
+                self.reset()
             
-        for ask_num in range(3):
-            ask_price = row[9 + ask_num * 2]
-            ask_vol = row[10 + ask_num * 2]
+            f.seek(self.offset)
+            appended = f.read()
             
-            if ask_price is None or ask_vol is None or ask_price == '' or ask_vol == '':
-                break
+        self.offset += len(appended)
+        
+        # The last line is kept until it is complete, as the writer may be part way through it
+        lines = (self._partial_line + appended).split(b'\n')
+        self._partial_line = lines.pop()
+        return self._parse_lines(lines)
+    
+    def finish(self) -> bool:
+        """
+        Parse the last line of the log file, which poll keeps until it ends with a newline. Call this once the log file
+        has stopped growing, as the last line of a log file often has no newline. If the file grows again, the next
+        poll parses it again from the start.
+        
+        Returns:
+        bool: True if any trading states or activities were added to the data.
+        """
+        # A writer that pauses part way through a line leaves it incomplete, so it is kept until the rest is written
+        if not self._partial_line or not self._complete(self._partial_line):
+            return False
+        
+        lines = [self._partial_line]
+        self._partial_line = b''
+        self._finished = True
+        return self._parse_lines(lines)
+        
+    def _complete(self, raw_line: bytes) -> bool:
+        """
+        Whether a line that does not end with a newline can be parsed: it must be whole characters, a sandbox log line
+        must hold complete JSON, and an activities row must have every column
+        """
+        try:
+            line = raw_line.decode().rstrip('\r')
             
-            prod_log.asks.append((int(float(ask_price)), int(float(ask_vol))))
+            if line in _SECTION_HEADERS:
+                return True
             
-        data.setdefault(product, [])
-        data[product].append(prod_log)
+            if self._section == 'sandbox':
+                unparsedLine = _sandbox_json(line)
+                
+                if unparsedLine is not None:
+                    json.loads(unparsedLine)
+            elif self._section == 'activities' and self._activities_header_read and len(line.split(';')) > 1:
+                _ActivityColumnsBuilder('').add_row(line.split(';'))
+        except (ValueError, IndexError):
+            return False
         
-    return data
+        return True
+        
+    def _parse_lines(self, lines: List[bytes]) -> bool:
+        """
+        Parse complete lines of the log file, continuing from the section the previous line was in
+        """
+        sandbox_lines: List[str] = []
+        submission_lines: List[str] = []
+        activity_builders: Dict[Product, _ActivityColumnsBuilder] = {}
+        
+        with gc_paused():
+            for raw_line in lines:
+                line = raw_line.decode().rstrip('\r')
+                
+                if line in _SECTION_HEADERS:
+                    self._section = _SECTION_HEADERS[line]
+                elif self._section == 'sandbox':
+                    sandbox_lines.append(line)
+                elif self._section == 'submission':
+                    submission_lines.append(line)
+                elif self._section == 'activities':
+                    if not self._activities_header_read:
+                        self._activities_header_read = True
+                        continue
+                    
+                    row = line.split(';')
+                    
+                    if len(row) > 1:
+                        if row[2] not in activity_builders:
+                            activity_builders[row[2]] = _ActivityColumnsBuilder(row[2])
+                            
+                        activity_builders[row[2]].add_row(row)
+                        
+            sandbox_logs = _parse_sandbox_chunk(sandbox_lines, self.fields, self._order_depths)
+            
+        self.data.append_sandbox_logs(sandbox_logs)
+        self.data.append_submission_logs(submission_lines)
+        self.data.append_activities({product: builder.build() for product, builder in activity_builders.items()})
+        return len(sandbox_logs[0]) > 0 or len(activity_builders) > 0
@@ -1,14 +1,25 @@
 import json
+import time
 from datamodel import Order, ProsperityEncoder, Symbol, Trade, TradingState
 from typing import Any
 
 class Logger:
-    def __init__(self) -> None:
+    def __init__(self, delta_order_depths: bool = False, snapshot_interval: int = 100) -> None:
         '''
         Constructor
+        delta_order_depths: only log the order depth levels that changed since
+        the previous tick, instead of every level of every symbol
+        snapshot_interval: with delta_order_depths, log the full order depths
+        once every this many ticks, so the log can be decoded from there
         effects: Creates Logger object with empty logs
         '''
         self.logs = ""
+        self.delta_order_depths = delta_order_depths
+        self.snapshot_interval = snapshot_interval
+        self.ticks_since_snapshot = 0
+        self.last_order_depths: dict[Symbol, list[dict[int, int]]] = {}
+        self.quoted: dict[Any, str] = {}
+        self.encoder = ProsperityEncoder(separators=(",", ":"))
 
     # values: dict[str, Any]
     def flush(self, state: TradingState, orders: dict[Symbol, list[Order]], 
@@ -16,16 +27,16 @@ class Logger:
         '''
         state: the current Trading State
         orders: dict with security symbol as key and order-list as key-value
-        effects: Formats the orders dict using json and helper functions 
-        cls: changes encoder to return dict
-        sort_keys: output of orders will be sorted by keys
+        effects: Writes the logs, orders, state and values straight to JSON
+        with the serialize helper functions, in the same key order as the
+        compressed state and orders sorted by key. The time taken to build the
+        line, which does not include printing it, is added as flush_ns so that
+        the cost of logging can be graphed
         '''
-        print(json.dumps({
-            "state": self.compress_state(state),
-            "orders": self.compress_orders(orders),
-            "logs": self.logs,
-            "values": values,
-        }, cls=ProsperityEncoder, separators=(",", ":"), sort_keys=True))
+        start = time.perf_counter_ns()
+        line = (f'{{"logs":{json.dumps(self.logs)},"orders":{self.serialize_orders(orders)},'
+                f'"state":{self.serialize_state(state)},"values":{self.serialize_values(values)}')
+        print(f'{line},"flush_ns":{time.perf_counter_ns() - start}}}')
 
         self.logs = ""
         
@@ -51,7 +62,9 @@ class Logger:
         and sell orders
 
         state: the current trading state
-        effects: Creates listings list and order_depths dict
+        effects: Creates listings list and order_depths dict. The order depths
+        are compressed as the next flush would log them, but the previous
+        tick's order depths are left for flush to advance
         returns: dictionary with keys and values, uses compress trades to format
         market_trades and own_trades
         '''
@@ -62,20 +75,88 @@ class Logger:
             denomination = listing["denomination"] if isinstance(listing, dict) else listing.denomination
             listings.append([symbol, product, denomination])
 
-        order_depths = {}
-        for symbol, order_depth in state.order_depths.items():
-            order_depths[symbol] = [order_depth.buy_orders, order_depth.sell_orders]
+        order_depths_key, order_depths = self.compress_order_depths(state, advance=False)
 
         return {
             "t": state.timestamp,
             "l": listings,
-            "od": order_depths,
+            order_depths_key: order_depths,
             "ot": self.compress_trades(state.own_trades),
             "mt": self.compress_trades(state.market_trades),
             "p": state.position,
             "o": state.observations,
         }
 
+    def compress_order_depths(self, state: TradingState,
+                              advance: bool = True) -> tuple[str, dict[Symbol, Any]]:
+        '''
+        state: the current trading state
+        advance: whether this tick is being logged. If so, the order depths
+        are remembered as the previous tick's and the snapshot count moves on
+
+        effects: Creates the order_depths dict with a [buy_orders, sell_orders]
+        list for each symbol. With delta_order_depths, only the changes since
+        the previous tick are kept, except once every snapshot_interval ticks
+
+        returns: the key to store the order depths under, "od" for a snapshot
+        or "odd" for changes, and the order depths or changes
+        '''
+        order_depths = {}
+        for symbol, order_depth in state.order_depths.items():
+            order_depths[symbol] = [order_depth.buy_orders, order_depth.sell_orders]
+
+        if not self.delta_order_depths:
+            return "od", order_depths
+
+        if self.ticks_since_snapshot > 0:
+            compressed = ("odd", self.compress_order_depth_changes(order_depths))
+        else:
+            compressed = ("od", order_depths)
+
+        if not advance:
+            return compressed
+
+        self.ticks_since_snapshot = (self.ticks_since_snapshot + 1) % self.snapshot_interval
+        self.last_order_depths = {symbol: [dict(buy_orders), dict(sell_orders)]
+                                  for symbol, (buy_orders, sell_orders) in order_depths.items()}
+
+        return compressed
+
+    def compress_order_depth_changes(self, order_depths: dict[Symbol, list[dict[int, int]]]) -> dict[Symbol, Any]:
+        '''
+        order_depths: dict with symbol as key and [buy_orders, sell_orders]
+        as key-value, as logged in a snapshot
+
+        effects: Compares the order depths against those of the previous tick.
+        For each symbol with any change, lists the new volume of each price
+        level that changed, with a volume of 0 for levels that were removed.
+        Symbols that were removed are mapped to None, and new symbols are
+        always listed, even with an empty book, so they are decoded
+
+        returns: dict with symbol as key and [buy_changes, sell_changes] as
+        key-value, containing only the symbols that changed
+        '''
+        changes: dict[Symbol, Any] = {}
+        for symbol, levels in order_depths.items():
+            previous = self.last_order_depths.get(symbol, [{}, {}])
+            sides = []
+            for current_side, previous_side in zip(levels, previous):
+                side = {price: volume for price, volume in current_side.items()
+                        if previous_side.get(price) != volume}
+                for price in previous_side:
+                    if price not in current_side:
+                        side[price] = 0
+                sides.append(side)
+
+            if sides[0] or sides[1] or symbol not in self.last_order_depths:
+                changes[symbol] = sides
+
+        for symbol in self.last_order_depths:
+            if symbol not in order_depths:
+                changes[symbol] = None
+
+        return changes
+
     def compress_trades(self, trades: dict[Symbol, list[Trade]]) -> list[list[Any]]:
         '''
         trades: dict[Symbol, list[Trade]]
@@ -117,6 +198,95 @@ class Logger:
 
         return compressed
 
+    def quote(self, value: Any) -> str:
+        '''
+        value: a symbol, product or trader name, or None
+
+        effects: Encodes the value as JSON. The same few names are logged
+        every tick, so each one is only encoded once
+
+        returns: JSON string of the value
+        '''
+        quoted = self.quoted.get(value)
+        if quoted is None:
+            quoted = self.quoted[value] = json.dumps(value)
+        return quoted
+
+    def serialize_state(self, state: TradingState) -> str:
+        '''
+        state: the current trading state
+
+        effects: Writes the same data as compress_state straight to JSON,
+        with the keys in sorted order
+
+        returns: JSON string of the compressed state
+        '''
+        quote = self.quote
+        listings = []
+        for listing in state.listings.values():
+            if isinstance(listing, dict):
+                listings.append(f'[{quote(listing["symbol"])},{quote(listing["product"])},'
+                                f'{quote(listing["denomination"])}]')
+            else:
+                listings.append(f"[{quote(listing.symbol)},{quote(listing.product)},{quote(listing.denomination)}]")
+
+        order_depths_key, order_depths = self.compress_order_depths(state)
+        position = ",".join([f"{quote(product)}:{amount}" for product, amount in state.position.items()])
+
+        return (f'{{"l":[{",".join(listings)}],"mt":{self.serialize_trades(state.market_trades)},'
+                f'"o":{self.serialize_values(state.observations)},'
+                f'"{order_depths_key}":{self.serialize_order_depths(order_depths)},'
+                f'"ot":{self.serialize_trades(state.own_trades)},"p":{{{position}}},"t":{state.timestamp}}}')
+
+    def serialize_order_depths(self, order_depths: dict[Symbol, Any]) -> str:
+        '''
+        order_depths: order depths or changes from compress_order_depths
+
+        returns: JSON string of the order depths
+        '''
+        symbols = []
+        for symbol, sides in order_depths.items():
+            if sides is None:
+                symbols.append(f"{self.quote(symbol)}:null")
+            else:
+                buy_orders = ",".join([f'"{price}":{volume}' for price, volume in sides[0].items()])
+                sell_orders = ",".join([f'"{price}":{volume}' for price, volume in sides[1].items()])
+                symbols.append(f"{self.quote(symbol)}:[{{{buy_orders}}},{{{sell_orders}}}]")
+        return "{" + ",".join(symbols) + "}"
+
+    def serialize_trades(self, trades: dict[Symbol, list[Trade]]) -> str:
+        '''
+        trades: dict[Symbol, list[Trade]]
+
+        returns: JSON string of the same list as compress_trades
+        '''
+        quote = self.quote
+        return "[" + ",".join([f"[{quote(trade.symbol)},{quote(trade.buyer)},{quote(trade.seller)},"
+                               f"{trade.price},{trade.quantity},{trade.timestamp}]"
+                               for arr in trades.values() for trade in arr]) + "]"
+
+    def serialize_orders(self, orders: dict[Symbol, list[Order]]) -> str:
+        '''
+        orders: dict[Symbol, list[Order]]
+
+        returns: JSON string of the same list as compress_orders
+        '''
+        quote = self.quote
+        return "[" + ",".join([f"[{quote(order.symbol)},{order.price},{order.quantity}]"
+                               for arr in orders.values() for order in arr]) + "]"
+
+    def serialize_values(self, values: dict[str, Any]) -> str:
+        '''
+        values: dict of values of any type, such as the user values or the
+        observations
+
+        returns: JSON string of the values, using the generic encoder only
+        when there are any
+        '''
+        if not values:
+            return "{}"
+        return self.encoder.encode(values)
+
 logger = Logger()
 class Trader:
     def run(self, state: TradingState) -> dict[Symbol, list[Order]]:
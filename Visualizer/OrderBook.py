@@ -0,0 +1,163 @@
+"""
+OrderBook.py
+
+Rebuilds the order book of each product at every timestamp as a dense matrix, with one row per trading state and one
+column per price level, so that graphs can analyse the book with array operations instead of looping over the order
+depths of each state.
+"""
+
+from datamodel import *
+from array import array
+from typing import Dict, Sequence, Tuple
+import numpy as np
+
+"""
+The order book of one product at every trading state. volumes has one row per trading state and one column per price
+in prices, which holds every price that was ever quoted in ascending order. Bid volumes are positive and ask volumes
+are negative, as in OrderDepth, and price levels that are not quoted have a volume of 0. The best bid and ask and their
+volumes are NaN and 0 in states where that side of the book is empty.
+"""
+class OrderBookMatrix:
+    def __init__(self, product: Product, timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        self.product = product
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+
+        if len(prices) == 0:
+            self.best_bid = self.best_ask = np.full(len(volumes), np.nan)
+            self.best_bid_volume = self.best_ask_volume = np.zeros(len(volumes), dtype=volumes.dtype)
+        else:
+            rows = np.arange(len(volumes))
+            columns = np.arange(len(prices))
+
+            # Prices are sorted, so the best bid is the highest column with a bid and the best ask is the lowest
+            # column with an ask
+            bid_columns = np.where(volumes > 0, columns, -1).max(axis=1)
+            ask_columns = np.where(volumes < 0, columns, len(prices)).min(axis=1)
+            has_bid = bid_columns >= 0
+            has_ask = ask_columns < len(prices)
+            bid_columns = np.where(has_bid, bid_columns, 0)
+            ask_columns = np.where(has_ask, ask_columns, 0)
+
+            self.best_bid = np.where(has_bid, prices[bid_columns], np.nan)
+            self.best_ask = np.where(has_ask, prices[ask_columns], np.nan)
+            self.best_bid_volume = np.where(has_bid, volumes[rows, bid_columns], 0)
+            self.best_ask_volume = np.where(has_ask, -volumes[rows, ask_columns], 0)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: slice) -> 'OrderBookMatrix':
+        """
+        Return the order book in the given slice of trading states. Every price column is kept.
+        """
+        return OrderBookMatrix(self.product, self.timestamps[index], self.prices, self.volumes[index])
+
+    @property
+    def spread(self) -> np.ndarray:
+        """
+        The difference between the best ask and the best bid in each state
+        """
+        return self.best_ask - self.best_bid
+
+    @property
+    def mid_price(self) -> np.ndarray:
+        """
+        The average of the best bid and the best ask in each state
+        """
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def microprice(self) -> np.ndarray:
+        """
+        The mid price weighted by the volume on the opposite side of the book, which leans towards the side that is
+        more likely to be traded through next
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.best_bid * self.best_ask_volume + self.best_ask * self.best_bid_volume) \
+                / (self.best_bid_volume + self.best_ask_volume)
+
+    def imbalance(self, levels: int | None = 1) -> np.ndarray:
+        """
+        The bid volume minus the ask volume, divided by their total, in the given number of levels closest to the
+        spread on each side (every level if None). Ranges from -1 when only asks are quoted to 1 when only bids are,
+        and is NaN when the book is empty.
+        """
+        bids = self.volumes > 0
+        asks = self.volumes < 0
+
+        if levels is not None:
+            # Count the levels on each side outwards from the spread, and keep the closest ones
+            bids &= np.cumsum(bids[:, ::-1], axis=1)[:, ::-1] <= levels
+            asks &= np.cumsum(asks, axis=1) <= levels
+
+        bid_volume = np.where(bids, self.volumes, 0).sum(axis=1)
+        ask_volume = -np.where(asks, self.volumes, 0).sum(axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (bid_volume - ask_volume) / (bid_volume + ask_volume)
+
+"""
+The price levels of one product's order books, collected in compact typed buffers during the pass over the states
+"""
+class _BookEntries:
+    def __init__(self) -> None:
+        self.rows = array('q')
+        self.prices = array('q')
+        self.volumes = array('q')
+
+        # States whose order depth is the same object as an earlier state's, and the row of that earlier state
+        self.copied_rows = array('q')
+        self.copied_from = array('q')
+
+def build_order_books(trading_states: Sequence[TradingState],
+    timestamps: np.ndarray) -> Dict[Product, OrderBookMatrix]:
+    """
+    Build the order book matrix of every product in the order depths, in a single pass over the trading states.
+    Logs written with delta_order_depths share the OrderDepth of books that did not change, so those rows are copied
+    from the earlier row in one operation instead of being collected again.
+    """
+    entries: Dict[Product, _BookEntries] = {}
+    previous: Dict[Product, Tuple[OrderDepth, int]] = {}
+
+    for row, state in enumerate(trading_states):
+        for product, order_depth in state.order_depths.items():
+            book = entries.get(product)
+
+            if book is None:
+                book = entries[product] = _BookEntries()
+
+            last = previous.get(product)
+
+            if last is not None and last[0] is order_depth:
+                book.copied_rows.append(row)
+                book.copied_from.append(last[1])
+                continue
+
+            previous[product] = (order_depth, row)
+
+            for price, volume in order_depth.buy_orders.items():
+                book.rows.append(row)
+                book.prices.append(price)
+                book.volumes.append(volume)
+
+            for price, volume in order_depth.sell_orders.items():
+                book.rows.append(row)
+                book.prices.append(price)
+                book.volumes.append(volume)
+
+    return {product: _build_matrix(product, timestamps, book) for product, book in entries.items()}
+
+def _build_matrix(product: Product, timestamps: np.ndarray, book: _BookEntries) -> OrderBookMatrix:
+    """
+    Scatter the collected price levels of one product into its matrix
+    """
+    prices, columns = np.unique(np.frombuffer(book.prices, dtype=np.int64), return_inverse=True)
+    volumes = np.zeros((len(timestamps), len(prices)), dtype=np.int32)
+    volumes[np.frombuffer(book.rows, dtype=np.int64), columns] = np.frombuffer(book.volumes, dtype=np.int64)
+
+    # Each copied row refers to a row that was collected, so one assignment fills them all
+    copied_from = np.frombuffer(book.copied_from, dtype=np.int64)
+    volumes[np.frombuffer(book.copied_rows, dtype=np.int64)] = volumes[copied_from]
+    return OrderBookMatrix(product, timestamps, prices, volumes)
@@ -1,10 +1,17 @@
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly import subplots as sp
 from LogParser import LogData
+from GraphFuncTypes import extends_figure, reads_files, uses_fields
+from Downsampling import extend_trace, sample_rows, scatter
+from DerivedSeries import mid_price, profit_and_loss, rolling_mean, rolling_std
+from Replay import DEFAULT_BUDGET_MS, REPLAY_FIELDS, replay_alone
+from Comparison import LogComparison
 from datamodel import *
 from typing import Callable
 
+@uses_fields("activities")
 def summary(data: LogData) -> go.Figure:
     """
     Displays the total PnL and the last timestamp using plotly's indicator graph
@@ -13,56 +20,129 @@ def summary(data: LogData) -> go.Figure:
         specs=[[{"type": "indicator"}, {"type": "indicator"}]])
     total_pnl: float = 0
  
-    # Track pnl for each product
+    # Track pnl for each product. A log that is still being written may not have any activities or states yet.
     for product in data.activities:
-        activity_log = data.activities[product]
-        total_pnl += activity_log[-1].profit_and_loss
+        if len(data.activities[product]) > 0:
+            total_pnl += float(data.activities[product].profit_and_loss[-1])
     
+    last_timestamp = int(data.timestamps[-1]) if len(data.timestamps) > 0 else None
     fig.add_trace(go.Indicator(value=total_pnl), row=1, col=1)
-    fig.add_trace(go.Indicator(value=data.trading_states[-1].timestamp,  number={"valueformat": "d"}), row=1, col=2)
+    fig.add_trace(go.Indicator(value=last_timestamp,  number={"valueformat": "d"}), row=1, col=2)
     fig.update_layout(title="Log Summary")
     return fig
 
+def _common_length(data: LogData) -> int:
+    """
+    The number of activity rows every product has. While a log is still being written,
+    some products may already have a row for the latest timestamp while others do not.
+    """
+    return min((len(activity_log) for activity_log in data.activities.values()), default=0)
+
+def _last_x(fig: go.Figure) -> float:
+    """
+    The last timestamp drawn in a figure, which new points are appended after
+    """
+    if len(fig.data) == 0:
+        return -np.inf
+    
+    x = fig.data[0].x
+    return x[-1] if x is not None and len(x) > 0 else -np.inf
+
+def _extend_pnl(fig: go.Figure, data: LogData) -> bool:
+    """
+    Appends new PnL values to a figure made by pnl
+    """
+    if not data.activities or len(fig.data) != len(data.activities) + 1:
+        return False
+    
+    length = _common_length(data)
+    timestamps = data.activities[list(data.activities.keys())[0]].timestamp[:length]
+    start = int(np.searchsorted(timestamps, _last_x(fig), 'right'))
+    pnls = np.vstack([data.activities[product].profit_and_loss[start:length] for product in data.activities])
+    
+    for trace, pnl in zip(fig.data, list(pnls) + [pnls.sum(axis=0)]):
+        if not extend_trace(trace, timestamps[start:], pnl):
+            return False
+        
+    return True
+
+@uses_fields("activities")
+@extends_figure(_extend_pnl)
 def pnl(data: LogData) -> go.Figure:
     """
     Graphs the PnL for each product, as well as the total PnL
     """
     fig = go.Figure()
-    timestamps = [activity_data.timestamp for activity_data in data.activities[list(data.activities.keys())[0]]]
-    total_pnl: List[float] = [0] * len(timestamps)
+    fig.update_layout(title="Profit and Loss", xaxis_title="Timestamp", yaxis_title="PnL")
     
-    for product in data.activities:
-        activity_log = data.activities[product]
-        pnl = [activity_data.profit_and_loss for activity_data in activity_log]
-        total_pnl = [total_pnl[i] + pnl[i] for i in range(len(pnl))]
-        fig.add_trace(go.Scatter(x=timestamps, y=pnl, name=product))
+    # In follow mode, the activities log is only written once the run is over
+    if not data.activities:
+        return fig
+    
+    length = _common_length(data)
+    timestamps = data.activities[list(data.activities.keys())[0]].timestamp[:length]
+    
+    # Stack the PnL of every product, so the total is a single reduction
+    pnls = np.vstack([data.series.get(product, profit_and_loss)[:length] for product in data.activities])
+    
+    for product, pnl in zip(data.activities, pnls):
+        fig.add_trace(scatter(x=timestamps, y=pnl, name=product))
         
-    fig.add_trace(go.Scatter(x=timestamps, y=total_pnl, name="Total PnL"))
-    fig.update_layout(title="Profit and Loss", xaxis_title="Timestamp", yaxis_title="PnL")
+    fig.add_trace(scatter(x=timestamps, y=pnls.sum(axis=0), name="Total PnL"))
     return fig
 
+def _extend_positions(fig: go.Figure, data: LogData) -> bool:
+    """
+    Appends new positions to a figure made by positions
+    """
+    products: List[Product] = list(data.activities.keys())
+    
+    if len(fig.data) != len(products):
+        return False
+    
+    states = slice(int(np.searchsorted(data.timestamps, _last_x(fig), 'right')), None)
+    positions = data.position_matrix(products, states)
+    
+    for column, trace in enumerate(fig.data):
+        if not extend_trace(trace, data.timestamps[states], positions[:, column]):
+            return False
+        
+    return True
+
+@uses_fields("activities", "position")
+@extends_figure(_extend_positions)
 def positions(data: LogData) -> go.Figure:
     """
     Displays the positions of each product
     """
     fig = go.Figure()
-    timestamps = [trading_state.timestamp for trading_state in data.trading_states]
     products: List[Product] = list(data.activities.keys())
-    positions: Dict[Product, List[int]] = {product: [] for product in products}
-    
-    for trading_state in data.trading_states:
-        for product in products:
-            if product in trading_state.position:
-                positions[product].append(trading_state.position[product])
-            else:
-                positions[product].append(0)
+    positions = data.position_matrix(products)
     
-    for product in products:
-        fig.add_trace(go.Scatter(x=timestamps, y=positions[product], name=product))
+    for column, product in enumerate(products):
+        fig.add_trace(scatter(x=data.timestamps, y=positions[:, column], name=product))
         
     fig.update_layout(title="Positions", xaxis_title="Timestamp", yaxis_title="Position")
     return fig
     
+def _extend_mid_prices(fig: go.Figure, data: LogData) -> bool:
+    """
+    Appends new mid prices to a figure made by mid_prices
+    """
+    if [trace.name for trace in fig.data] != list(data.activities.keys()):
+        return False
+    
+    for trace in fig.data:
+        activity_log = data.activities[trace.name]
+        x = trace.x
+        start = int(np.searchsorted(activity_log.timestamp, x[-1] if len(x) > 0 else -np.inf, 'right'))
+        if not extend_trace(trace, activity_log.timestamp[start:], activity_log.mid_price[start:]):
+            return False
+        
+    return True
+
+@uses_fields("activities")
+@extends_figure(_extend_mid_prices)
 def mid_prices(data: LogData) -> go.Figure:
     """
     Displays the mid price for each product
@@ -70,63 +150,204 @@ def mid_prices(data: LogData) -> go.Figure:
     fig = go.Figure()
     
     for product in data.activities:
-        activity_log = data.activities[product]
-        timestamps = [activity_data.timestamp for activity_data in activity_log]
-        mid_prices = [activity_data.mid_price for activity_data in activity_log]
-        fig.add_trace(go.Scatter(x=timestamps, y=mid_prices, name=product))
+        fig.add_trace(scatter(x=data.activities[product].timestamp, y=data.series.get(product, mid_price),
+            name=product))
         
     fig.update_layout(title="Mid Prices", xaxis_title="Timestamp", yaxis_title="Price")
     return fig
 
+@uses_fields("activities")
 def pnl_mid_price_product(product: Product, data: LogData) -> go.Figure:
     """
     Displays the PnL and mid price for a given product
     """
-    activity_log = data.activities[product]
-    timestamps = [activity_data.timestamp for activity_data in activity_log]
-    mid_prices = [activity_data.mid_price for activity_data in activity_log]
-    pnl_values = [activity_data.profit_and_loss for activity_data in activity_log]
+    timestamps = data.activities[product].timestamp
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=timestamps, y=mid_prices, name=product))
-    fig.add_trace(go.Scatter(x=timestamps, y=pnl_values, name=product + " PnL"))
+    fig.add_trace(scatter(x=timestamps, y=data.series.get(product, mid_price), name=product))
+    fig.add_trace(scatter(x=timestamps, y=data.series.get(product, profit_and_loss), name=product + " PnL"))
     fig.update_layout(title="Mid Price and PnL for " + product, xaxis_title="Timestamp", yaxis_title="Price")
     return fig
 
+@uses_fields("activities")
+def bollinger_bands(product: Product, window: int, data: LogData) -> go.Figure:
+    """
+    Displays the mid price of a product with its rolling mean over the given number of timestamps, and bands two
+    standard deviations above and below the mean
+    """
+    timestamps = data.activities[product].timestamp
+    mean = data.series.get(product, rolling_mean, window=window)
+    std = data.series.get(product, rolling_std, window=window)
+    
+    fig = go.Figure()
+    fig.add_trace(scatter(x=timestamps, y=data.series.get(product, mid_price), name=product))
+    fig.add_trace(scatter(x=timestamps, y=mean, name="Mean"))
+    fig.add_trace(scatter(x=timestamps, y=mean + 2 * std, name="Upper Band", line={"dash": "dot"}))
+    fig.add_trace(scatter(x=timestamps, y=mean - 2 * std, name="Lower Band", line={"dash": "dot"}))
+    fig.update_layout(title="Bollinger Bands for " + product, xaxis_title="Timestamp", yaxis_title="Price")
+    return fig
+
+@uses_fields("values")
 def logged_values(values: List[str], data: LogData) -> go.Figure:
     """
-    Plots desired values from log file
+    Plots desired values from log file, at the timestamps each value was logged at
     """
     fig = go.Figure()
-    timestamps = [activity_data.timestamp for activity_data in data.activities[list(data.activities.keys())[0]]]
     
     for value in values:
-        logged_values = [data.values[i][value] for i in range(len(data.values))]
-        fig.add_trace(go.Scatter(x=timestamps, y=logged_values, name=value))
+        column = data.value_columns.get(value)
+        
+        if column is not None:
+            fig.add_trace(scatter(x=data.timestamps[column.present], y=column.values[column.present], name=value))
     
     fig.update_layout(title="Logged Values", xaxis_title="Timestamp", yaxis_title="Value")
     return fig
 
+@uses_fields("flush_times")
+def logger_overhead(data: LogData) -> go.Figure:
+    """
+    Displays the time the logger took to write each timestamp, which is part of each iteration's time budget.
+    Timestamps written by a logger that does not measure it are left out.
+    """
+    fig = go.Figure()
+    flush_times = np.array([np.nan if flush_time is None else flush_time for flush_time in data.flush_times],
+        dtype=np.float64)
+    
+    fig.add_trace(scatter(x=data.timestamps, y=flush_times / 1000, name="Flush Time"))
+    fig.update_layout(title="Logger Overhead", xaxis_title="Timestamp", yaxis_title="Flush Time (µs)")
+    return fig
+
+@uses_fields(*REPLAY_FIELDS)
+@reads_files("trader_file")
+def replay_latency(trader_file: str, data: LogData) -> go.Figure:
+    """
+    Replays the trading states of the log through the trading algorithm in a Python file, and displays how long each
+    call to Trader.run took and the distribution of those times, marking the median, the 99th percentile and the
+    time budget. The replay runs without the other graphs, in its own process when they are generated in threads.
+    The figure is generated again when the algorithm's file changes, but not when only a module it imports does.
+    """
+    result = replay_alone(trader_file, data)
+    latency_ms = result.latency_ns / 1e6
+    percentiles = result.percentiles((50, 99))
+    
+    fig = sp.make_subplots(rows=1, cols=2, subplot_titles=("Latency per Timestamp", "Latency Distribution"))
+    fig.add_trace(scatter(x=result.timestamps, y=latency_ms, name="Latency"), row=1, col=1)
+    fig.add_trace(go.Histogram(x=latency_ms, name="Timestamps"), row=1, col=2)
+    
+    for label, latency in (("p50", percentiles[50]), ("p99", percentiles[99]), ("Budget", DEFAULT_BUDGET_MS)):
+        fig.add_vline(x=latency, line_dash="dash", annotation_text=label, row=1, col=2)
+    
+    fig.update_layout(title="Replay Latency ({} timestamps over {} ms, {} with different orders than logged)".format(
+        len(result.over_budget()), DEFAULT_BUDGET_MS, len(result.order_diffs)))
+    fig.update_xaxes(title_text="Timestamp", row=1, col=1)
+    fig.update_yaxes(title_text="Latency (ms)", row=1, col=1)
+    fig.update_xaxes(title_text="Latency (ms)", row=1, col=2)
+    fig.update_yaxes(title_text="Timestamps", row=1, col=2)
+    return fig
+
+@uses_fields("order_depths")
+def order_book_heatmap(product: Product, data: LogData) -> go.Figure:
+    """
+    Displays the volume at each price level of a product's order book over time, with bids in blue and asks in red,
+    and the best bid, best ask and microprice drawn over it
+    """
+    book = data.order_books[product]
+    timestamps, volumes = sample_rows(book.timestamps, book.volumes)
+    
+    # Leave price levels that are not quoted blank, rather than drawing them as a volume of 0
+    fig = go.Figure(go.Heatmap(x=timestamps, y=book.prices, z=np.where(volumes == 0, np.nan, volumes).T,
+        colorscale="RdBu", zmid=0, colorbar={"title": "Volume"}, name="Volume"))
+    fig.add_trace(scatter(x=book.timestamps, y=book.best_bid, name="Best Bid", line={"color": "navy"}))
+    fig.add_trace(scatter(x=book.timestamps, y=book.best_ask, name="Best Ask", line={"color": "darkred"}))
+    fig.add_trace(scatter(x=book.timestamps, y=book.microprice, name="Microprice", line={"color": "black"}))
+    fig.update_layout(title="Order Book for " + product, xaxis_title="Timestamp", yaxis_title="Price")
+    return fig
+
+@uses_fields("market_trades")
 def trades_histogram(product: Product, base_price_func:
     Callable[[Product, LogData, Time], int] | int, data: LogData) -> go.Figure:
     """
     Displays a histogram of the number of trades occurring at each price level
     above and below the base price, found using function passed as an argument.
+    Only the market trades are declared as used, so if the base price function reads other
+    fields, declare them with uses_fields on the graph function added to user_graphs.
     """
     fig = go.Figure()
+    trades = data.trade_tape.of(product, own=False)
     
-    diffs: List[int] = []
-
-    for state in data.trading_states:
-        if isinstance(base_price_func, int):
-            base_price = base_price_func
-        else:
-            base_price = base_price_func(product, data, state.timestamp)
+    if isinstance(base_price_func, int):
+        base_prices = np.full(len(trades), base_price_func)
+    else:
+        # Only call the base price function once for each state that had trades
+        ticks, trade_ticks = np.unique(trades.tick, return_inverse=True)
+        base_prices = np.array([base_price_func(product, data, int(data.timestamps[tick])) for tick in ticks])
+        base_prices = base_prices[trade_ticks] if len(ticks) > 0 else np.zeros(0)
         
-        if product in state.market_trades:
-            for trade in state.market_trades[product]:
-                diffs.append(trade.price - base_price)
-                
+    diffs = trades.price - base_prices
     fig.add_trace(go.Histogram(x=diffs, histnorm='probability'))
     fig.update_layout(title="Volume Histogram for " + product, xaxis_title="Price", yaxis_title="Probability")   
     return fig
+
+def _run_colors(comparison: LogComparison) -> List[str]:
+    """
+    The color of each run, so a run has the same color in every graph and subplot
+    """
+    palette = px.colors.qualitative.Plotly
+    return [palette[run % len(palette)] for run in range(len(comparison.names))]
+
+def summary_comparison(comparison: LogComparison) -> go.Figure:
+    """
+    Displays the total PnL each run ended with, and its difference from the first run
+    """
+    final_pnl = comparison.last_values(comparison.total_pnl)
+    differences = final_pnl - final_pnl[0] if len(final_pnl) > 0 else final_pnl
+    
+    fig = go.Figure(go.Bar(x=comparison.names, y=final_pnl, marker_color=_run_colors(comparison),
+        customdata=differences, hovertemplate="%{x}<br>Total PnL: %{y:,.0f}<br>Difference: %{customdata:+,.0f}"
+        "<extra></extra>", text=["{:,.0f}".format(pnl) for pnl in final_pnl], textposition="auto"))
+    fig.update_layout(title="Run Summary", xaxis_title="Run", yaxis_title="Total PnL")
+    return fig
+
+def pnl_comparison(comparison: LogComparison) -> go.Figure:
+    """
+    Graphs the total PnL of each run over each other
+    """
+    fig = go.Figure()
+    
+    for name, color, pnl in zip(comparison.names, _run_colors(comparison), comparison.total_pnl):
+        fig.add_trace(scatter(x=comparison.timestamps, y=pnl, name=name, line={"color": color}))
+        
+    fig.update_layout(title="Profit and Loss by Run", xaxis_title="Timestamp", yaxis_title="Total PnL")
+    return fig
+
+def pnl_difference(comparison: LogComparison) -> go.Figure:
+    """
+    Graphs the total PnL of each run minus the total PnL of the first run, which the others are compared to
+    """
+    fig = go.Figure()
+    differences = comparison.difference(comparison.total_pnl)
+    
+    for name, color, difference in list(zip(comparison.names, _run_colors(comparison), differences))[1:]:
+        fig.add_trace(scatter(x=comparison.timestamps, y=difference, name=name, line={"color": color}))
+        
+    fig.update_layout(title="PnL Compared to " + (comparison.names[0] if comparison.names else "the First Run"),
+        xaxis_title="Timestamp", yaxis_title="PnL Difference")
+    return fig
+
+def positions_comparison(comparison: LogComparison) -> go.Figure:
+    """
+    Displays the position of each run in each product, with one subplot per product
+    """
+    products = comparison.products
+    fig = sp.make_subplots(rows=max(len(products), 1), cols=1, shared_xaxes=True, subplot_titles=products)
+    
+    for row, product in enumerate(products):
+        for name, color, position in zip(comparison.names, _run_colors(comparison), comparison.positions[product]):
+            fig.add_trace(scatter(x=comparison.timestamps, y=position, name=name, line={"color": color},
+                legendgroup=name, showlegend=row == 0), row=row + 1, col=1)
+            
+        fig.update_yaxes(title_text="Position", row=row + 1, col=1)
+        
+    fig.update_layout(title="Positions by Run", height=max(450, 250 * len(products)))
+    fig.update_xaxes(title_text="Timestamp", row=max(len(products), 1), col=1)
+    return fig
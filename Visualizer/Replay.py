@@ -0,0 +1,286 @@
+"""
+Replay.py
+
+Runs a trading algorithm's Trader.run over the trading states parsed from a log, to find the timestamps where it is
+slow before it is submitted. Records how long each call took and how many memory blocks it left allocated, and
+compares the orders it returns to the orders logged when the log was recorded.
+
+Usage: python Visualizer/Replay.py <trader file> <log file> [--budget MS] [--trace-memory] [--class NAME]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from LogParser import LogData, STATE_FIELDS, parse
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+import datamodel
+import argparse
+import contextlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+
+# The time each call to Trader.run is allowed to take, unless another budget is given
+DEFAULT_BUDGET_MS = 900
+
+# The fields of the log that a replay reads: the trading states, and the orders to compare against
+REPLAY_FIELDS = STATE_FIELDS | frozenset({'orders'})
+
+# An order as a comparable tuple of its symbol, price and quantity
+order_t = Tuple[str, int, int]
+
+class ReplayResult:
+    """
+    The measurements of one replay, with one entry per trading state in each array. latency_ns is the time each call
+    took, allocated_blocks is the change in the number of memory blocks held by Python's allocator during it, and
+    peak_bytes is the most memory traced during each call if the replay traced memory, or None. errors maps the index
+    of each state where Trader.run raised an exception to the error, and order_diffs maps the index of each state
+    where the orders returned differ from the logged ones to the logged orders that were not returned and the
+    returned orders that were not logged.
+    """
+    def __init__(self, timestamps: np.ndarray, latency_ns: np.ndarray, allocated_blocks: np.ndarray,
+        peak_bytes: np.ndarray | None, errors: Dict[int, str],
+        order_diffs: Dict[int, Tuple[List[order_t], List[order_t]]]):
+
+        self.timestamps = timestamps
+        self.latency_ns = latency_ns
+        self.allocated_blocks = allocated_blocks
+        self.peak_bytes = peak_bytes
+        self.errors = errors
+        self.order_diffs = order_diffs
+
+    def percentiles(self, percents: Iterable[float] = (50, 90, 99, 100)) -> Dict[float, float]:
+        """
+        Return the given percentiles of the latency, in milliseconds
+        """
+        latency_ms = self.latency_ns / 1e6
+        return {percent: float(np.percentile(latency_ms, percent)) if len(latency_ms) > 0 else float("nan")
+            for percent in percents}
+
+    def over_budget(self, budget_ms: float = DEFAULT_BUDGET_MS) -> np.ndarray:
+        """
+        Return the indices of the trading states where Trader.run took longer than the budget
+        """
+        return np.flatnonzero(self.latency_ns > budget_ms * 1e6)
+
+def load_trader(path: str, class_name: str = "Trader") -> Any:
+    """
+    Load a trading algorithm from a Python file and return a new instance of its Trader class. The file is executed
+    again on every call, so edits to it are picked up. Its directory is added to the import path, so it can import
+    the modules next to it, and datamodel is imported from this directory as on the exchange.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+    spec = importlib.util.spec_from_file_location("replayed_trader", path)
+
+    if spec is None or spec.loader is None:
+        raise ImportError("Cannot load a trader from " + path)
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)()
+
+def trader_state(state: Any) -> datamodel.TradingState:
+    """
+    Copy a parsed trading state into the datamodel classes that trading algorithms use. Algorithms often change the
+    order depths they are given, so each call gets its own copy and the parsed data is never changed.
+    """
+    order_depths: Dict[datamodel.Symbol, datamodel.OrderDepth] = {}
+
+    for symbol, order_depth in state.order_depths.items():
+        order_depths[symbol] = datamodel.OrderDepth()
+        order_depths[symbol].buy_orders = dict(order_depth.buy_orders)
+        order_depths[symbol].sell_orders = dict(order_depth.sell_orders)
+
+    return datamodel.TradingState(state.timestamp,
+        {symbol: datamodel.Listing(listing.symbol, listing.product, listing.denomination)
+            for symbol, listing in state.listings.items()},
+        order_depths, _trader_trades(state.own_trades), _trader_trades(state.market_trades), dict(state.position),
+        dict(state.observations))
+
+def _trader_trades(trades: Dict[datamodel.Symbol, List[Any]]) -> Dict[datamodel.Symbol, List[datamodel.Trade]]:
+    return {symbol: [datamodel.Trade(trade.symbol, trade.price, trade.quantity, trade.buyer, trade.seller,
+        trade.timestamp) for trade in symbol_trades] for symbol, symbol_trades in trades.items()}
+
+def _orders(orders: Any) -> List[order_t]:
+    """
+    The orders returned by Trader.run or parsed from the log, as a sorted list of tuples
+    """
+    return sorted((order.symbol, order.price, order.quantity) for symbol_orders in orders.values()
+        for order in symbol_orders)
+
+def _difference(first: List[order_t], second: List[order_t]) -> List[order_t]:
+    """
+    The orders in first that are not in second, counting repeated orders
+    """
+    remaining = list(second)
+    missing: List[order_t] = []
+
+    for order in first:
+        if order in remaining:
+            remaining.remove(order)
+        else:
+            missing.append(order)
+
+    return missing
+
+def replay(trader: Any, data: LogData, trace_memory: bool = False) -> ReplayResult:
+    """
+    Call trader.run with each trading state in the log, in order, and measure each call. Other threads running in
+    this process at the same time slow the calls down, and see the algorithm's output redirected away from stdout
+    while it runs, so use replay_alone if there are any.
+
+    Parameters:
+    trader (Any): The trading algorithm, as returned by load_trader.
+    data (LogData): The parsed log, which must include the fields in REPLAY_FIELDS.
+    trace_memory (bool): Whether to also record the most memory allocated during each call. Tracing memory makes
+    every call several times slower, so the latencies of such a replay are only useful to compare ticks.
+
+    Returns:
+    ReplayResult: The measurements of each call.
+    """
+    return _replay(trader, data.trading_states, data.orders, data.timestamps, trace_memory)
+
+def replay_alone(trader_file: str, data: LogData, class_name: str = "Trader",
+    trace_memory: bool = False) -> ReplayResult:
+    """
+    Load the trading algorithm in a Python file and replay a log through it, like replay, without any other thread
+    running at the same time. If this process runs other threads, such as the visualizer's, the replay runs in a new
+    process instead, which is sent the trading states and orders. For a lazily parsed log, that is only their
+    offsets in the log file.
+    """
+    if threading.active_count() == 1:
+        return replay(load_trader(trader_file, class_name), data, trace_memory)
+
+    # A new process rather than a forked one, which would inherit the locks held by the other threads
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_replay_file, trader_file, class_name, data.trading_states, data.orders, data.timestamps,
+            trace_memory).result()
+
+def _replay_file(trader_file: str, class_name: str, trading_states: Sequence[Any], orders: Sequence[Any],
+    timestamps: np.ndarray, trace_memory: bool) -> ReplayResult:
+    """
+    The entry point of the process started by replay_alone
+    """
+    return _replay(load_trader(trader_file, class_name), trading_states, orders, timestamps, trace_memory)
+
+def _replay(trader: Any, trading_states: Sequence[Any], orders: Sequence[Any], timestamps: np.ndarray,
+    trace_memory: bool) -> ReplayResult:
+
+    count = len(trading_states)
+    latency_ns = np.zeros(count, dtype=np.int64)
+    allocated_blocks = np.zeros(count, dtype=np.int64)
+    peak_bytes = np.zeros(count, dtype=np.int64) if trace_memory else None
+    errors: Dict[int, str] = {}
+    order_diffs: Dict[int, Tuple[List[order_t], List[order_t]]] = {}
+
+    # The algorithm's output is written to the log on the exchange, so it is printed here too, but not kept
+    output = io.StringIO()
+
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        with contextlib.redirect_stdout(output):
+            for index, parsed_state in enumerate(trading_states):
+                state = trader_state(parsed_state)
+                output.seek(0)
+                output.truncate()
+
+                if trace_memory:
+                    tracemalloc.reset_peak()
+
+                blocks = sys.getallocatedblocks()
+                start = time.perf_counter_ns()
+
+                try:
+                    result = trader.run(state)
+                except Exception as e:
+                    result = None
+                    errors[index] = type(e).__name__ + ": " + str(e)
+
+                latency_ns[index] = time.perf_counter_ns() - start
+                allocated_blocks[index] = sys.getallocatedblocks() - blocks
+
+                if peak_bytes is not None:
+                    peak_bytes[index] = tracemalloc.get_traced_memory()[1]
+
+                if result is None:
+                    continue
+
+                # Later versions of the exchange also return conversions and trader data after the orders
+                returned = _orders(result[0] if isinstance(result, tuple) else result)
+                logged = _orders(orders[index])
+
+                if returned != logged:
+                    order_diffs[index] = (_difference(logged, returned), _difference(returned, logged))
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return ReplayResult(timestamps, latency_ns, allocated_blocks, peak_bytes, errors, order_diffs)
+
+def print_report(result: ReplayResult, budget_ms: float = DEFAULT_BUDGET_MS, limit: int = 10) -> None:
+    """
+    Print the latency percentiles, the slowest timestamps, the timestamps over the budget and the order differences
+    of a replay, listing at most limit timestamps of each
+    """
+    count = len(result.latency_ns)
+    print("Replayed " + str(count) + " timestamps")
+    print("Latency: " + ", ".join("p{:g} {:.3f} ms".format(percent, latency)
+        for percent, latency in result.percentiles((50, 90, 99, 99.9, 100)).items()))
+
+    if count > 0:
+        print("Allocated blocks per call: mean {:.1f}, max {}".format(result.allocated_blocks.mean(),
+            result.allocated_blocks.max()))
+
+    if result.peak_bytes is not None and count > 0:
+        print("Peak memory per call: mean {:.1f} KB, max {:.1f} KB".format(result.peak_bytes.mean() / 1e3,
+            result.peak_bytes.max() / 1e3))
+
+    print("\nSlowest timestamps:")
+
+    for index in np.argsort(result.latency_ns)[::-1][:limit]:
+        print("  {:>10} {:>10.3f} ms".format(int(result.timestamps[index]), result.latency_ns[index] / 1e6))
+
+    over = result.over_budget(budget_ms)
+    print("\n" + str(len(over)) + " timestamps took longer than " + "{:g}".format(budget_ms) + " ms")
+
+    for index in over[:limit]:
+        print("  {:>10} {:>10.3f} ms".format(int(result.timestamps[index]), result.latency_ns[index] / 1e6))
+
+    print("\n" + str(len(result.errors)) + " timestamps raised an exception")
+
+    for index, error in list(result.errors.items())[:limit]:
+        print("  {:>10} {}".format(int(result.timestamps[index]), error))
+
+    print("\n" + str(len(result.order_diffs)) + " timestamps returned different orders than were logged")
+
+    for index, (missing, extra) in list(result.order_diffs.items())[:limit]:
+        print("  {:>10} logged but not returned: {}, returned but not logged: {}".format(
+            int(result.timestamps[index]), missing, extra))
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Replay a log through a trading algorithm and time each call")
+    arg_parser.add_argument("trader_file", help="the Python file of the trading algorithm")
+    arg_parser.add_argument("log_file", help="the log file downloaded from the IMC Prosperity website")
+    arg_parser.add_argument("--class", dest="class_name", default="Trader", help="the name of the trader class")
+    arg_parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, metavar="MS",
+        help="report the timestamps that take longer than this (default: " + str(DEFAULT_BUDGET_MS) + " ms)")
+    arg_parser.add_argument("--trace-memory", action="store_true",
+        help="also record the peak memory of each call, which makes every call slower")
+    arg_parser.add_argument("--limit", type=int, default=10, help="the number of timestamps listed in each section")
+    args = arg_parser.parse_args()
+
+    with open(args.log_file) as f:
+        data = parse(f, fields=REPLAY_FIELDS)
+
+    print_report(replay(load_trader(args.trader_file, args.class_name), data, args.trace_memory), args.budget,
+        args.limit)
@@ -0,0 +1,131 @@
+"""
+SearchIndex.py
+
+An inverted index of the words in the user logs and submission logs, which finds the timestamps whose logs contain a
+search query without scanning every log. Searching for several words finds the logs that contain all of them, and each
+word also matches longer words that start with it, so results can be shown while the query is being typed.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Set
+import re
+import numpy as np
+
+# A word in the logs: a run of letters, digits and underscores. Searches ignore case.
+_WORD_PATTERN = re.compile(r"\w+")
+
+# The timestamp that the exchange writes at the start of some submission log lines
+_LINE_TIMESTAMP_PATTERN = re.compile(r"(-?\d+) ")
+
+# A character that sorts after every character in a word
+_LAST_CHARACTER = chr(0x10FFFF)
+
+def words(text: str) -> Set[str]:
+    """
+    Return the distinct words in some text, in lower case
+    """
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+class _Postings:
+    """
+    The index of one set of texts: the numbers of the texts that contain each word
+    """
+    def __init__(self, texts: Iterable[str]):
+        self.count = 0
+        self.postings: Dict[str, np.ndarray] = {}
+
+        # Every word in sorted order, so the words starting with a prefix are a contiguous range
+        self.vocabulary: List[str] = []
+
+        self.extend(texts)
+
+    def extend(self, texts: Iterable[str]) -> None:
+        """
+        Add texts to the index, numbered after the texts already in it
+        """
+        postings: Dict[str, array] = {}
+        count = self.count
+
+        for number, text in enumerate(texts, self.count):
+            count += 1
+
+            for word in words(text):
+                numbers = postings.get(word)
+
+                if numbers is None:
+                    numbers = postings[word] = array('q')
+
+                numbers.append(number)
+
+        self.count = count
+        new_words = False
+
+        for word, numbers in postings.items():
+            new_numbers = np.frombuffer(numbers, dtype=np.int64)
+            existing = self.postings.get(word)
+
+            if existing is None:
+                self.postings[word] = new_numbers
+                new_words = True
+            else:
+                self.postings[word] = np.concatenate((existing, new_numbers))
+
+        if new_words:
+            self.vocabulary = sorted(self.postings)
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Return the numbers of the texts that contain a word starting with each word of the query, in ascending order
+        """
+        query_words = _WORD_PATTERN.findall(query.lower())
+        result: np.ndarray | None = None
+
+        for prefix in query_words:
+            # Every word starting with the prefix sorts between the prefix and the prefix followed by the last character
+            start = bisect_left(self.vocabulary, prefix)
+            end = bisect_left(self.vocabulary, prefix + _LAST_CHARACTER, start)
+            matches = [self.postings[self.vocabulary[index]] for index in range(start, end)]
+
+            found = np.unique(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int64)
+            result = found if result is None else np.intersect1d(result, found, assume_unique=True)
+
+            if len(result) == 0:
+                break
+
+        return result if result is not None else np.zeros(0, dtype=np.int64)
+
+class SearchIndex:
+    """
+    The words in the user logs of each trading state and in each line of the submission logs. Submission log lines
+    that start with a timestamp are matched to it, and others have a timestamp of -1.
+    """
+    def __init__(self, logs: Sequence[str], submission_logs: Sequence[str]):
+        self._logs = _Postings(logs)
+        self._submission_logs = _Postings(submission_logs)
+        self.submission_timestamps = np.array([_line_timestamp(line) for line in submission_logs], dtype=np.int64)
+
+    def extend(self, logs: Sequence[str], submission_logs: Sequence[str]) -> None:
+        """
+        Add the user logs of new trading states and new lines of the submission logs to the index
+        """
+        self._logs.extend(logs)
+        self._submission_logs.extend(submission_logs)
+        self.submission_timestamps = np.concatenate((self.submission_timestamps,
+            np.array([_line_timestamp(line) for line in submission_logs], dtype=np.int64)))
+
+    def search_logs(self, query: str) -> np.ndarray:
+        """
+        Return the indices of the trading states whose user logs match the query, in ascending order
+        """
+        return self._logs.search(query)
+
+    def search_submission_logs(self, query: str) -> np.ndarray:
+        """
+        Return the indices of the submission log lines that match the query, in ascending order
+        """
+        return self._submission_logs.search(query)
+
+def _line_timestamp(line: str) -> int:
+    match = _LINE_TIMESTAMP_PATTERN.match(line)
+    return int(match.group(1)) if match is not None else -1
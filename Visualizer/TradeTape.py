@@ -0,0 +1,125 @@
+"""
+TradeTape.py
+
+Flattens the market and own trades of every trading state into one table with a NumPy array per column, so that
+trade analyses such as volume at each price, fill rates or counterparties are array operations over the whole log
+instead of loops over the trades of each state.
+"""
+
+from datamodel import *
+from array import array
+from typing import Dict, List, Sequence
+import numpy as np
+
+"""
+Every trade in a log, sorted by symbol and then by trading state, so the trades of each symbol are a contiguous range
+given by symbol_slice. Each column has one entry per trade:
+tick: The index of the trading state the trade was reported in, into trading_states and timestamps.
+symbol: The index of the trade's symbol in symbols.
+price, quantity: The price and quantity of the trade. Prices are floats, as some logs write them as "1198.0".
+buyer, seller: The index of the trade's buyer and seller in traders, which holds None for missing names.
+timestamp: The timestamp the trade happened at, which is before the state it was reported in.
+own: True for trades of the algorithm (own_trades), and False for market trades.
+"""
+class TradeTape:
+    def __init__(self, symbols: List[Symbol], traders: List[UserId | None], tick: np.ndarray, symbol: np.ndarray,
+        price: np.ndarray, quantity: np.ndarray, buyer: np.ndarray, seller: np.ndarray, timestamp: np.ndarray,
+        own: np.ndarray):
+
+        self.symbols = symbols
+        self.traders = traders
+        self.tick = tick
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self.timestamp = timestamp
+        self.own = own
+
+        # The trades of symbol i are the rows from offsets[i] up to offsets[i + 1]
+        self.offsets = np.searchsorted(symbol, np.arange(len(symbols) + 1), 'left')
+        self._symbol_ids = {name: index for index, name in enumerate(symbols)}
+
+    def __len__(self) -> int:
+        return len(self.tick)
+
+    def __getitem__(self, index: slice | np.ndarray) -> 'TradeTape':
+        """
+        Return the trades in a slice, or selected by an array of indices or a boolean mask. Selections must keep the
+        trades sorted by symbol, which slices and masks always do.
+        """
+        return TradeTape(self.symbols, self.traders, self.tick[index], self.symbol[index], self.price[index],
+            self.quantity[index], self.buyer[index], self.seller[index], self.timestamp[index], self.own[index])
+
+    def symbol_slice(self, symbol: Symbol) -> slice:
+        """
+        Return the rows of the trades of a symbol, which are empty if it never traded
+        """
+        index = self._symbol_ids.get(symbol)
+
+        if index is None:
+            return slice(0, 0)
+
+        return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+    def of(self, symbol: Symbol, own: bool | None = None) -> 'TradeTape':
+        """
+        Return the trades of a symbol, only the own or only the market trades if own is True or False
+        """
+        trades = self[self.symbol_slice(symbol)]
+        return trades if own is None else trades[trades.own == own]
+
+    def ticks(self, start: int, stop: int) -> 'TradeTape':
+        """
+        Return the trades reported in the trading states from start up to stop, numbered from start
+        """
+        trades = self[(self.tick >= start) & (self.tick < stop)]
+        trades.tick = trades.tick - start
+        return trades
+
+"""
+The columns of the trade tape, collected in compact typed buffers during the pass over the states
+"""
+class _TradeColumns:
+    def __init__(self) -> None:
+        self.tick = array('q')
+        self.symbol = array('q')
+        self.price = array('d')
+        self.quantity = array('q')
+        self.buyer = array('q')
+        self.seller = array('q')
+        self.timestamp = array('q')
+        self.own = array('b')
+
+def build_trade_tape(trading_states: Sequence[TradingState]) -> TradeTape:
+    """
+    Build the trade tape of the market and own trades in a single pass over the trading states
+    """
+    columns = _TradeColumns()
+    symbol_ids: Dict[Symbol, int] = {}
+    trader_ids: Dict[UserId | None, int] = {}
+
+    for row, state in enumerate(trading_states):
+        for own, trades in ((0, state.market_trades), (1, state.own_trades)):
+            for symbol, symbol_trades in trades.items():
+                symbol_id = symbol_ids.setdefault(symbol, len(symbol_ids))
+
+                for trade in symbol_trades:
+                    columns.tick.append(row)
+                    columns.symbol.append(symbol_id)
+                    columns.price.append(trade.price)
+                    columns.quantity.append(trade.quantity)
+                    columns.buyer.append(trader_ids.setdefault(trade.buyer, len(trader_ids)))
+                    columns.seller.append(trader_ids.setdefault(trade.seller, len(trader_ids)))
+                    columns.timestamp.append(trade.timestamp)
+                    columns.own.append(own)
+
+    # A stable sort keeps the trades of each symbol in the order they were reported
+    symbol = np.frombuffer(columns.symbol, dtype=np.int64)
+    order = np.argsort(symbol, kind='stable')
+    return TradeTape(list(symbol_ids), list(trader_ids), np.frombuffer(columns.tick, dtype=np.int64)[order],
+        symbol[order], np.frombuffer(columns.price, dtype=np.float64)[order],
+        np.frombuffer(columns.quantity, dtype=np.int64)[order], np.frombuffer(columns.buyer, dtype=np.int64)[order],
+        np.frombuffer(columns.seller, dtype=np.int64)[order], np.frombuffer(columns.timestamp, dtype=np.int64)[order],
+        np.frombuffer(columns.own, dtype=np.int8)[order].astype(bool))
@@ -1,6 +1,8 @@
 from GraphFuncTypes import *
 from PredefinedGraphs import *
+from DerivedSeries import DerivedSeries, indicator
 from LogParser import LogData
+from Comparison import LogComparison
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -8,3 +10,7 @@ import plotly.express as px
 
 # Add custom or predefined graph functions to this list to have them show up in the visualizer
 user_graphs: graph_func_list_t = []
+
+# Graph functions shown instead of user_graphs when the visualizer is given several log files to compare
+user_comparison_graphs: comparison_graph_func_list_t = [summary_comparison, pnl_comparison, pnl_difference,
+    positions_comparison]
@@ -0,0 +1,74 @@
+"""
+ValueStore.py
+
+Converts the custom values logged at each timestamp into one array per value name, with a mask of the timestamps the
+value was logged at, so graphs can read a value across the whole log without looking it up in every timestamp's dict.
+"""
+
+from array import array
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+"""
+One custom value at every trading state. values is a float array holding NaN where the value was not logged, or an
+object array holding None if any logged value is not a number. present is True at the trading states the value was
+logged at.
+"""
+class ValueColumn:
+    def __init__(self, name: str, values: np.ndarray, present: np.ndarray):
+        self.name = name
+        self.values = values
+        self.present = present
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: slice) -> 'ValueColumn':
+        return ValueColumn(self.name, self.values[index], self.present[index])
+
+"""
+The logged values of one name, collected during the pass over the states
+"""
+class _ValueEntries:
+    def __init__(self) -> None:
+        self.rows = array('q')
+        self.values: List[Any] = []
+        self.numeric = True
+
+def build_value_columns(values: Sequence[Dict[str, Any]]) -> Dict[str, ValueColumn]:
+    """
+    Build a column for every value name logged, in a single pass over the values of each trading state
+    """
+    entries: Dict[str, _ValueEntries] = {}
+
+    for row, state_values in enumerate(values):
+        for name, value in state_values.items():
+            column = entries.get(name)
+
+            if column is None:
+                column = entries[name] = _ValueEntries()
+
+            column.rows.append(row)
+            column.values.append(value)
+            column.numeric = column.numeric and type(value) in (int, float, bool)
+
+    columns: Dict[str, ValueColumn] = {}
+
+    for name, column in entries.items():
+        rows = np.frombuffer(column.rows, dtype=np.int64)
+        present = np.zeros(len(values), dtype=bool)
+        present[rows] = True
+
+        if column.numeric:
+            column_values = np.full(len(values), np.nan)
+            column_values[rows] = column.values
+        else:
+            column_values = np.full(len(values), None, dtype=object)
+
+            # Assign each value on its own, so that values that are lists are not spread over several rows
+            for row, value in zip(column.rows, column.values):
+                column_values[row] = value
+
+        columns[name] = ValueColumn(name, column_values, present)
+
+    return columns
@@ -1,11 +1,19 @@
 import streamlit as st
-from UserGraphs import user_graphs
-from LogParser import parse
+from UserGraphs import user_comparison_graphs, user_graphs
+from LogParser import IncrementalParser, LogData
+from Comparison import LogComparison, load_comparison
+import LogCache
+import Downsampling
+from FigureCache import FigureCache
 import sys
 import os
-from GraphFuncTypes import graph_func_t
-from threading import Thread
-from typing import List, Tuple
+import argparse
+from GraphFuncTypes import figure_extender, graph_name, load_fields
+from GraphRunner import run_graphs
+from Instrumentation import Measurement, Recorder, recording, stage
+from typing import Dict, List, Tuple
+import time
+import numpy as np
 import plotly.graph_objects as go
 
 if __name__ == "__main__":
@@ -13,22 +21,105 @@ if __name__ == "__main__":
     st.title("IMC Prosperity Visualizer")
     
     # Perform some checks before parsing the log file and displaying the graphs
-    if not len(sys.argv) == 2:
-        print("Usage: " + sys.argv[0] + " <log file>")
-        st.error("Usage: " + sys.argv[0] + " <log file>")
+    arg_parser = argparse.ArgumentParser(prog=sys.argv[0])
+    arg_parser.add_argument("log_files", nargs="+", metavar="log_file",
+        help="the log file downloaded from the IMC Prosperity website, or several log files to compare")
+    arg_parser.add_argument("--workers", type=int, default=None,
+        help="number of processes used to parse the log file and generate graphs (default: one per CPU core)")
+    arg_parser.add_argument("--processes", action="store_true",
+        help="generate graphs in a pool of forked worker processes instead of threads. Forking while other threads "
+        "run can deadlock a worker on a lock held by one of them, so also set --graph-timeout")
+    arg_parser.add_argument("--graph-timeout", type=float, default=None, metavar="SECONDS",
+        help="show an error instead of a graph that takes longer than this to generate")
+    arg_parser.add_argument("--lazy", action="store_true",
+        help="only index the sandbox logs, and decode each timestamp when a graph first uses it")
+    arg_parser.add_argument("--follow", action="store_true",
+        help="keep reading the log file as it is written, and update the graphs with the new data")
+    arg_parser.add_argument("--follow-interval", type=float, default=1.0, metavar="SECONDS",
+        help="how often to check the log file for new data in follow mode (default: 1 second)")
+    
+    try:
+        args = arg_parser.parse_args()
+    except SystemExit:
+        st.error(arg_parser.format_usage())
         sys.exit(1)
     
-    if not os.access(sys.argv[1], os.R_OK):
-        print("Error: Cannot read file " + sys.argv[1])
-        st.error("Error: Cannot read file " + sys.argv[1])
-        print("Usage: " + sys.argv[0] + " <log file>")
-        st.error("Usage: " + sys.argv[0] + " <log file>")
+    for log_file in args.log_files:
+        if not os.access(log_file, os.R_OK):
+            print("Error: Cannot read file " + log_file)
+            st.error("Error: Cannot read file " + log_file)
+            print(arg_parser.format_usage())
+            st.error(arg_parser.format_usage())
+            sys.exit(1)
+        
+    # Several log files are compared, using the comparison graphs instead of user_graphs
+    comparing = len(args.log_files) > 1
+    log_file = args.log_files[0]
+    graph_funcs = user_comparison_graphs if comparing else user_graphs
+    
+    if comparing and args.follow:
+        print("Error: Only one log file can be followed")
+        st.error("Error: Only one log file can be followed")
         sys.exit(1)
     
+    @st.cache_resource(show_spinner="Loading log file...")
+    def load_log(path: str, modified_ns: int, size: int, workers: int | None, lazy: bool,
+        fields: Tuple[str, ...] | None) -> Tuple[LogData, List[Measurement]]:
+        """
+        Load the log file through the on-disk cache, and measure each stage of loading it. The modification time and
+        size are only part of the key so that Streamlit reruns skip hashing the file again until it changes.
+        """
+        with recording(Recorder()) as load_recorder:
+            with stage("load log"):
+                data = LogCache.load(path, workers, lazy, fields)
+                
+        return data, load_recorder.measurements
+    
+    @st.cache_resource(show_spinner="Loading log files...")
+    def load_logs(paths: Tuple[str, ...], stats: Tuple[Tuple[int, int], ...],
+        workers: int | None) -> Tuple[LogComparison, List[Measurement]]:
+        """
+        Load the log files to compare in parallel and align them, measuring how long it took. The modification time
+        and size of each file are only part of the key, so that the logs are loaded again when one of them changes.
+        """
+        with recording(Recorder()) as load_recorder:
+            with stage("load and align logs"):
+                comparison = load_comparison(paths, workers)
+                
+        return comparison, load_recorder.measurements
+    
+    # The resources used by each stage of this page, shown in the sidebar
+    recorder = Recorder()
+    
+    # Only parse the fields that the configured graphs read, if they all declare them, and the logs for the search panel
+    fields = load_fields(user_graphs)
+    
     # Read and parse the log file
     try:
-        with open(sys.argv[1], "r") as f:
-            data = parse(f)
+        if comparing:
+            stats = [os.stat(path) for path in args.log_files]
+            data, load_measurements = load_logs(tuple(os.path.abspath(path) for path in args.log_files),
+                tuple((stat.st_mtime_ns, stat.st_size) for stat in stats), args.workers)
+            recorder.extend(load_measurements)
+        elif args.follow:
+            # Keep the parser between reruns, so that only the lines appended since the last poll are parsed
+            follower_key = (os.path.abspath(log_file), fields)
+            
+            if st.session_state.get("follower_key") != follower_key:
+                st.session_state.follower = IncrementalParser(os.path.abspath(log_file), fields)
+                st.session_state.follower_key = follower_key
+                
+            follower: IncrementalParser = st.session_state.follower
+            
+            with recording(recorder), stage("poll log file"):
+                follower.poll()
+                
+            data = follower.data
+        else:
+            stat = os.stat(log_file)
+            data, load_measurements = load_log(os.path.abspath(log_file), stat.st_mtime_ns, stat.st_size,
+                args.workers, args.lazy, tuple(sorted(fields)) if fields is not None else None)
+            recorder.extend(load_measurements)
     except Exception as e:
         print("Error parsing log file:", e)
         print("Ensure that the correct logger was used to generate the log file.")
@@ -36,40 +127,221 @@ if __name__ == "__main__":
         st.error("Ensure that the correct logger was used to generate the log file.")
         sys.exit(1)
     
-    # Generate the graphs, asynchronously
-    graph_tasks: List[Thread] = []
-    graphs: List[Tuple[int, go.Figure | str]] = []
-
-    def gen_graph(graph_func: graph_func_t, index: int) -> None:
-        """ 
-        A simple function that tries to generate a graph, and adds it to the list of graphs,
-        or adds an error message if it fails
-        """   
-        try:
-            graphs.append((index, graph_func(data)))
-        except Exception as e:
-            graphs.append((index, "Error generating graph: " + str(e)))
+    # Display settings. The graphs are generated again from only the data in the selected time range, so the
+    # downsampled traces show more detail the further the user zooms in.
+    st.sidebar.header("Display")
+    points_per_trace = st.sidebar.number_input("Points per trace (0 to draw every point)", min_value=0,
+        value=Downsampling.DEFAULT_POINT_BUDGET, step=500)
     
-    # Add a task for each graph function and start the thread
-    for i, graph_func in enumerate(user_graphs):
-        graph_tasks.append(Thread(target=gen_graph, args=(graph_func,i)))
-        graph_tasks[-1].start()
+    # The budget is passed to each graph rather than set globally, as other sessions may be using a different one
+    point_budget = points_per_trace if points_per_trace > 0 else None
+    
+    # The time range slider is shown here, but created after the search panel so that choosing a match can move it
+    time_range_panel = st.sidebar.container()
+    
+    # Search the user logs and submission logs. Choosing a match zooms the graphs into the timestamps around it.
+    # Compared logs are loaded without their logs, so they cannot be searched.
+    query = ""
+    jump_to: int | None = None
+    
+    if not comparing:
+        st.sidebar.header("Search Logs")
+        query = st.sidebar.text_input("Words to find", key="search_query",
+            help="Finds the timestamps whose logs contain every word. Words also match longer words starting with "
+            "them.")
+    
+    if query:
+        with recording(recorder), stage("search logs"):
+            log_matches = data.search_index.search_logs(query)
+            line_matches = data.search_index.search_submission_logs(query)
+            
+        # Only the first matches are listed, as building a table of every log could take longer than the search
+        shown_matches = 1000
+        st.sidebar.caption(str(len(log_matches)) + " timestamps and " + str(len(line_matches))
+            + " submission log lines match" + (", showing the first " + str(shown_matches)
+            if max(len(log_matches), len(line_matches)) > shown_matches else ""))
+        
+        log_table = st.sidebar.dataframe([{"Timestamp": int(data.timestamps[tick]), "Log": data.logs[tick]}
+            for tick in log_matches[:shown_matches]], hide_index=True, on_select="rerun",
+            selection_mode="single-row", key="search_log_matches")
+        selections = [(log_table, [int(data.timestamps[tick]) for tick in log_matches[:shown_matches]])]
         
-    # Wait for all the graphs to finish generating
-    for task in graph_tasks:
-        task.join()
+        if len(line_matches) > 0:
+            line_timestamps = data.search_index.submission_timestamps[line_matches[:shown_matches]]
+            line_table = st.sidebar.dataframe([{
+                    "Timestamp": int(timestamp) if timestamp >= 0 else None,
+                    "Line": data.submission_logs[line],
+                } for line, timestamp in zip(line_matches[:shown_matches], line_timestamps)],
+                hide_index=True, on_select="rerun", selection_mode="single-row", key="search_line_matches")
+            selections.append((line_table, [int(timestamp) for timestamp in line_timestamps]))
+            
+        for table, table_timestamps in selections:
+            rows = table.selection.rows
+            
+            if rows and table_timestamps[rows[0]] >= 0:
+                jump_to = table_timestamps[rows[0]]
+    
+    # The time range of a log that is still being written keeps changing, so it cannot be zoomed into
+    if not args.follow and len(data.timestamps) > 1:
+        first, last = int(data.timestamps[0]), int(data.timestamps[-1])
+        start, end = st.session_state.get("time_range", (first, last))
         
-    # Sort the graphs by index, so they show up in the desired order
-    graphs.sort(key=lambda x: x[0])
+        # Only jump when a different match is chosen, so the range can still be changed while a match is selected
+        if jump_to is not None and st.session_state.get("search_jump") != (query, jump_to):
+            st.session_state.search_jump = (query, jump_to)
+            
+            # Show a few timestamps either side of the match
+            context = 50
+            index = int(np.searchsorted(data.timestamps, jump_to, 'left'))
+            start = int(data.timestamps[max(index - context, 0)])
+            end = int(data.timestamps[min(index + context, len(data.timestamps) - 1)])
+            
+        # Keep the range inside the log, in case a different log was loaded
+        st.session_state.time_range = (min(max(start, first), last), min(max(end, first), last))
+        start, end = time_range_panel.slider("Time range", first, last, key="time_range")
+        
+        if (start, end) != (first, last):
+            with recording(recorder), stage("select time range"):
+                data = data.window(start, end)
+    
+    # The performance panel is filled in once the graphs are generated
+    performance_panel = st.sidebar.empty()
+    
+    def show_performance(update: int = 0) -> None:
+        """
+        Display the resources used by each stage and graph in the sidebar, with a button to export them as JSON
+        """
+        with performance_panel.container():
+            st.header("Performance")
+            st.caption("Loading the log is only measured when it is first loaded, as it is cached after that.")
+            st.dataframe([{
+                    "Stage": measurement.name,
+                    "Wall (ms)": measurement.wall_seconds * 1000,
+                    "CPU (ms)": measurement.cpu_seconds * 1000 if measurement.cpu_seconds is not None else None,
+                    "Memory (MB)": measurement.memory_bytes / 1e6 if measurement.memory_bytes is not None else None,
+                    "Objects": measurement.objects,
+                } for measurement in recorder.measurements], hide_index=True)
+            st.download_button("Export as JSON", recorder.to_json(), file_name="visualizer_performance.json",
+                mime="application/json", on_click="ignore", key="export_performance_" + str(update))
+    
+    @st.cache_resource
+    def get_figure_cache() -> FigureCache:
+        """
+        The figure cache is kept for the life of the Streamlit server, so figures survive reruns
+        """
+        return FigureCache()
+    
+    figure_cache = get_figure_cache()
     
-    # Split the page into two columns
+    # Split the page into two columns, with a placeholder for each graph in alternating columns
     col1, col2 = st.columns(2)
-
-    # Run each graph function, and display it in alternating columns
-    for i, graph in enumerate(graphs):
-        column = col1 if i % 2 == 0 else col2
+    slots = [(col1 if i % 2 == 0 else col2).empty() for i in range(len(graph_funcs))]
+    
+    figures: Dict[int, go.Figure] = {}
+    
+    def show_graph(index: int, graph: go.Figure | str, update: int = 0) -> None:
+        """
+        Display a graph or error message in its placeholder. Each update of the same graph needs its own key.
+        """
+        if isinstance(graph, str):
+            figures.pop(index, None)
+            slots[index].error(graph)
+        else:
+            figures[index] = graph
+            slots[index].plotly_chart(graph, use_container_width=True,
+                key="graph_" + str(index) + "_" + str(update))
+    
+    # Show the cached graphs straight away, and generate the rest
+    with recording(recorder), stage("look up cached graphs"):
+        cache_keys = [figure_cache.key(data, graph_func, point_budget) for graph_func in graph_funcs]
         
-        if isinstance(graph[1], str):
-            column.error(graph[1])
+    uncached: List[int] = []
+    
+    for i, cache_key in enumerate(cache_keys):
+        cached_fig = figure_cache.get(cache_key)
+        
+        if cached_fig is not None:
+            show_graph(i, cached_fig)
         else:
-            column.plotly_chart(graph[1], use_container_width=True)
+            slots[i].info("Generating graph...")
+            uncached.append(i)
+    
+    # Display each graph as soon as it is generated, rather than waiting for the slowest one
+    results = run_graphs([graph_funcs[i] for i in uncached], data, args.processes, args.workers, args.graph_timeout,
+        point_budget)
+    
+    for task_index, graph, measurement in results:
+        index = uncached[task_index]
+        measurement.name = "graph " + measurement.name
+        recorder.add(measurement)
+        
+        if not isinstance(graph, str):
+            figure_cache.put(cache_keys[index], graph)
+            
+        show_graph(index, graph)
+        
+    show_performance()
+    
+    # In follow mode, keep polling the log file. Graphs that can append the new data to their figures do so, and the
+    # others are generated again.
+    update = 0
+    follow_error = st.sidebar.empty()
+    
+    while args.follow:
+        time.sleep(args.follow_interval)
+        
+        # The performance panel only shows the latest update, so it does not grow for as long as the log is followed
+        update_recorder = Recorder()
+        
+        try:
+            with recording(update_recorder), stage("poll log file"):
+                offset = follower.offset
+                polled = follower.poll()
+                
+                # Once the file stops growing, its last line is complete even if it does not end with a newline
+                if follower.offset == offset:
+                    polled = follower.finish() or polled
+        except Exception as e:
+            # Keep following, as the lines written next may be fine
+            print("Error reading log file:", e)
+            follow_error.warning("Error reading log file: " + str(e))
+            continue
+            
+        follow_error.empty()
+        
+        if not polled:
+            continue
+        
+        update += 1
+        recorder = update_recorder
+        regenerate: List[int] = []
+        
+        # A log file that was replaced or continued after its last line was parsed is parsed again from the start
+        # into new data, which the existing figures cannot be extended with
+        if follower.data is not data:
+            data = follower.data
+            figures.clear()
+        
+        for i, graph_func in enumerate(graph_funcs):
+            extender = figure_extender(graph_func)
+            
+            if i in figures and extender is not None:
+                with recording(recorder), stage("extend graph " + graph_name(graph_func)):
+                    with Downsampling.using_point_budget(point_budget):
+                        extended = extender(figures[i], data)
+                    
+                if extended:
+                    show_graph(i, figures[i], update)
+                    continue
+                
+            regenerate.append(i)
+                
+        results = run_graphs([graph_funcs[i] for i in regenerate], data, args.processes, args.workers,
+            args.graph_timeout, point_budget)
+        
+        for task_index, graph, measurement in results:
+            measurement.name = "graph " + measurement.name
+            recorder.add(measurement)
+            show_graph(regenerate[task_index], graph, update)
+            
+        show_performance(update)
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The visualizer's modules import each other by name from the Visualizer directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Visualizer"))
+
+# Logs parsed by the tests are cached in a temporary directory rather than the user's cache
+os.environ["IMC_VISUALIZER_CACHE"] = tempfile.mkdtemp(prefix="imc_visualizer_tests_")
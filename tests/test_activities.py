@@ -0,0 +1,49 @@
+from LogParser import ProductActivityColumns, parse_activities_log
+import numpy as np
+
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss")
+
+_ROWS = [
+    "0;0;BANANAS;4999;5;4998.0;7;;;5001;5;;;;;5000.0;0.0",
+    "0;0;PEARLS;9998;2;;;;;10002;2;10003;9;10004;1;10000.0;0.0",
+    "0;100;BANANAS;4998;3;;;4996;1;5002;4;;;;;5000.0;-1.5",
+    "",
+]
+
+def test_rows_are_stored_as_columns():
+    activities = parse_activities_log([_HEADER] + _ROWS)
+
+    assert sorted(activities) == ["BANANAS", "PEARLS"]
+    bananas = activities["BANANAS"]
+    assert isinstance(bananas, ProductActivityColumns)
+    assert len(bananas) == 2
+    assert bananas.timestamp.tolist() == [0, 100]
+    assert bananas.profit_and_loss.tolist() == [0.0, -1.5]
+    assert bananas.bid_prices.shape == (2, ProductActivityColumns.LEVELS)
+
+    # Levels after the first missing one are NaN, even if the log has a value for them
+    assert bananas.bid_prices[0, :2].tolist() == [4999.0, 4998.0]
+    assert np.isnan(bananas.bid_prices[0, 2])
+    assert np.isnan(bananas.bid_prices[1, 1:]).all()
+
+def test_indexing_builds_activity_logs():
+    pearls = parse_activities_log([_HEADER] + _ROWS)["PEARLS"]
+    activity = pearls[0]
+
+    assert (activity.product, activity.day, activity.timestamp) == ("PEARLS", 0, 0)
+    assert activity.bids == [(9998, 2)]
+    assert activity.asks == [(10002, 2), (10003, 9), (10004, 1)]
+    assert activity.mid_price == 10000.0
+    assert pearls[-1].timestamp == 0
+
+def test_slices_are_columns_and_append_concatenates():
+    bananas = parse_activities_log([_HEADER] + _ROWS)["BANANAS"]
+    first = bananas[:1]
+
+    assert isinstance(first, ProductActivityColumns)
+    assert first.timestamp.tolist() == [0]
+
+    first.append(bananas[1:])
+    assert first.timestamp.tolist() == [0, 100]
+    assert first.ask_prices.shape == (2, ProductActivityColumns.LEVELS)
@@ -0,0 +1,23 @@
+from BatchRender import _plotlyjs_tag, render_logs
+from LogGenerator import DEFAULT_PRODUCTS, generate
+from plotly.offline import get_plotlyjs_version
+
+def test_cdn_tag_is_versioned():
+    assert "plotly-" + get_plotlyjs_version() + ".min.js" in _plotlyjs_tag("cdn")
+
+def test_failed_report_does_not_stop_the_batch(tmp_path):
+    logs = [str(tmp_path / "first.log"), str(tmp_path / "second.log")]
+
+    for ticks, log in zip((50, 60), logs):
+        with open(log, "w") as f:
+            generate(f, ticks, DEFAULT_PRODUCTS, 3, 1.0, [])
+
+    # A directory in the way of the first report makes writing it fail
+    output = tmp_path / "reports"
+    (output / "first.html").mkdir(parents=True)
+    summaries = render_logs(logs, str(output), workers=2, include_plotlyjs="cdn")
+
+    assert [summary["log"] for summary in summaries] == logs
+    assert summaries[0]["errors"] and summaries[0]["errors"][0].startswith("Error rendering log:")
+    assert not summaries[1]["errors"] and (output / "second.html").is_file()
+    assert (output / "index.html").is_file()
@@ -0,0 +1,24 @@
+from Benchmark import run_graph
+from LogGenerator import DEFAULT_PRODUCTS, generate
+from LogParser import parse
+import io
+import PredefinedGraphs
+
+def _data(ticks=200):
+    log = io.StringIO()
+    generate(log, ticks, DEFAULT_PRODUCTS, 3, 1.0, ["fair_value"])
+    log.seek(0)
+    return parse(log)
+
+def test_each_graph_run_builds_its_layers_again():
+    data = _data()
+    product = next(iter(data.activities))
+    heatmap = lambda data: PredefinedGraphs.order_book_heatmap(product, data)
+
+    run_graph(heatmap, data)
+    first = data.order_books
+    data.series.get(product, "mid_price")
+    run_graph(heatmap, data)
+
+    assert data.order_books is not first
+    assert data._series is None and data._trade_tape is None and data._value_columns is None
@@ -0,0 +1,44 @@
+from CompactModel import Listing, OrderDepth, Trade, TradingState
+from LogParser import parse
+import io
+import json
+import pickle
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[["BANANAS",4999,2]],"state":{{"t":{},"l":[["BANANAS","BANANAS",'
+    '"SEASHELLS"]],"od":{{"BANANAS":[{{"4999":5}},{{"5001":-5}}]}},"ot":[],"mt":[["BANANAS","Alice","Bob",5000,1,0]],'
+    '"p":{{"BANANAS":2}},"o":{{}}}},"values":{{}}}}\n')
+
+def _data():
+    return parse(io.StringIO("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t) for t in (0, 100)) +
+        "\nSubmission logs:\n\nActivities log:\nheader\n"))
+
+def test_parsed_objects_have_no_instance_dict():
+    data = _data()
+    state = data.trading_states[0]
+    objects = [state, state.listings["BANANAS"], state.order_depths["BANANAS"], state.market_trades["BANANAS"][0],
+        data.orders[0]["BANANAS"][0]]
+
+    assert [type(o).__module__ for o in objects] == ["CompactModel"] * len(objects)
+    assert not any(hasattr(o, "__dict__") for o in objects)
+
+def test_names_and_listings_are_shared_between_lines():
+    first, second = _data().trading_states
+
+    assert first.listings["BANANAS"] is second.listings["BANANAS"]
+    assert first.market_trades["BANANAS"][0].buyer is second.market_trades["BANANAS"][0].buyer
+    assert next(iter(first.position)) is next(iter(second.position))
+
+def test_compact_objects_serialize_like_the_datamodel():
+    order_depth = OrderDepth()
+    order_depth.buy_orders = {4999: 5}
+    state = TradingState(100, {"BANANAS": Listing("BANANAS", "BANANAS", "SEASHELLS")}, {"BANANAS": order_depth}, {},
+        {"BANANAS": [Trade("BANANAS", 5000, 1, "Alice", None, 0)]}, {"BANANAS": 2}, {})
+
+    encoded = json.loads(state.toJSON())
+    assert encoded["listings"]["BANANAS"] == {"symbol": "BANANAS", "product": "BANANAS", "denomination": "SEASHELLS"}
+    assert encoded["order_depths"]["BANANAS"] == {"buy_orders": {"4999": 5}, "sell_orders": {}}
+    assert encoded["market_trades"]["BANANAS"][0]["seller"] is None
+
+    copy = pickle.loads(pickle.dumps(state))
+    assert copy.order_depths["BANANAS"].buy_orders == {4999: 5}
+    assert copy.market_trades["BANANAS"][0].buyer == "Alice"
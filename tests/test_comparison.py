@@ -0,0 +1,63 @@
+from Comparison import RunColumns, align_runs, load_comparison, run_names
+import numpy as np
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],'
+    '"p":{{"BANANAS":{}}},"o":{{}}}},"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _run(name, products, days, timestamps, pnls, position_timestamps=(), positions=None):
+    return RunColumns(name, name, products, {product: np.array(days) for product in products},
+        {product: np.array(timestamps) for product in products},
+        {product: np.array(pnls[product], dtype=float) for product in products}, max(days),
+        np.array(position_timestamps, dtype=np.int64),
+        np.array(positions if positions is not None else np.zeros((len(position_timestamps), len(products)))))
+
+def test_runs_are_aligned_on_the_union_of_timestamps():
+    comparison = align_runs([
+        _run("a", ["BANANAS"], [0, 0, 0], [0, 100, 200], {"BANANAS": [1, 2, 3]}, [0, 200], [[1], [2]]),
+        _run("b", ["BANANAS", "PEARLS"], [0, 0], [100, 300], {"BANANAS": [5, 6], "PEARLS": [1, 1]}),
+    ])
+
+    assert comparison.timestamps.tolist() == [0, 100, 200, 300]
+    assert comparison.products == ["BANANAS", "PEARLS"]
+    assert np.array_equal(comparison.profit_and_loss["BANANAS"], [[1, 2, 3, np.nan], [np.nan, 5, np.nan, 6]],
+        equal_nan=True)
+    assert np.isnan(comparison.profit_and_loss["PEARLS"][0]).all()
+    assert np.array_equal(comparison.total_pnl[1], [np.nan, 6, np.nan, 7], equal_nan=True)
+    assert np.array_equal(comparison.positions["BANANAS"][0], [1, np.nan, 2, np.nan], equal_nan=True)
+    assert comparison.last_values(comparison.total_pnl).tolist() == [3, 7]
+    assert np.array_equal(comparison.difference(comparison.total_pnl)[1], [np.nan, 4, np.nan, np.nan],
+        equal_nan=True)
+
+def test_days_follow_each_other():
+    comparison = align_runs([_run("a", ["BANANAS"], [-1, -1, 0, 0], [0, 100, 0, 100], {"BANANAS": [1, 2, 3, 4]})])
+
+    assert comparison.days.tolist() == [-1, -1, 0, 0]
+    assert comparison.day_timestamps.tolist() == [0, 100, 0, 100]
+    assert comparison.timestamps.tolist() == [0, 100, 200, 300]
+    assert comparison.window(100, 200).total_pnl.tolist() == [[2, 3]]
+
+def test_run_names_are_unique():
+    assert run_names(["a/run.log", "b/run.log", "b/other.log", "c/run.log"]) == ["run", "run-2", "other", "run-3"]
+
+def test_logs_are_loaded_and_compared(tmp_path):
+    paths = []
+
+    for name, pnl in (("baseline", 1.0), ("variant", 2.5)):
+        path = tmp_path / (name + ".log")
+        path.write_text("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t, t // 100) for t in (0, 100)) +
+            "\nSubmission logs:\n\nActivities log:\n" + _HEADER +
+            "".join("0;{};BANANAS;4999;5;;;;;5001;5;;;;;5000.0;{}\n".format(t, pnl * t) for t in (0, 100)))
+        paths.append(str(path))
+
+    comparison = load_comparison(paths, workers=1)
+
+    assert comparison.names == ["baseline", "variant"]
+    assert comparison.total_pnl.tolist() == [[0, 100], [0, 250]]
+    assert comparison.positions["BANANAS"].tolist() == [[0, 1], [0, 1]]
+    assert comparison.digest is not None
+
+    parallel = load_comparison(paths, workers=2)
+    assert parallel.total_pnl.tolist() == comparison.total_pnl.tolist()
+    assert parallel.digest == comparison.digest
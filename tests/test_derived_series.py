@@ -0,0 +1,64 @@
+from DerivedSeries import rolling_mean
+from LogParser import parse
+import io
+import numpy as np
+import pytest
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":{},"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+_MID_PRICES = [10.0, 12.0, 11.0, 15.0, 13.0, 14.0]
+
+def _data():
+    trades = ['[["BANANAS","A","B",10,2,0]]', '[]', '[["BANANAS","A","B",12,1,0],["BANANAS","A","B",9,1,0]]', '[]',
+        '[]', '[]']
+    sandbox = "".join(_SANDBOX_LINE.format(t * 100, t * 100, trades[t]) for t in range(6))
+    activities = "".join("0;{};BANANAS;{};3;;;;;{};1;;;;;{};0.0\n".format(t * 100, price - 1, price + 1, price)
+        for t, price in enumerate(_MID_PRICES))
+    return parse(io.StringIO("Sandbox logs:\n" + sandbox + "\nSubmission logs:\n\nActivities log:\n" + _HEADER +
+        activities))
+
+def test_indicators_are_computed_once_and_read_only():
+    series = _data().series
+    mean = series.get("BANANAS", "rolling_mean", window=3)
+
+    assert np.isnan(mean[:2]).all()
+    assert mean[2:].tolist() == [11.0, 38 / 3, 13.0, 14.0]
+    assert series.get("BANANAS", rolling_mean, window=3) is mean
+    assert series.get("BANANAS", rolling_mean, source="mid_price", window=3) is mean
+    assert not mean.flags.writeable
+
+def test_indicators_built_on_other_indicators():
+    series = _data().series
+    std = series.get("BANANAS", "rolling_std", window=2)
+
+    assert np.allclose(std[1:], [1.0, 0.5, 2.0, 1.0, 0.5])
+    assert series.get("BANANAS", "spread").tolist() == [2.0] * 6
+    assert series.get("BANANAS", "imbalance").tolist() == [0.5] * 6
+    assert np.allclose(series.get("BANANAS", "returns")[1:3], [0.2, 11 / 12 - 1])
+
+def test_vwap_uses_market_trades():
+    vwap = _data().series.get("BANANAS", "vwap", window=3)
+
+    assert np.isnan(vwap[:2]).all()
+    assert vwap[2] == (10 * 2 + 12 + 9) / 4
+    assert np.isnan(vwap[5])
+
+def test_windows_slice_indicators_of_the_whole_log():
+    data = _data()
+    window = data.window(300, 500)
+
+    assert window.series.get("BANANAS", "rolling_mean", window=3).tolist() == [38 / 3, 13.0, 14.0]
+
+def test_unknown_and_self_dependent_indicators():
+    series = _data().series
+
+    def loop(series, product):
+        return series.get(product, loop)
+
+    with pytest.raises(KeyError):
+        series.get("BANANAS", "missing")
+
+    with pytest.raises(ValueError, match="depends on itself"):
+        series.get("BANANAS", loop)
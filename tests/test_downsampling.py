@@ -0,0 +1,36 @@
+from Downsampling import extend_trace, scatter, using_point_budget
+from GraphRunner import run_graphs
+import numpy as np
+import plotly.graph_objects as go
+import threading
+
+def _line(data):
+    return go.Figure(scatter(x=np.arange(10000), y=np.sin(np.arange(10000) / 50)))
+
+def test_point_budget_per_call():
+    sizes = {}
+
+    def render(point_budget):
+        for _, fig, _ in run_graphs([_line], None, point_budget=point_budget):
+            sizes[point_budget] = len(fig.data[0].y)
+
+    threads = [threading.Thread(target=render, args=(point_budget,)) for point_budget in (100, 1000, None)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert sizes[100] <= 102 and sizes[1000] <= 1002 and sizes[None] == 10000
+
+def test_extend_trace_stays_within_budget():
+    with using_point_budget(100):
+        trace = scatter(x=np.arange(150), y=np.arange(150.0))
+        assert len(trace.y) <= 102
+
+        # Appending to a trace that would outgrow twice the budget leaves it unchanged, so it is generated again
+        assert extend_trace(trace, np.arange(150, 190), np.arange(150.0, 190.0))
+        length = len(trace.y)
+        assert not extend_trace(trace, np.arange(190, 400), np.arange(190.0, 400.0))
+        assert len(trace.y) == length
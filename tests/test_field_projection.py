@@ -0,0 +1,57 @@
+from GraphFuncTypes import load_fields, required_fields, uses_fields
+from LogParser import parse
+from functools import partial
+import io
+import pytest
+
+_SANDBOX_LINE = ('{} {{"logs":"hello","orders":[["BANANAS",4999,2]],"state":{{"t":{},"l":[["BANANAS","BANANAS",'
+    '"SEASHELLS"]],"od":{{"BANANAS":[{{"4999":5}},{{"5001":-5}}]}},"ot":[],"mt":[["BANANAS","A","B",5000,1,0]],'
+    '"p":{{"BANANAS":2}},"o":{{}}}},"values":{{"edge":1.5}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _log():
+    return io.StringIO("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t) for t in (0, 100)) +
+        "\nSubmission logs:\n\nActivities log:\n" + _HEADER)
+
+def test_unrequested_fields_are_left_empty():
+    data = parse(_log(), fields={"position", "values"})
+    state = data.trading_states[1]
+
+    assert state.timestamp == 100
+    assert state.position == {"BANANAS": 2}
+    assert data.values[1] == {"edge": 1.5}
+    assert state.order_depths == {}
+    assert state.market_trades == {}
+    assert state.listings == {}
+    assert data.orders[1] == {}
+    assert data.logs[1] == ""
+
+def test_every_field_is_parsed_by_default():
+    state = parse(_log()).trading_states[0]
+
+    assert state.order_depths["BANANAS"].buy_orders == {4999: 5}
+    assert len(state.market_trades["BANANAS"]) == 1
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match="positions"):
+        parse(_log(), fields={"positions"})
+
+    with pytest.raises(ValueError, match="positions"):
+        uses_fields("positions")
+
+def test_graph_fields_are_combined():
+    @uses_fields("position")
+    def positions(product, data):
+        pass
+
+    @uses_fields("order_depths")
+    def spread(data):
+        pass
+
+    def undeclared(data):
+        pass
+
+    assert required_fields([partial(positions, "BANANAS"), spread]) == {"position", "order_depths"}
+    assert required_fields([spread, undeclared]) is None
+    assert load_fields([spread]) == {"order_depths", "logs", "submission_logs"}
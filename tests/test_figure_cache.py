@@ -0,0 +1,48 @@
+from FigureCache import FigureCache, data_key, figure_size, fingerprint
+from LogParser import parse
+from functools import partial
+import io
+import numpy as np
+import plotly.graph_objects as go
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+
+def _graphs(scale):
+    namespace = {"go": go}
+    exec("SCALE = " + str(scale) + "\n"
+        "def helper(x):\n"
+        "    return x * SCALE\n"
+        "def graph(product, data):\n"
+        "    return go.Figure(go.Scatter(y=[helper(1)], name=product))\n", namespace)
+    return namespace["graph"]
+
+def test_fingerprint_follows_called_functions_and_constants():
+    assert fingerprint(_graphs(2)) == fingerprint(_graphs(2))
+    assert fingerprint(_graphs(2)) != fingerprint(_graphs(3))
+    assert fingerprint(partial(_graphs(2), "BANANAS")) != fingerprint(partial(_graphs(2), "PEARLS"))
+
+def test_data_key_needs_a_digest_and_includes_the_window():
+    data = parse(io.StringIO("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t) for t in range(0, 500, 100)) +
+        "\nSubmission logs:\n\nActivities log:\nheader\n"))
+
+    assert data_key(data, 1000) is None
+
+    data.digest = "abc"
+    assert data_key(data, 1000) != data_key(data, None)
+    assert data_key(data, 1000) != data_key(data.window(100, 300), 1000)
+    assert data_key(data.window(0, 400), 1000) == data_key(data, 1000)
+
+def test_least_recently_used_figures_are_evicted():
+    figures = [go.Figure(go.Scatter(y=np.arange(1000, dtype=np.float64))) for _ in range(3)]
+    cache = FigureCache(max_bytes=figure_size(figures[0]) * 2)
+
+    cache.put(("a", "1"), figures[0])
+    cache.put(("b", "1"), figures[1])
+    assert cache.get(("a", "1")) is figures[0]
+
+    cache.put(("c", "1"), figures[2])
+    assert cache.get(("b", "1")) is None
+    assert cache.get(("a", "1")) is figures[0]
+    assert cache.get(("c", "1")) is figures[2]
+    assert cache.get(None) is None
@@ -0,0 +1,51 @@
+from GraphRunner import processes_supported, run_graphs
+from LogParser import parse
+import os
+import threading
+import time
+import plotly.graph_objects as go
+import pytest
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":{{}},"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+pytestmark = pytest.mark.skipif(not processes_supported(), reason="worker processes need fork")
+
+def _data(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t) for t in range(0, 1000, 100)) +
+        "\nSubmission logs:\n\nActivities log:\n" + _HEADER +
+        "".join("0;{};BANANAS;4999;5;;;;;5001;5;;;;;5000.0;{}\n".format(t, t) for t in range(0, 1000, 100)))
+
+    with open(path, "rb") as f:
+        return parse(f, lazy=True)
+
+def _pid(data):
+    return go.Figure(layout_title_text=str(os.getpid()))
+
+def _reads_locked_data(data):
+    return go.Figure(layout_title_text=str(data.series.get("BANANAS", "mid_price")[0] +
+        data.trading_states[0].timestamp))
+
+def test_workers_are_reused(tmp_path):
+    results = list(run_graphs([_pid] * 8, _data(tmp_path), processes=True, workers=2, timeout=30))
+
+    assert sorted(index for index, _, _ in results) == list(range(8))
+    assert len({fig.layout.title.text for _, fig, _ in results}) <= 2
+
+def test_fork_waits_for_locks_held_by_other_threads(tmp_path):
+    data = _data(tmp_path)
+    assert data.fork_locks() == [data.trading_states.sandbox_log._lock]
+    locks = data.window(200, 800).fork_locks()
+    assert len(locks) == 3
+
+    # Another thread is part way through changing the data when the workers are started
+    for lock in locks:
+        threading.Thread(target=lambda lock=lock: (lock.acquire(), time.sleep(0.3), lock.release())).start()
+
+    time.sleep(0.05)
+    results = list(run_graphs([_reads_locked_data] * 2, data, processes=True, workers=2, timeout=10))
+
+    assert [fig.layout.title.text for _, fig, _ in results] == ["5000.0", "5000.0"]
@@ -0,0 +1,77 @@
+from LogParser import IncrementalParser
+import PredefinedGraphs
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":{{}},"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _row(timestamp, pnl):
+    return "0;{};BANANAS;4999;5;;;;;5001;5;;;;;5000.0;{}".format(timestamp, pnl)
+
+def test_graphs_before_activities(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + _SANDBOX_LINE.format(0, 0))
+    parser = IncrementalParser(str(path))
+    parser.poll()
+
+    assert len(parser.data.timestamps) == 1 and not parser.data.activities
+    pnl = PredefinedGraphs.pnl(parser.data)
+    positions = PredefinedGraphs.positions(parser.data)
+    PredefinedGraphs.summary(parser.data)
+    PredefinedGraphs.mid_prices(parser.data)
+    assert len(pnl.data) == 0
+    assert not PredefinedGraphs._extend_pnl(pnl, parser.data)
+    assert PredefinedGraphs._extend_positions(positions, parser.data)
+
+def test_finish_parses_last_line(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + _SANDBOX_LINE.format(0, 0) + "\nActivities log:\n" + _HEADER + _row(0, 1.5)
+        + "\n" + _row(100, 2.5))
+    parser = IncrementalParser(str(path))
+    parser.poll()
+    assert parser.data.activities["BANANAS"].profit_and_loss.tolist() == [1.5]
+
+    assert parser.finish()
+    assert parser.data.activities["BANANAS"].profit_and_loss.tolist() == [1.5, 2.5]
+    assert not parser.finish()
+
+    # The writer was not done with the last line after all, so the file is parsed again from the start
+    with open(path, "a") as f:
+        f.write("5\n" + _row(200, 3.5) + "\n")
+
+    assert parser.poll()
+    assert parser.data.activities["BANANAS"].profit_and_loss.tolist() == [1.5, 2.55, 3.5]
+    assert len(parser.data.timestamps) == 1
+
+def test_finish_keeps_incomplete_line(tmp_path):
+    path = tmp_path / "run.log"
+    line = _SANDBOX_LINE.format(100, 100)
+    path.write_text("Sandbox logs:\n" + _SANDBOX_LINE.format(0, 0) + line[:40])
+    parser = IncrementalParser(str(path))
+    parser.poll()
+
+    # The writer paused part way through the second line, which is kept rather than parsed
+    assert not parser.finish()
+    assert len(parser.data.timestamps) == 1
+    data = parser.data
+
+    with open(path, "a") as f:
+        f.write(line[40:])
+
+    assert parser.poll() and parser.data is data
+    assert parser.data.timestamps.tolist() == [0, 100]
+
+def test_replaced_file_is_parsed_into_new_data(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + _SANDBOX_LINE.format(0, 0).rstrip("\n"))
+    parser = IncrementalParser(str(path))
+    parser.poll()
+    assert parser.finish()
+    data = parser.data
+
+    with open(path, "a") as f:
+        f.write("\n" + _SANDBOX_LINE.format(100, 100))
+
+    assert parser.poll() and parser.data is not data
+    assert parser.data.timestamps.tolist() == [0, 100]
@@ -0,0 +1,54 @@
+from Instrumentation import Recorder, measure_call, recording, stage
+from LogParser import parse
+import io
+import json
+import pytest
+import threading
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+
+def test_parse_stages_are_recorded():
+    log = io.StringIO("Sandbox logs:\n" + _SANDBOX_LINE.format(0, 0) +
+        "\nSubmission logs:\n\nActivities log:\nheader\n")
+
+    with recording(Recorder()) as recorder:
+        parse(log)
+
+    names = [measurement.name for measurement in recorder.measurements]
+    assert names[:3] == ["parse_sandbox_logs", "parse_submission_logs", "parse_activities_log"]
+    assert all(measurement.wall_seconds >= 0 for measurement in recorder.measurements)
+    assert [entry["name"] for entry in json.loads(recorder.to_json())] == names
+
+def test_failed_stages_are_measured():
+    with recording(Recorder()) as recorder:
+        with pytest.raises(KeyError):
+            with stage("lookup"):
+                {}["missing"]
+
+    assert [measurement.name for measurement in recorder.measurements] == ["lookup"]
+
+def _other_thread_stage():
+    with stage("other thread"):
+        pass
+
+def test_stages_outside_a_recording_are_not_measured():
+    recorder = Recorder()
+
+    with recording(recorder):
+        # Each thread starts without the recorder of the thread that started it
+        thread = threading.Thread(target=_other_thread_stage)
+        thread.start()
+        thread.join()
+
+    with stage("after"):
+        pass
+
+    assert recorder.measurements == []
+
+def test_measure_call_returns_the_result():
+    result, measurement = measure_call("sum", sum, [1, 2, 3])
+
+    assert result == 6
+    assert measurement.name == "sum"
+    assert measurement.cpu_seconds >= 0
@@ -0,0 +1,85 @@
+from datamodel import Listing, OrderDepth, TradingState
+from LogParser import LazySequence, parse
+from Logger import Logger
+import contextlib
+import io
+import pytest
+
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _state(tick):
+    order_depth = OrderDepth()
+    order_depth.buy_orders = {4990 + tick % 7: tick + 1}
+    order_depth.sell_orders = {5010: -tick - 1}
+    return TradingState(tick * 100, {"BANANAS": Listing("BANANAS", "BANANAS", "SEASHELLS")},
+        {"BANANAS": order_depth}, {}, {}, {}, {})
+
+def _log_file(tmp_path, ticks=20):
+    logger = Logger(delta_order_depths=True, snapshot_interval=6)
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        for tick in range(ticks):
+            logger.print("tick " + str(tick))
+            logger.flush(_state(tick), {}, {"tick": tick})
+
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + "".join(str(tick * 100) + " " + line + "\n"
+        for tick, line in enumerate(output.getvalue().splitlines())) +
+        "\nSubmission logs:\n\nActivities log:\n" + _HEADER)
+    return path
+
+def test_random_access_matches_eager_parse(tmp_path):
+    path = _log_file(tmp_path)
+
+    with open(path, "rb") as f:
+        lazy = parse(f, lazy=True)
+
+    with open(path) as f:
+        eager = parse(f)
+
+    assert isinstance(lazy.trading_states, LazySequence)
+    assert len(lazy.trading_states) == 20
+
+    # Lines logged as order depth changes are decoded from the nearest earlier snapshot
+    for index in (17, 3, 19, 0, 11):
+        state = lazy.trading_states[index]
+        expected = eager.trading_states[index]
+        assert state.timestamp == expected.timestamp
+        assert state.order_depths["BANANAS"].buy_orders == expected.order_depths["BANANAS"].buy_orders
+        assert lazy.logs[index] == "tick " + str(index) + "\n"
+        assert lazy.values[index] == {"tick": index}
+
+def test_only_accessed_lines_are_decoded(tmp_path):
+    with open(_log_file(tmp_path), "rb") as f:
+        data = parse(f, lazy=True)
+
+    sandbox_log = data.trading_states.sandbox_log
+    window = data.trading_states[5:10]
+
+    assert isinstance(window, LazySequence)
+    assert len(window) == 5
+    assert len(sandbox_log._cache) == 0
+
+    assert window[-1].timestamp == 900
+    assert 9 in sandbox_log._cache
+    assert data.timestamps.tolist() == list(range(0, 2000, 100))
+    assert len(sandbox_log._cache) < 10
+
+def test_decoded_lines_are_evicted(tmp_path):
+    with open(_log_file(tmp_path), "rb") as f:
+        data = parse(f, lazy=True)
+
+    sandbox_log = data.trading_states.sandbox_log
+    sandbox_log.cache_size = 3
+
+    for index in range(0, 20, 2):
+        data.trading_states[index]
+
+    assert list(sandbox_log._cache) == [14, 16, 18]
+
+def test_lazy_parse_needs_binary_file(tmp_path):
+    with open(_log_file(tmp_path)) as f:
+        with pytest.raises(ValueError):
+            parse(f, lazy=True)
@@ -0,0 +1,59 @@
+from LogParser import parse
+import LogCache
+import os
+import time
+
+_SANDBOX_LINE = ('{} {{"logs":"tick {}","orders":[["BANANAS",{},1]],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],'
+    '"p":{{"BANANAS":{}}},"o":{{}}}},"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _write_log(path, states, first=0):
+    path.write_text("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t, 5000 + t % 7, t, t % 20 - 10)
+        for t in range(first, first + states * 100, 100)) + "\nSubmission logs:\n\nActivities log:\n" + _HEADER +
+        "".join("0;{};BANANAS;4999;5;;;;;5001;5;;;;;5000.0;{}\n".format(t, t) for t in range(0, 1000, 100)))
+
+def test_cached_log_matches_parsed_log(tmp_path):
+    log = tmp_path / "run.log"
+    _write_log(log, 2500)
+    cache_dir = str(tmp_path / "cache")
+
+    first = LogCache.load(str(log), cache_dir=cache_dir)
+    cached = LogCache.load(str(log), cache_dir=cache_dir)
+
+    with open(log) as f:
+        parsed = parse(f)
+
+    # The second load waited for the first to finish writing the entry, and reads the states in chunks from it
+    assert len(os.listdir(cache_dir)) == 1
+    assert isinstance(cached.trading_states.sandbox_log, LogCache.CachedRecords)
+    assert cached.digest == first.digest
+    assert cached.timestamps.tolist() == parsed.timestamps.tolist()
+    assert [state.position for state in cached.trading_states] == [state.position for state in parsed.trading_states]
+    assert cached.logs[1999] == parsed.logs[1999] == "tick 199900"
+    assert repr(cached.orders[-1]) == repr(parsed.orders[-1])
+    assert cached.window(100000, 150000).timestamps.tolist() == parsed.window(100000, 150000).timestamps.tolist()
+    assert cached.activities["BANANAS"].mid_price.tolist() == parsed.activities["BANANAS"].mid_price.tolist()
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    logs = []
+
+    for number in range(3):
+        logs.append(tmp_path / ("run" + str(number) + ".log"))
+        _write_log(logs[-1], 200, number)
+        LogCache.load(str(logs[-1]), cache_dir=cache_dir)
+        LogCache.load(str(logs[-1]), cache_dir=cache_dir)
+        time.sleep(0.01)
+
+    entries = sorted(os.path.join(cache_dir, name) for name in os.listdir(cache_dir))
+    sizes = [LogCache._entry_size(entry) for entry in entries]
+    assert len(entries) == 3
+
+    # Reading the first log's entry makes it the most recently used, so the second log's entry is evicted first
+    LogCache.load(str(logs[0]), cache_dir=cache_dir)
+    LogCache._evict(cache_dir, sum(sizes) - 1, "")
+    remaining = os.listdir(cache_dir)
+
+    assert LogCache.file_digest(str(logs[0])) in remaining and LogCache.file_digest(str(logs[2])) in remaining
+    assert LogCache.file_digest(str(logs[1])) not in remaining
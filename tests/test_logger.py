@@ -0,0 +1,83 @@
+from datamodel import Listing, Order, OrderDepth, Trade, TradingState
+from LogParser import parse_sandbox_logs
+from Logger import Logger
+import contextlib
+import io
+import json
+
+def _state(timestamp, books):
+    order_depths = {}
+
+    for symbol, (buy_orders, sell_orders) in books.items():
+        order_depths[symbol] = OrderDepth()
+        order_depths[symbol].buy_orders = dict(buy_orders)
+        order_depths[symbol].sell_orders = dict(sell_orders)
+
+    listings = {symbol: Listing(symbol, symbol, "SEASHELLS") for symbol in books}
+    return TradingState(timestamp, listings, order_depths, {}, {}, {}, {})
+
+def test_delta_order_depths_keep_new_empty_books():
+    books = [
+        {"BANANAS": ({4999: 5}, {5001: -5})},
+        {"BANANAS": ({4999: 5}, {5001: -5}), "PEARLS": ({}, {})},
+        {"BANANAS": ({4998: 2}, {5001: -5}), "PEARLS": ({}, {})},
+        {"BANANAS": ({4998: 2}, {5001: -5}), "PEARLS": ({9998: 1}, {})},
+        {"BANANAS": ({4998: 2}, {5001: -5})},
+    ]
+    logger = Logger(delta_order_depths=True, snapshot_interval=100)
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        for tick, tick_books in enumerate(books):
+            logger.flush(_state(tick * 100, tick_books), {}, {})
+
+    trading_states = parse_sandbox_logs(output.getvalue().splitlines())[0]
+    assert len(trading_states) == len(books)
+
+    for state, tick_books in zip(trading_states, books):
+        assert sorted(state.order_depths) == sorted(tick_books)
+
+        for symbol, (buy_orders, sell_orders) in tick_books.items():
+            assert state.order_depths[symbol].buy_orders == buy_orders
+            assert state.order_depths[symbol].sell_orders == sell_orders
+
+def test_compress_state_leaves_delta_state_for_flush():
+    logger = Logger(delta_order_depths=True, snapshot_interval=100)
+    first = _state(0, {"BANANAS": ({4999: 5}, {5001: -5})})
+    second = _state(100, {"BANANAS": ({4998: 2}, {5001: -5})})
+
+    assert "od" in logger.compress_state(first)
+    assert "od" in logger.compress_state(first)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        logger.flush(first, {}, {})
+
+    assert logger.compress_state(second)["odd"] == {"BANANAS": [{4998: 2, 4999: 0}, {}]}
+    assert logger.compress_state(second)["odd"] == {"BANANAS": [{4998: 2, 4999: 0}, {}]}
+    assert logger.ticks_since_snapshot == 1
+
+def test_flush_writes_the_compressed_state_as_json():
+    logger = Logger()
+    state = _state(200, {"BANANAS": ({4999: 5, 4998: 1}, {5001: -5}), "PEARLS": ({}, {10002: -3})})
+    state.own_trades = {"BANANAS": [Trade("BANANAS", 4999, 2, "SUBMISSION", "Bob \"B\"", 100)]}
+    state.market_trades = {"PEARLS": [Trade("PEARLS", 10001, 1, None, None, 100)]}
+    state.position = {"BANANAS": 2}
+    state.observations = {"DOLPHIN_SIGHTINGS": 3}
+    orders = {"BANANAS": [Order("BANANAS", 4998, 3)], "PEARLS": [Order("PEARLS", 10003, -1)]}
+    values = {"fair": 5000.5, "note": "wide\nspread"}
+    output = io.StringIO()
+
+    logger.print("hello")
+
+    with contextlib.redirect_stdout(output):
+        logger.flush(state, orders, values)
+
+    line = json.loads(output.getvalue())
+    expected_state = json.loads(json.dumps(logger.compress_state(state)))
+
+    assert line["logs"] == "hello\n"
+    assert line["orders"] == logger.compress_orders(orders)
+    assert line["state"] == expected_state
+    assert line["values"] == values
+    assert isinstance(line["flush_ns"], int)
+    assert logger.logs == ""
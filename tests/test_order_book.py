@@ -0,0 +1,55 @@
+from CompactModel import TradingState
+from datamodel import OrderDepth
+from OrderBook import build_order_books
+import numpy as np
+
+def _order_depth(buy_orders, sell_orders):
+    order_depth = OrderDepth()
+    order_depth.buy_orders = buy_orders
+    order_depth.sell_orders = sell_orders
+    return order_depth
+
+def _books():
+    shared = _order_depth({9: 4}, {11: -1})
+    order_depths = [
+        {"BANANAS": _order_depth({99: 5, 98: 2}, {101: -3})},
+        {"BANANAS": _order_depth({}, {102: -4, 103: -1}), "PEARLS": shared},
+        {"BANANAS": _order_depth({100: 1}, {}), "PEARLS": shared},
+    ]
+    states = [TradingState(row * 100, {}, depths, {}, {}, {}, {}) for row, depths in enumerate(order_depths)]
+    return build_order_books(states, np.array([0, 100, 200]))
+
+def test_volumes_are_scattered_into_price_columns():
+    bananas = _books()["BANANAS"]
+
+    assert bananas.prices.tolist() == [98, 99, 100, 101, 102, 103]
+    assert bananas.volumes.tolist() == [
+        [2, 5, 0, -3, 0, 0],
+        [0, 0, 0, 0, -4, -1],
+        [0, 0, 1, 0, 0, 0],
+    ]
+
+def test_best_prices_are_nan_for_empty_sides():
+    bananas = _books()["BANANAS"]
+
+    assert np.array_equal(bananas.best_bid, [99, np.nan, 100], equal_nan=True)
+    assert np.array_equal(bananas.best_ask, [101, 102, np.nan], equal_nan=True)
+    assert bananas.best_ask_volume.tolist() == [3, 4, 0]
+    assert bananas.spread[0] == 2
+    assert bananas.microprice[0] == (99 * 3 + 101 * 5) / 8
+    assert bananas.imbalance()[0] == (5 - 3) / 8
+    assert bananas.imbalance(None)[0] == (7 - 3) / 10
+
+def test_shared_order_depths_are_copied_and_missing_products_are_empty():
+    pearls = _books()["PEARLS"]
+
+    assert pearls.volumes.tolist() == [[0, 0], [4, -1], [4, -1]]
+    assert np.isnan(pearls.mid_price[0])
+    assert pearls.mid_price[1:].tolist() == [10, 10]
+
+def test_slices_keep_every_price():
+    window = _books()["BANANAS"][1:]
+
+    assert window.timestamps.tolist() == [100, 200]
+    assert len(window.prices) == 6
+    assert np.array_equal(window.best_bid, [np.nan, 100], equal_nan=True)
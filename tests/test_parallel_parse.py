@@ -0,0 +1,32 @@
+from LogParser import parse, process_context
+import LogParser
+import io
+import threading
+
+_SANDBOX_LINE = ('{} {{"logs":"tick {}","orders":{{}},"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},'
+    '"o":{{}}}},"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _log(ticks):
+    return ("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t, t) for t in range(0, ticks * 100, 100)) +
+        "\nSubmission logs:\n\nActivities log:\n" + _HEADER)
+
+def test_workers_are_not_forked_from_this_process():
+    assert process_context().get_start_method() != "fork"
+
+def test_parallel_parse_matches_serial_parse_while_other_threads_run(monkeypatch):
+    monkeypatch.setattr(LogParser, "PARALLEL_MIN_LINES", 10)
+    monkeypatch.setattr(LogParser, "SANDBOX_CHUNK_LINES", 7)
+    stop = threading.Event()
+    threading.Thread(target=stop.wait, daemon=True).start()
+
+    try:
+        parallel = parse(io.StringIO(_log(50)), workers=2)
+    finally:
+        stop.set()
+
+    serial = parse(io.StringIO(_log(50)), workers=1)
+
+    assert [state.timestamp for state in parallel.trading_states] == list(range(0, 5000, 100))
+    assert list(parallel.logs) == list(serial.logs)
@@ -0,0 +1,53 @@
+from LogParser import parse
+import PredefinedGraphs
+import io
+import numpy as np
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":{},"p":{},"o":{{}}}},'
+    '"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+_POSITIONS = ['{"BANANAS":1}', '{"PEARLS":-2}', '{"BANANAS":3,"PEARLS":4}']
+_MARKET_TRADES = ['[["BANANAS","A","B",4998,1,0]]', '[]', '[["BANANAS","A","B",5003,2,100],["PEARLS","A","B",9,1,100]]']
+
+def _data():
+    sandbox = "".join(_SANDBOX_LINE.format(t * 100, t * 100, _MARKET_TRADES[t], _POSITIONS[t]) for t in range(3))
+    activities = "".join("0;{};{};1;1;;;;;3;1;;;;;{};{}\n".format(t * 100, product, price + t, pnl * t)
+        for t in range(3) for product, price, pnl in (("BANANAS", 5000, 1.5), ("PEARLS", 10000, -2.0)))
+    return parse(io.StringIO("Sandbox logs:\n" + sandbox + "\nSubmission logs:\n\nActivities log:\n" + _HEADER +
+        activities))
+
+def _y(trace):
+    return np.asarray(trace.y, dtype=float).tolist()
+
+def test_pnl_adds_up_every_product():
+    fig = PredefinedGraphs.pnl(_data())
+
+    assert [trace.name for trace in fig.data] == ["BANANAS", "PEARLS", "Total PnL"]
+    assert _y(fig.data[0]) == [0.0, 1.5, 3.0]
+    assert _y(fig.data[2]) == [0.0, -0.5, -1.0]
+
+def test_summary_uses_the_last_rows():
+    fig = PredefinedGraphs.summary(_data())
+
+    assert fig.data[0].value == -1.0
+    assert fig.data[1].value == 200
+
+def test_positions_default_to_zero():
+    fig = PredefinedGraphs.positions(_data())
+
+    assert _y(fig.data[0]) == [1, 0, 3]
+    assert _y(fig.data[1]) == [0, -2, 4]
+
+def test_trades_histogram_subtracts_the_base_price():
+    data = _data()
+    calls = []
+
+    def base_price(product, data, timestamp):
+        calls.append(timestamp)
+        return 5000 + timestamp // 100
+
+    assert np.asarray(PredefinedGraphs.trades_histogram("BANANAS", 5000, data).data[0].x).tolist() == [-2, 3]
+    assert np.asarray(PredefinedGraphs.trades_histogram("BANANAS", base_price, data).data[0].x).tolist() == [-2, 1]
+    assert calls == [0, 200]
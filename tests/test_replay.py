@@ -0,0 +1,61 @@
+from FigureCache import fingerprint
+from functools import partial
+from LogParser import parse
+from PredefinedGraphs import replay_latency
+from Replay import REPLAY_FIELDS, replay_alone
+import io
+import os
+import threading
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}\n')
+
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+_TRADER = '''import os
+
+class Trader:
+    def run(self, state):
+        print("tick", state.timestamp)
+        raise ValueError(str(os.getpid()))
+'''
+
+def _data():
+    log = "Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t) for t in range(0, 500, 100)) + \
+        "\nSubmission logs:\n\nActivities log:\n" + _HEADER
+    return parse(io.StringIO(log), fields=REPLAY_FIELDS)
+
+def test_replay_runs_alone(tmp_path, capsys):
+    trader_file = tmp_path / "trader.py"
+    trader_file.write_text(_TRADER)
+    data = _data()
+
+    result = replay_alone(str(trader_file), data)
+    assert result.errors[0] == "ValueError: " + str(os.getpid())
+
+    # With another thread running, the replay moves to its own process
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+
+    try:
+        result = replay_alone(str(trader_file), data)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert len(result.errors) == 5 and result.errors[0] != "ValueError: " + str(os.getpid())
+    assert result.timestamps.tolist() == [0, 100, 200, 300, 400]
+    assert "tick" not in capsys.readouterr().out
+
+def test_fingerprint_includes_trader_file(tmp_path):
+    trader_file = tmp_path / "trader.py"
+    trader_file.write_text(_TRADER)
+    graph = partial(replay_latency, str(trader_file))
+    before = fingerprint(graph)
+    assert fingerprint(graph) == before
+
+    trader_file.write_text(_TRADER.replace("tick", "timestamp"))
+    assert fingerprint(graph) != before
+    assert fingerprint(partial(replay_latency, trader_file=str(trader_file))) != before
@@ -0,0 +1,63 @@
+from LogParser import IncrementalParser, parse
+from SearchIndex import SearchIndex
+import json
+
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _sandbox_line(timestamp, logs):
+    return "{} {}\n".format(timestamp, json.dumps({"logs": logs, "orders": [], "state": {"t": timestamp, "l": [],
+        "od": {}, "ot": [], "mt": [], "p": {}, "o": {}}, "values": {}}, separators=(",", ":")))
+
+def _log(messages, submission_lines=()):
+    return ("Sandbox logs:\n" + "".join(_sandbox_line(t * 100, m) for t, m in enumerate(messages)) +
+        "\nSubmission logs:\n" + "".join(line + "\n" for line in submission_lines) + "\nActivities log:\n" + _HEADER)
+
+def test_prefix_search_matches_every_word():
+    index = SearchIndex(["Buying BANANAS", "selling bananas", "buying pearls"], ["100 Warning: slow", "no timestamp"])
+
+    assert index.search_logs("bana").tolist() == [0, 1]
+    assert index.search_logs("buy BAN").tolist() == [0]
+    assert index.search_logs("buy x").tolist() == []
+    assert index.search_submission_logs("warn").tolist() == [0]
+    assert index.submission_timestamps.tolist() == [100, -1]
+
+def test_extend_numbers_new_texts_after_existing_ones():
+    index = SearchIndex(["alpha"], [])
+    index.extend(["beta", "alphabet"], ["200 alpha"])
+
+    assert index.search_logs("alpha").tolist() == [0, 2]
+    assert index.search_logs("beta").tolist() == [1]
+    assert index.search_submission_logs("alpha").tolist() == [0]
+    assert index.submission_timestamps.tolist() == [200]
+
+def test_lazy_parse_indexes_logs_without_decoding_states(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text(_log(["quote \"wide\"", "hold", "quote tight\n"], ["300 quote sent"]))
+
+    with open(path, "rb") as f:
+        data = parse(f, lazy=True)
+
+    assert data._search_index is not None
+    assert data.search_index.search_logs("quote").tolist() == [0, 2]
+    assert data.search_index.search_logs("wide").tolist() == [0]
+    assert data.search_index.search_submission_logs("sent").tolist() == [0]
+    assert len(data.trading_states.sandbox_log._cache) == 0
+
+def test_incremental_parser_extends_index(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("Sandbox logs:\n" + _sandbox_line(0, "first"))
+    parser = IncrementalParser(str(path))
+    parser.poll()
+
+    assert parser.data.search_index.search_logs("first").tolist() == [0]
+
+    with open(path, "a") as f:
+        f.write(_sandbox_line(100, "second first") + "\nSubmission logs:\n200 later\n")
+
+    parser.poll()
+
+    assert parser.data.search_index.search_logs("first").tolist() == [0, 1]
+    assert parser.data.search_index.search_logs("second").tolist() == [1]
+    assert parser.data.search_index.search_submission_logs("later").tolist() == [0]
+    assert parser.data.search_index.submission_timestamps.tolist() == [200]
@@ -0,0 +1,40 @@
+from LogParser import parse
+import pytest
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":{{}},"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],"p":{{}},"o":{{}}}},'
+    '"values":{{}}}}')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss")
+
+def _lines(newline="\n"):
+    lines = (["Sandbox logs:"] + [_SANDBOX_LINE.format(t, t) for t in (0, 100)] +
+        ["", "Submission logs:", "100 submitted", "", "Activities log:", _HEADER,
+        "0;0;BANANAS;4999;5;;;;;5001;5;;;;;5000.0;0.0", "0;100;BANANAS;4999;5;;;;;5001;5;;;;;5000.0;2.0"])
+    return [line + newline for line in lines]
+
+def test_lines_are_read_one_at_a_time():
+    read = []
+
+    def lines():
+        for line in _lines():
+            read.append(line)
+            yield line
+
+    data = parse(lines())
+
+    assert len(read) == len(_lines())
+    assert [state.timestamp for state in data.trading_states] == [0, 100]
+    assert data.submission_logs == ["100 submitted", ""]
+    assert data.activities["BANANAS"].profit_and_loss.tolist() == [0.0, 2.0]
+
+def test_windows_line_endings():
+    data = parse(iter(_lines("\r\n")))
+
+    assert [state.timestamp for state in data.trading_states] == [0, 100]
+    assert data.activities["BANANAS"].timestamp.tolist() == [0, 100]
+
+def test_missing_section_is_reported():
+    lines = [line for line in _lines() if not line.startswith("Activities log:")]
+
+    with pytest.raises(ValueError, match="Activities log:"):
+        parse(iter(lines))
@@ -0,0 +1,45 @@
+from LogParser import parse
+import io
+import pytest
+
+_SANDBOX_LINE = ('{} {{"logs":"","orders":[],"state":{{"t":{},"l":[],"od":{{}},"ot":[],"mt":[],'
+    '"p":{{"BANANAS":{}}},"o":{{}}}},"values":{{}}}}\n')
+_HEADER = ("day;timestamp;product;bid_price_1;bid_volume_1;bid_price_2;bid_volume_2;bid_price_3;bid_volume_3;"
+    "ask_price_1;ask_volume_1;ask_price_2;ask_volume_2;ask_price_3;ask_volume_3;mid_price;profit_and_loss\n")
+
+def _data():
+    activities = "".join("{};{};BANANAS;4999;5;;;;;5001;5;;;;;{};0.0\n".format(day, t, 5000 + day * 10 + t / 100)
+        for day in (-1, 0) for t in range(0, 500, 100))
+    return parse(io.StringIO("Sandbox logs:\n" + "".join(_SANDBOX_LINE.format(t, t, t // 100)
+        for t in range(0, 500, 100)) + "\nSubmission logs:\n\nActivities log:\n" + _HEADER + activities))
+
+def test_as_of_lookup():
+    data = _data()
+
+    assert data.timestamps.tolist() == [0, 100, 200, 300, 400]
+    assert data.state_index(250) == 2
+    assert data.state_index(300) == 3
+    assert data.state_at(10000).timestamp == 400
+
+    with pytest.raises(KeyError):
+        data.state_index(-1)
+
+def test_activity_lookup_uses_the_last_day_by_default():
+    data = _data()
+
+    assert data.activity_at("BANANAS", 150).mid_price == 5001.0
+    assert data.activity_at("BANANAS", 150, day=-1).mid_price == 4991.0
+
+    with pytest.raises(KeyError):
+        data.activity_at("BANANAS", -100)
+
+def test_window_slices_states_and_activities():
+    data = _data()
+
+    assert data.time_slice(100, 300) == slice(1, 4)
+    window = data.window(150, 300)
+
+    assert [state.timestamp for state in window.trading_states] == [200, 300]
+    assert window.timestamps.tolist() == [200, 300]
+    assert window.activities["BANANAS"].timestamp.tolist() == [200, 300]
+    assert window.position_matrix(["BANANAS", "PEARLS"]).tolist() == [[2, 0], [3, 0]]
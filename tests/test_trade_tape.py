@@ -0,0 +1,22 @@
+from CompactModel import Trade, TradingState
+from TradeTape import build_trade_tape
+import numpy as np
+
+def _state(timestamp, market_trades, own_trades):
+    return TradingState(timestamp, {}, {}, own_trades, market_trades, {}, {})
+
+def test_float_prices():
+    states = [
+        _state(0, {"BANANAS": [Trade("BANANAS", 4998.0, 2, "A", "B", 0)]}, {}),
+        _state(100, {"BANANAS": [Trade("BANANAS", 4999.5, 1, "B", "A", 0)]},
+            {"PEARLS": [Trade("PEARLS", 10000, 3, "SUBMISSION", "", 0)]}),
+    ]
+    tape = build_trade_tape(states)
+
+    assert tape.price.dtype == np.float64
+    bananas = tape.of("BANANAS")
+    assert bananas.price.tolist() == [4998.0, 4999.5]
+    assert bananas.tick.tolist() == [0, 1]
+    pearls = tape.of("PEARLS", own=True)
+    assert pearls.price.tolist() == [10000.0]
+    assert pearls.quantity.tolist() == [3]
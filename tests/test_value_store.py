@@ -0,0 +1,27 @@
+from ValueStore import build_value_columns
+import numpy as np
+
+def test_numeric_values_with_missing_timestamps():
+    columns = build_value_columns([{"fair": 5000.5, "edge": 1}, {"edge": 2}, {}, {"fair": 4999, "edge": True}])
+
+    fair = columns["fair"]
+    assert fair.present.tolist() == [True, False, False, True]
+    assert fair.values.dtype == np.float64
+    assert np.array_equal(fair.values, [5000.5, np.nan, np.nan, 4999], equal_nan=True)
+    assert np.array_equal(columns["edge"].values, [1, 2, np.nan, 1], equal_nan=True)
+    assert columns["edge"].present.tolist() == [True, True, False, True]
+
+def test_other_values_are_kept_as_objects():
+    columns = build_value_columns([{"signal": "buy"}, {"signal": [1, 2]}, {}])
+    signal = columns["signal"]
+
+    assert signal.values.dtype == object
+    assert signal.values.tolist() == ["buy", [1, 2], None]
+    assert signal.present.tolist() == [True, True, False]
+
+def test_slices_keep_the_mask_aligned():
+    column = build_value_columns([{"x": 1}, {}, {"x": 3}])["x"][1:]
+
+    assert len(column) == 2
+    assert column.present.tolist() == [False, True]
+    assert column.values[column.present].tolist() == [3.0]